@@ -0,0 +1,154 @@
+"""
+Incremental achievement engine.
+
+Instead of re-counting a user's reading history on every heartbeat, the
+engine reads the user's running totals from UserReadingStats (completed
+articles, seconds spent), which the progress pipeline advances with F()
+deltas in the same transaction as the progress rows, plus the current
+streak. Concurrent flushes therefore never lose an increment. Achievement
+thresholds are cached as sorted arrays per requirement type, and each user's
+lowest unearned threshold per type is cached in NEXT, so a check only
+touches the database once a counter that changed reaches that threshold.
+
+Achievements are checked when heartbeats are flushed, which happens on the
+worker's background flush thread (see progress.py), immediately for
+completions and for the heartbeat sent when the reader leaves the page.
+"""
+import threading
+from bisect import bisect_right, insort
+
+from .cache import USER, namespace
+from .models import Achievement, ReadingStreak, UserAchievement, UserReadingStats
+from .stats import reconcile_user_stats
+
+
+REQUIREMENT_TYPES = ('articles_read', 'time_spent', 'streak_days')
+
+THRESHOLDS = namespace('achievements')  # Version stamp for the per-process threshold arrays
+_thresholds = None
+_thresholds_version = None
+_lock = threading.Lock()
+
+NEXT = namespace('achievements.next', scope=USER, timeout=60 * 60 * 24)  # {requirement_type: value or None}
+
+
+# ============ THRESHOLDS ============
+def get_thresholds():
+    """
+    Return {requirement_type: [(requirement_value, achievement_id), ...]}
+    sorted by value. Loaded once per process and reloaded when achievements change.
+    """
+    global _thresholds, _thresholds_version
+    version = THRESHOLDS.version()
+    with _lock:
+        if _thresholds is not None and _thresholds_version == version:
+            return _thresholds
+
+    thresholds = {requirement_type: [] for requirement_type in REQUIREMENT_TYPES}
+    for achievement_id, requirement_type, value in Achievement.objects.values_list(
+        'id', 'requirement_type', 'requirement_value'
+    ):
+        if requirement_type in thresholds:
+            insort(thresholds[requirement_type], (value, achievement_id))
+
+    with _lock:
+        _thresholds = thresholds
+        _thresholds_version = version
+    return thresholds
+
+
+def invalidate_thresholds():
+    """Called when an Achievement is created, changed or deleted."""
+    THRESHOLDS.invalidate()
+
+
+# ============ PER-USER COUNTERS ============
+def _next_thresholds(user_id):
+    """{requirement_type: lowest threshold the user has not earned, or None}."""
+    def build():
+        earned = set(UserAchievement.objects.filter(user_id=user_id).values_list('achievement_id', flat=True))
+        return {
+            requirement_type: next((value for value, pk in thresholds if pk not in earned), None)
+            for requirement_type, thresholds in get_thresholds().items()
+        }
+    return NEXT.get_or_set(build, user_id)
+
+
+def _counters(user_id, requirement_types, streak_days=None):
+    """{requirement_type: value} from the user's stats row and streak."""
+    counters = {}
+    if {'articles_read', 'time_spent'} & set(requirement_types):
+        row = UserReadingStats.objects.filter(user_id=user_id).values_list('completed_count', 'total_time').first()
+        if row is None:
+            reconcile_user_stats([user_id])
+            row = UserReadingStats.objects.filter(user_id=user_id).values_list('completed_count', 'total_time').get()
+        counters.update(articles_read=row[0], time_spent=row[1])
+    if 'streak_days' in requirement_types:
+        if streak_days is None:
+            streak_days = ReadingStreak.objects.filter(user_id=user_id).values_list('current_streak', flat=True).first()
+        counters['streak_days'] = streak_days or 0
+    return counters
+
+
+# ============ EVALUATION ============
+def _award(user_id, requirement_types, streak_days=None):
+    """
+    Award the achievements reached for ``requirement_types``. Types whose
+    thresholds are all earned are skipped without reading the counters, and
+    nothing more is queried unless a counter reached its next threshold.
+    """
+    next_thresholds = _next_thresholds(user_id)
+    pending = [t for t in requirement_types if next_thresholds[t] is not None]
+    if not pending:
+        return []
+    counters = _counters(user_id, pending, streak_days=streak_days)
+    due = [t for t in pending if counters[t] >= next_thresholds[t]]
+    if not due:
+        return []
+
+    thresholds = get_thresholds()
+    reached = []
+    for requirement_type in due:
+        index = bisect_right(thresholds[requirement_type], (counters[requirement_type], float('inf')))
+        reached.extend(achievement_id for _, achievement_id in thresholds[requirement_type][:index])
+        # Everything up to the counter is earned once this call returns
+        above = thresholds[requirement_type][index:]
+        next_thresholds[requirement_type] = above[0][0] if above else None
+    earned = set(
+        UserAchievement.objects.filter(user_id=user_id, achievement_id__in=reached)
+        .values_list('achievement_id', flat=True)
+    )
+    new_ids = [achievement_id for achievement_id in reached if achievement_id not in earned]
+    if new_ids:
+        UserAchievement.objects.bulk_create(
+            [UserAchievement(user_id=user_id, achievement_id=achievement_id) for achievement_id in new_ids],
+            ignore_conflicts=True,
+        )
+    NEXT.set(next_thresholds, user_id)  # bulk_create sends no post_save to invalidate it
+    return new_ids
+
+
+def record_progress(user_id, completed_delta=0, time_delta=0):
+    """
+    Award any achievements reached after progress deltas were written to the
+    user's stats row. Only the counters the deltas advanced are checked.
+    Returns the ids of newly awarded achievements.
+    """
+    requirement_types = [
+        requirement_type
+        for requirement_type, delta in (('articles_read', completed_delta), ('time_spent', time_delta))
+        if delta > 0
+    ]
+    if not requirement_types:
+        return []
+    return _award(user_id, requirement_types)
+
+
+def record_streak(user_id, streak_days):
+    """Check the streak achievements after ReadingStreak.update_streak()."""
+    return _award(user_id, ['streak_days'], streak_days=streak_days)
+
+
+def evaluate(user_id):
+    """Check a user's current totals against all thresholds."""
+    return _award(user_id, REQUIREMENT_TYPES)
@@ -1,9 +1,9 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
-    Article, Category, Tag, UserProfile, ReadingProgress,
+    Article, ArticleTranslation, Category, Tag, UserProfile, ReadingProgress,
     Note, Bookmark, Highlight, Rating, ReadingStreak,
-    Achievement, UserAchievement, ReadingList, Feedback
+    Achievement, UserAchievement, ReadingList, Feedback, OutboundEmail,
 )
 
 
@@ -22,8 +22,9 @@ class CategoryAdmin(admin.ModelAdmin):
     colored_icon.short_description = 'Icon'
     
     def article_count(self, obj):
-        return obj.articles.count()
-    article_count.short_description = 'Articles'
+        return obj.article_count
+    article_count.short_description = 'Published articles'
+    article_count.admin_order_field = 'article_count'
 
 
 # ========== TAG ADMIN ==========
@@ -34,8 +35,9 @@ class TagAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     
     def article_count(self, obj):
-        return obj.articles.count()
-    article_count.short_description = 'Articles'
+        return obj.article_count
+    article_count.short_description = 'Published articles'
+    article_count.admin_order_field = 'article_count'
 
 
 # ========== ARTICLE ADMIN ==========
@@ -100,6 +102,16 @@ class ArticleAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+# ========== ARTICLE TRANSLATION ADMIN ==========
+@admin.register(ArticleTranslation)
+class ArticleTranslationAdmin(admin.ModelAdmin):
+    list_display = ('title', 'article', 'language', 'backend', 'created_at')
+    list_filter = ('language', 'backend')
+    search_fields = ('title', 'article__title')
+    raw_id_fields = ('article',)
+    readonly_fields = ('content_hash', 'backend', 'created_at')
+
+
 # ========== USER PROFILE ADMIN ==========
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -228,6 +240,16 @@ class FeedbackAdmin(admin.ModelAdmin):
         return False  # Feedback is only added by users
 
 
+# ========== OUTBOUND EMAIL ADMIN ==========
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('to', 'subject', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('to', 'subject')
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
+    date_hierarchy = 'created_at'
+
+
 # ========== CUSTOMIZE ADMIN SITE ==========
 admin.site.site_header = "📚 SmartReader Administration"
 admin.site.site_title = "SmartReader Admin"
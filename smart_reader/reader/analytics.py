@@ -0,0 +1,291 @@
+"""
+Analytics query layer over daily rollups.
+
+SiteVisit, ArticleViewLog and User rows are aggregated per day into
+DailySiteStats, DailyArticleStats and DailyUserVisits by rollup(), which
+the `rollup_analytics` command runs from a watermark (the last closed day
+rolled up). Reports read rollups for closed days and aggregate the raw
+tables only for days past the watermark, which is normally just today.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Article, ArticleViewLog, DailyArticleStats, DailySiteStats, DailyUserVisits,
+    JobCheckpoint, SiteVisit,
+)
+
+
+WATERMARK = 'analytics_rollup'
+MAX_PERIOD_DAYS = 365
+SITE_FIELDS = ('visits', 'unique_visitors', 'registrations', 'article_views', 'reading_time')
+
+
+def _day_start(day):
+    start = datetime.combine(day, time.min)
+    if settings.USE_TZ:
+        start = timezone.make_aware(start)
+    return start
+
+
+def _date_range(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+# ============ RAW AGGREGATION ============
+class DayTotals:
+    """Per-day aggregates for a date range, computed from the raw tables."""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.site = {day: dict.fromkeys(SITE_FIELDS, 0) for day in _date_range(start, end)}
+        self.articles = {}  # (date, article_id) -> [views, seconds]
+        self.users = {}  # (date, user_id) -> visits
+
+    @classmethod
+    def from_raw(cls, start, end):
+        totals = cls(start, end)
+        range_start, range_end = _day_start(start), _day_start(end + timedelta(days=1))
+
+        visits = (
+            SiteVisit.objects
+            .filter(visit_date__gte=start, visit_date__lte=end)
+            .values('visit_date', 'user_id')
+            .annotate(visits=Count('id'))
+            .order_by()
+        )
+        for row in visits:
+            day = totals.site[row['visit_date']]
+            day['visits'] += row['visits']
+            day['unique_visitors'] += 1
+            if row['user_id'] is not None:
+                totals.users[(row['visit_date'], row['user_id'])] = row['visits']
+
+        views = (
+            ArticleViewLog.objects
+            .filter(viewed_at__gte=range_start, viewed_at__lt=range_end)
+            .annotate(day=TruncDate('viewed_at'))
+            .values('day', 'article_id')
+            .annotate(views=Count('id'), time_spent=Sum('time_spent'))
+            .order_by()
+        )
+        for row in views:
+            seconds = row['time_spent'] or 0
+            totals.articles[(row['day'], row['article_id'])] = [row['views'], seconds]
+            day = totals.site[row['day']]
+            day['article_views'] += row['views']
+            day['reading_time'] += seconds
+
+        registrations = (
+            User.objects
+            .filter(date_joined__gte=range_start, date_joined__lt=range_end)
+            .annotate(day=TruncDate('date_joined'))
+            .values('day')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for row in registrations:
+            totals.site[row['day']]['registrations'] = row['n']
+        return totals
+
+
+# ============ ROLLUP ============
+def rolled_up_until():
+    """The last closed day covered by the rollup tables, or None."""
+    value = JobCheckpoint.get_value(WATERMARK)
+    return date.fromisoformat(value) if value else None
+
+
+def _earliest_raw_day():
+    candidates = [
+        SiteVisit.objects.aggregate(first=Min('visit_date'))['first'],
+        User.objects.aggregate(first=Min('date_joined'))['first'],
+        ArticleViewLog.objects.aggregate(first=Min('viewed_at'))['first'],
+    ]
+    days = [
+        timezone.localdate(value) if isinstance(value, datetime) else value
+        for value in candidates if value is not None
+    ]
+    return min(days) if days else None
+
+
+def _store(totals):
+    """Replace the rollup rows for the totals' date range."""
+    with transaction.atomic():
+        DailySiteStats.objects.filter(date__gte=totals.start, date__lte=totals.end).delete()
+        DailyArticleStats.objects.filter(date__gte=totals.start, date__lte=totals.end).delete()
+        DailyUserVisits.objects.filter(date__gte=totals.start, date__lte=totals.end).delete()
+
+        DailySiteStats.objects.bulk_create(
+            [DailySiteStats(date=day, **values) for day, values in totals.site.items()]
+        )
+        DailyArticleStats.objects.bulk_create(
+            [
+                DailyArticleStats(date=day, article_id=article_id, views=views, time_spent=seconds)
+                for (day, article_id), (views, seconds) in totals.articles.items()
+            ],
+            batch_size=1000,
+        )
+        DailyUserVisits.objects.bulk_create(
+            [
+                DailyUserVisits(date=day, user_id=user_id, visits=visits)
+                for (day, user_id), visits in totals.users.items()
+            ],
+            batch_size=1000,
+        )
+        JobCheckpoint.set_value(WATERMARK, totals.end.isoformat())
+
+
+def rollup(since=None, chunk_days=7, today=None):
+    """
+    Roll up closed days into the daily tables and advance the watermark.
+
+    Starts at the watermark day itself, so rows written just after midnight
+    for the previous day are picked up, or at ``since`` to rebuild a range.
+    Each chunk is written in its own transaction, so an interrupted run
+    resumes where it stopped. Returns the number of days rolled up.
+    """
+    today = today or timezone.localdate()
+    end = today - timedelta(days=1)
+    start = since or rolled_up_until() or _earliest_raw_day()
+    if start is None or start > end:
+        return 0
+
+    chunk_days = max(1, chunk_days)
+    processed = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        _store(DayTotals.from_raw(chunk_start, chunk_end))
+        processed += (chunk_end - chunk_start).days + 1
+        chunk_start = chunk_end + timedelta(days=1)
+    return processed
+
+
+# ============ REPORTS ============
+def _split(start, today):
+    """Return (last day read from rollups or None, first day read from raw tables)."""
+    watermark = rolled_up_until()
+    if watermark is None or watermark < start:
+        return None, start
+    closed_end = min(watermark, today - timedelta(days=1))
+    return closed_end, closed_end + timedelta(days=1)
+
+
+def _top(closed_rows, open_counts, n):
+    """
+    Merge per-key totals from rollups and raw rows and return the top n keys.
+    closed_rows holds the top n rollup totals plus the rollup totals of every
+    key seen in the raw rows, which is enough to rank exactly.
+    """
+    combined = Counter(closed_rows)
+    combined.update(open_counts)
+    return [k for k, _ in combined.most_common(n)]
+
+
+def period_summary(start, today=None, top_articles=10, top_users=1):
+    """
+    Visits, article views and user activity from ``start`` through today.
+    Closed days come from the rollup tables; days after the watermark are
+    aggregated from the raw tables.
+    """
+    today = today or timezone.localdate()
+    closed_end, open_start = _split(start, today)
+    live = DayTotals.from_raw(open_start, today)
+
+    daily = DayTotals(start, today).site  # zero-filled
+    if closed_end is not None:
+        rows = DailySiteStats.objects.filter(date__gte=start, date__lte=closed_end).values('date', *SITE_FIELDS)
+        for row in rows:
+            daily[row.pop('date')] = row
+    daily.update(live.site)
+    days = [dict(daily[day], date=day) for day in _date_range(start, today)]
+
+    # Articles: views and reading time per article over the period
+    open_views = Counter()
+    open_time = defaultdict(int)
+    for (_, article_id), (views, seconds) in live.articles.items():
+        open_views[article_id] += views
+        open_time[article_id] += seconds
+    closed_views, closed_time = {}, {}
+    if closed_end is not None:
+        closed = (
+            DailyArticleStats.objects
+            .filter(date__gte=start, date__lte=closed_end)
+            .values('article_id')
+            .annotate(views=Sum('views'), time_spent=Sum('time_spent'))
+            .order_by()
+        )
+        for qs in (closed.order_by('-views')[:top_articles], closed.filter(article_id__in=list(open_views))):
+            for row in qs:
+                closed_views[row['article_id']] = row['views']
+                closed_time[row['article_id']] = row['time_spent'] or 0
+    article_ids = _top(closed_views, open_views, top_articles)
+    titles = dict(Article.objects.filter(pk__in=article_ids).values_list('pk', 'title'))
+    article_rows = [
+        {
+            'article__title': titles.get(article_id, ''),
+            'views': closed_views.get(article_id, 0) + open_views.get(article_id, 0),
+            'total_time': closed_time.get(article_id, 0) + open_time.get(article_id, 0),
+        }
+        for article_id in article_ids
+    ]
+
+    # Users: signed-in visitors over the period
+    open_visits = Counter()
+    for (_, user_id), visits in live.users.items():
+        open_visits[user_id] += visits
+    active_ids = set(open_visits)
+    closed_visits = {}
+    if closed_end is not None:
+        closed = (
+            DailyUserVisits.objects
+            .filter(date__gte=start, date__lte=closed_end)
+            .values('user_id')
+            .annotate(visits=Sum('visits'))
+            .order_by()
+        )
+        active_ids.update(
+            DailyUserVisits.objects
+            .filter(date__gte=start, date__lte=closed_end)
+            .values_list('user_id', flat=True)
+            .distinct()
+        )
+        for qs in (closed.order_by('-visits')[:top_users], closed.filter(user_id__in=list(open_visits))):
+            for row in qs:
+                closed_visits[row['user_id']] = row['visits']
+    user_ids = _top(closed_visits, open_visits, top_users)
+    users = {
+        row['pk']: row
+        for row in User.objects.filter(pk__in=user_ids).values('pk', 'username', 'email')
+    }
+    user_rows = [
+        {
+            'user__username': users[user_id]['username'],
+            'user__email': users[user_id]['email'],
+            'visit_count': closed_visits.get(user_id, 0) + open_visits.get(user_id, 0),
+        }
+        for user_id in user_ids if user_id in users
+    ]
+
+    return {
+        'days': days,
+        'total_visits': sum(day['visits'] for day in days),
+        'total_article_views': sum(day['article_views'] for day in days),
+        'total_reading_time': sum(day['reading_time'] for day in days),
+        'new_users': sum(day['registrations'] for day in days),
+        'active_users': len(active_ids),
+        'top_articles': article_rows,
+        'top_users': user_rows,
+    }
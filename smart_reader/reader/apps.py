@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ReaderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reader'
+
+    def ready(self):
+        from . import progress, signals, view_counter, visits
+        view_counter.register_shutdown_hook()
+        progress.register_shutdown_hook()
+        visits.register_shutdown_hook()
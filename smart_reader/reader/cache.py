@@ -0,0 +1,198 @@
+"""
+Cache key registry.
+
+Everything the app caches goes through a Namespace registered here, so key
+layout, timeouts and invalidation work the same way everywhere:
+
+    PAYLOAD = namespace('home.payload', scope=LANGUAGE, setting='HOME_CACHE_TTL', timeout=300)
+    PAYLOAD.get_or_set(build, 'EN')
+    PAYLOAD.invalidate('EN')    # drop the English entries
+    PAYLOAD.invalidate()        # drop every entry in the namespace
+
+Keys embed a version stamp for the namespace and, for scoped namespaces,
+one for the scope value (an article id, user id or language code).
+Invalidating bumps a stamp, so stale entries are never read again and
+simply expire; nothing has to enumerate keys. A namespace's version() can
+also be used on its own to tell per-process data (e.g. the autocomplete
+index) that it is out of date.
+
+Stamps are clock-based (milliseconds) rather than counters starting at 1.
+A stamp that disappears from the cache - culled by the file or locmem
+backend at MAX_ENTRIES, evicted by memcached, or expired - is recreated
+newer than any stamp before it, so losing one costs cache misses but never
+makes old entries readable again. Namespace stamps are stored without
+expiry; per-user and per-article scope stamps expire after
+SCOPE_STAMP_TIMEOUT so they do not pile up.
+
+invalidate_on() connects post_save/post_delete handlers that invalidate
+namespaces when a model changes. Hits and misses are counted per process
+and per namespace; see stats().
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+
+ARTICLE = 'article'
+USER = 'user'
+LANGUAGE = 'language'
+
+SCOPE_STAMP_TIMEOUT = 60 * 60 * 24 * 30
+
+_namespaces = {}
+_counters = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_counters_lock = threading.Lock()
+
+
+def _new_stamp():
+    return int(time.time() * 1000)
+
+
+def _count(name, outcome):
+    with _counters_lock:
+        _counters[name][outcome] += 1
+
+
+class Namespace:
+    """A family of cache entries sharing a key prefix, timeout and version stamps."""
+
+    def __init__(self, name, scope=None, timeout=None, setting=None):
+        self.name = name
+        self.scope = scope
+        self.default_timeout = timeout
+        self.setting = setting
+
+    @property
+    def timeout(self):
+        """Seconds entries live (None: until invalidated). ``setting`` overrides the default."""
+        if self.setting:
+            return getattr(settings, self.setting, self.default_timeout)
+        return self.default_timeout
+
+    # ============ VERSION STAMPS ============
+    def _version_key(self, scope_id=None):
+        if scope_id is None:
+            return f'{self.name}:version'
+        return f'{self.name}:version:{scope_id}'
+
+    def _stamp_timeout(self, scope_id):
+        return None if scope_id is None else SCOPE_STAMP_TIMEOUT
+
+    def _versions(self, scope_id=None):
+        scopes = [None] if scope_id is None else [None, scope_id]
+        found = cache.get_many([self._version_key(scope) for scope in scopes])
+        versions = []
+        for scope in scopes:
+            key = self._version_key(scope)
+            version = found.get(key)
+            if version is None:
+                version = _new_stamp()
+                if not cache.add(key, version, self._stamp_timeout(scope)):
+                    version = cache.get(key, version)  # Another worker created it first
+            versions.append(version)
+        return versions
+
+    def version(self, scope_id=None):
+        """Current stamp of the namespace, or of one scope value within it."""
+        return self._versions(scope_id)[-1]
+
+    def invalidate(self, scope_id=None):
+        """Make every entry (or every entry for ``scope_id``) unreachable."""
+        key = self._version_key(scope_id)
+        # Written with set() rather than incr(): the file cache's incr rewrites
+        # the entry with the default TIMEOUT, and the stamp must keep its own
+        cache.set(key, max(cache.get(key, 0) + 1, _new_stamp()), self._stamp_timeout(scope_id))
+
+    # ============ ENTRIES ============
+    def key(self, *parts):
+        """Full cache key. For scoped namespaces the first part is the scope value."""
+        if self.scope and not parts:
+            raise ValueError(f'{self.name} keys need a {self.scope} value')
+        scope_id = parts[0] if self.scope else None
+        versions = '.'.join(str(v) for v in self._versions(scope_id))
+        return ':'.join([self.name, f'v{versions}', *(str(part) for part in parts)])
+
+    def get(self, *parts, default=None):
+        value = cache.get(self.key(*parts))
+        _count(self.name, 'misses' if value is None else 'hits')
+        return default if value is None else value
+
+    def set(self, value, *parts):
+        cache.set(self.key(*parts), value, self.timeout)
+
+    def add(self, value, *parts):
+        """Store ``value`` unless the key is already set. True if it was stored (usable as a lock)."""
+        return cache.add(self.key(*parts), value, self.timeout)
+
+    def get_or_set(self, build, *parts):
+        """Cached value, or ``build()`` stored for next time."""
+        key = self.key(*parts)
+        value = cache.get(key)
+        if value is not None:
+            _count(self.name, 'hits')
+            return value
+        _count(self.name, 'misses')
+        value = build()
+        cache.set(key, value, self.timeout)
+        return value
+
+    def delete(self, *parts):
+        cache.delete(self.key(*parts))
+
+
+def namespace(name, scope=None, timeout=None, setting=None):
+    """Register (or return the already registered) namespace ``name``."""
+    if name not in _namespaces:
+        _namespaces[name] = Namespace(name, scope=scope, timeout=timeout, setting=setting)
+    return _namespaces[name]
+
+
+def registered():
+    return dict(_namespaces)
+
+
+# ============ INVALIDATION SIGNALS ============
+def invalidate_on(model, *namespaces, scope=None):
+    """
+    Invalidate ``namespaces`` whenever a ``model`` instance is saved or
+    deleted. ``scope(instance)`` returns the scope value(s) to invalidate;
+    without it the whole namespace is invalidated.
+    """
+    def handler(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        scope_ids = [None]
+        if scope is not None:
+            scope_ids = scope(instance)
+            if not isinstance(scope_ids, (list, tuple, set)):
+                scope_ids = [scope_ids]
+        for ns in namespaces:
+            for scope_id in scope_ids:
+                if scope_id is not None or scope is None:
+                    ns.invalidate(scope_id)
+
+    uid = f"cache:{model._meta.label}:{','.join(ns.name for ns in namespaces)}"
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+    handler.dispatch_uid = uid
+    return handler
+
+
+# ============ STATS ============
+def stats():
+    """{namespace: {'hits', 'misses', 'hit_rate'}} for this process."""
+    with _counters_lock:
+        snapshot = {name: dict(counts) for name, counts in _counters.items()}
+    for counts in snapshot.values():
+        total = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / total, 3) if total else None
+    return snapshot
+
+
+def reset_stats():
+    with _counters_lock:
+        _counters.clear()
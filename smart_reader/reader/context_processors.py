@@ -1,27 +1,18 @@
 # Context processors for the reader app
-ADMIN_EMAILS = ['sanjaigiri001@gmail.com', 'sanjaig111@gmail.com']
+from .preferences import ADMIN_EMAILS, for_request
+
 
 def admin_check(request):
     """Add is_admin flag to template context"""
-    is_admin = False
-    if request.user.is_authenticated:
-        is_admin = (
-            request.user.is_staff or 
-            request.user.is_superuser or 
-            request.user.email in ADMIN_EMAILS
-        )
     return {
-        'is_admin_user': is_admin
+        'is_admin_user': for_request(request).is_admin
     }
 
 
 def user_role(request):
     """Add user role display to template context"""
-    if request.user.is_authenticated:
-        if request.user.is_staff or request.user.is_superuser or request.user.email in ADMIN_EMAILS:
-            display_role = 'Admin'
-        else:
-            display_role = 'User'
+    display_role = for_request(request).display_role
+    if display_role:
         return {
             'display_role': display_role
         }
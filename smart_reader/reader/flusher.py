@@ -0,0 +1,150 @@
+"""
+Background flushing for the write-behind buffers.
+
+The view counter, the progress pipeline and visit tracking buffer writes in
+each worker process. Each registers its flush function here together with
+the setting holding its flush interval. A daemon thread per process calls a
+buffer's flush once its interval has passed, or straight away when the
+buffer reports that it crossed its size threshold, so no request ever runs
+a flush itself and nothing is left in a buffer when traffic stops. The
+same thread runs deferred tasks (defer()), such as rebuilding the search
+autocomplete index, that should not hold up the request that noticed them.
+
+The thread is started lazily by the first buffered write in a process, so
+it is also running in workers forked after the app was loaded. With
+BACKGROUND_FLUSH = False (the test suite) there is no thread and a buffer
+that is due is flushed inline by the request that filled it, as before,
+and deferred tasks run inline.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+TICK = 1.0  # seconds between checks for due buffers
+
+_buffers = {}
+_requested = set()
+_deferred = {}
+_lock = threading.Lock()
+_wake = threading.Event()
+_thread = None
+_thread_pid = None
+
+
+class _Buffer:
+    def __init__(self, flush, setting, default):
+        self.flush = flush
+        self.setting = setting
+        self.default = default
+        self.last_flush = time.monotonic()
+
+    @property
+    def interval(self):
+        return getattr(settings, self.setting, self.default)
+
+
+def enabled():
+    return getattr(settings, 'BACKGROUND_FLUSH', True)
+
+
+def register(name, flush, setting, default):
+    """Have ``flush()`` called every ``settings.<setting>`` (default ``default``) seconds."""
+    with _lock:
+        _buffers[name] = _Buffer(flush, setting, default)
+
+
+def notify(name, due=False):
+    """
+    Called by a buffer after each write. Starts this process's flush thread
+    if needed; with ``due`` the buffer is flushed soon (inline when the
+    thread is disabled).
+    """
+    if not enabled():
+        if due:
+            _buffers[name].flush()
+        return
+    _ensure_thread()
+    if due:
+        with _lock:
+            _requested.add(name)
+        _wake.set()
+
+
+def defer(key, task):
+    """
+    Run ``task()`` on the flush thread soon (inline when it is disabled).
+    A task is not queued again while one with the same ``key`` is pending.
+    """
+    if not enabled():
+        task()
+        return
+    _ensure_thread()
+    with _lock:
+        _deferred.setdefault(key, task)
+    _wake.set()
+
+
+def _ensure_thread():
+    global _thread, _thread_pid
+    pid = os.getpid()
+    if _thread_pid == pid and _thread.is_alive():
+        return
+    with _lock:
+        if _thread_pid != pid or not _thread.is_alive():
+            # Threads do not survive fork(), so every worker starts its own
+            _thread = threading.Thread(target=_run, name='reader-flush', daemon=True)
+            _thread_pid = pid
+            _thread.start()
+
+
+def flush_due(force=False):
+    """Flush every buffer whose interval has passed or that asked for it. Returns their names."""
+    now = time.monotonic()
+    with _lock:
+        due = [
+            (name, buffer) for name, buffer in _buffers.items()
+            if force or name in _requested or now - buffer.last_flush >= buffer.interval
+        ]
+        _requested.clear()
+        for _, buffer in due:
+            buffer.last_flush = now
+    for name, buffer in due:
+        try:
+            buffer.flush()
+        except Exception:
+            # The buffer keeps what it could not write; the next round retries
+            logger.exception('Flushing %s failed', name)
+    return [name for name, _ in due]
+
+
+def run_deferred():
+    """Run the queued deferred tasks. Returns their keys."""
+    with _lock:
+        tasks = list(_deferred.items())
+        _deferred.clear()
+    for key, task in tasks:
+        try:
+            task()
+        except Exception:
+            logger.exception('Deferred task %s failed', key)
+    return [key for key, _ in tasks]
+
+
+def _run():
+    while True:
+        _wake.wait(TICK)
+        _wake.clear()
+        if not enabled():
+            return
+        try:
+            flush_due()
+            run_deferred()
+        finally:
+            close_old_connections()
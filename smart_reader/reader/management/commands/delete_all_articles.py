@@ -1,9 +1,14 @@
 """
 Management command to delete ALL articles from the database
 Usage: python manage.py delete_all_articles
+
+The related rows go with the articles' cascade. The delete skips the
+per-row signal handlers, and the taxonomy counts, reading stats and
+caches are brought up to date once at the end (signals.delete_articles).
 """
 
 from django.core.management.base import BaseCommand
+from reader.signals import delete_articles
 from reader.models import Article, ReadingProgress, Bookmark, Highlight, Note
 
 
@@ -42,21 +47,8 @@ class Command(BaseCommand):
         
         self.stdout.write(self.style.WARNING('\n🗑️  Deleting all data...'))
         
-        # Delete in order (related data first)
-        self.stdout.write('   Deleting reading progress...')
-        ReadingProgress.objects.all().delete()
-        
-        self.stdout.write('   Deleting bookmarks...')
-        Bookmark.objects.all().delete()
-        
-        self.stdout.write('   Deleting highlights...')
-        Highlight.objects.all().delete()
-        
-        self.stdout.write('   Deleting notes...')
-        Note.objects.all().delete()
-        
-        self.stdout.write('   Deleting articles...')
-        Article.objects.all().delete()
+        self.stdout.write('   Deleting articles, reading progress, bookmarks, highlights and notes...')
+        delete_articles(Article.objects.all())
         
         self.stdout.write(self.style.SUCCESS('\n✅ ALL articles and related data deleted!'))
         self.stdout.write(f'   Remaining articles: {Article.objects.count()}')
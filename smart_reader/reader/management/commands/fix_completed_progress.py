@@ -1,6 +1,8 @@
 """
 Management command to fix completed articles that have max_scroll_percentage < 100.
 This ensures data consistency between is_completed and max_scroll_percentage fields.
+The bulk update sends no signals; that is fine because UserReadingStats does not
+depend on max_scroll_percentage (see reader/stats.py).
 """
 from django.core.management.base import BaseCommand
 from reader.models import ReadingProgress
@@ -1,11 +1,33 @@
 """
 Management command to generate 50,000 articles evenly distributed across 50 categories (1000 per category)
-Usage: python manage.py generate_massive_articles [--per-category 1000]
+Usage: python manage.py generate_massive_articles [--per-category 1000] [--workers N] [--seed N] [--dry-run] [--benchmark]
+
+Articles are written with bulk_create, one transaction per batch: slugs are
+made unique in memory against a set of every existing slug, and tag links
+are inserted straight into the through table. Bulk inserts skip
+Article.save() and the signal handlers, so read times are computed here
+and the taxonomy counts and article caches are refreshed once at the end
+(the search index is kept up to date by database triggers).
+
+With --workers N the content (pure CPU string work) is generated in a pool
+of N processes, one batch of one category per job, while this process
+stays the only database writer and inserts finished batches in order.
+Every job seeds its own random generator from --seed plus the job number,
+so a run with the same seed and batch size produces the same articles
+whatever the number of workers. --dry-run generates the same content and
+writes nothing, not even the tags.
 """
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import time
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.db import connections, transaction
 from django.utils.text import slugify
+from reader import homepage, suggestions, taxonomy
 from reader.models import Article, Category, Tag
 import random
 from datetime import datetime, timedelta
@@ -314,6 +336,86 @@ def expand_content_to_1000_lines(original_content, topic_name, category_name):
     return '\n'.join(sections)
 
 
+# Tags given to generated articles; payloads refer to them by position
+TAG_NAMES = [
+    # Business tags
+    'entrepreneurship', 'startup', 'marketing', 'finance', 'leadership',
+    'management', 'strategy', 'innovation', 'sales', 'branding',
+    'investment', 'economics', 'productivity', 'negotiation', 'networking',
+
+    # Education tags
+    'learning', 'study-tips', 'online-courses', 'skills', 'teaching',
+    'education-technology', 'student-life', 'career-development', 'research', 'training',
+
+    # Environment tags
+    'climate-change', 'sustainability', 'conservation', 'wildlife', 'renewable-energy',
+    'pollution', 'recycling', 'biodiversity', 'environmental-policy', 'green-living',
+
+    # Science tags
+    'physics', 'biology', 'chemistry', 'astronomy', 'research',
+    'genetics', 'neuroscience', 'space-exploration', 'scientific-method', 'discoveries',
+
+    # Technology tags
+    'ai', 'machine-learning', 'programming', 'web-development', 'cybersecurity',
+    'blockchain', 'cloud-computing', 'data-science', 'iot', 'robotics',
+
+    # Health tags
+    'fitness', 'nutrition', 'mental-health', 'wellness', 'medicine',
+    'yoga', 'meditation', 'diet', 'exercise', 'healthcare',
+
+    # Psychology tags
+    'mindfulness', 'self-improvement', 'motivation', 'behavior', 'therapy',
+    'cognitive-science', 'emotional-intelligence', 'relationships', 'habits', 'personality',
+
+    # History tags
+    'ancient-civilizations', 'world-war', 'culture', 'archaeology', 'historical-figures'
+]
+
+
+def build_payloads(category, count, offset, seed, tag_count):
+    """
+    Generate ``count`` article payloads (plain dicts) for ``category``, an
+    object with ``name`` and ``slug``. Touches no database, so it can run in
+    a worker process; the same seed always gives the same payloads.
+    """
+    random.seed(seed)
+    content_generators = Command().get_content_generators()
+    generator = content_generators.get(category.slug, content_generators['generic'])
+
+    payloads = []
+    for i in range(count):
+        try:
+            # Generate article data
+            article_data = generator(offset + i + 1, category)
+
+            # Expand content to 1000+ lines
+            expanded_content = expand_content_to_1000_lines(
+                article_data['content'],
+                article_data['title'],
+                category.name
+            )
+        except Exception:
+            continue
+
+        # Random tags, as positions in the command's tag list
+        num_tags = random.randint(3, 7)
+        payloads.append({
+            'title': article_data['title'],
+            'summary': article_data['summary'],
+            'content': expanded_content,
+            'difficulty': article_data.get('difficulty', random.choice(['beginner', 'intermediate', 'advanced'])),
+            'is_featured': i < 10,  # First 10 in each batch are featured
+            'book_title': article_data.get('book_title', ''),
+            'amazon_link': article_data.get('amazon_link', ''),
+            'tags': random.sample(range(tag_count), min(num_tags, tag_count)),
+        })
+    return payloads
+
+
+def _build_payloads_job(job):
+    return build_payloads(*job)
+
+
 class Command(BaseCommand):
     help = 'Generate 50,000 articles evenly distributed: 1000 articles per category across 50 categories'
 
@@ -341,6 +443,27 @@ class Command(BaseCommand):
             type=str,
             help='Generate for specific category slug (optional)'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes generating content (default: 1, no pool)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Base random seed, for reproducible runs (default: random)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Generate content but write nothing to the database'
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Report generation and insert throughput (articles/sec)'
+        )
 
     def handle(self, *args, **options):
         batch_size = options['batch']
@@ -372,49 +495,54 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f'Category "{specific_category}" not found!'))
                 return
         
-        # Ensure tags exist
-        tags = self.ensure_tags()
+        if options['dry_run']:
+            # Payloads only hold positions in TAG_NAMES, so no Tag rows are needed
+            tags = None
+            tag_count = len(TAG_NAMES)
+        else:
+            tags = self.ensure_tags()
+            tag_count = len(tags)
 
-        # Get article content generators
-        content_generators = self.get_content_generators()
-        
-        # Generate articles evenly distributed across categories
+        # Every slug in use, so new ones can be made unique without a query per article
+        slugs = set(Article.objects.values_list('slug', flat=True))
+
+        seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 31)
+        jobs, planned = self.plan_jobs(categories, per_category, batch_size, seed)
+
+        workers = max(1, options['workers'])
+        self.stdout.write(f'\n   Seed: {seed} | Workers: {workers}{" | dry run" if options["dry_run"] else ""}\n')
+
+        total_generated = 0
         total_created = 0
-        
-        # Distribute articles evenly: per_category articles for each category
-        for category in categories:
-            # Check existing articles in this category
-            existing_count = Article.objects.filter(category=category).count()
-            needed = per_category - existing_count
-            
-            if needed <= 0:
-                self.stdout.write(f'\n✓ {category.name}: Already has {existing_count} articles (target: {per_category})')
+        write_seconds = 0.0
+        started = time.monotonic()
+        for (category, count, offset, job_seed), payloads in self.run_jobs(jobs, workers, tag_count):
+            total_generated += len(payloads)
+            if options['dry_run']:
                 continue
-            
-            self.stdout.write(f'\n📦 Generating {needed:,} articles for {category.name}...')
-            
-            batch_num = 1
-            category_created = 0
-            
-            while category_created < needed:
-                current_batch = min(batch_size, needed - category_created)
-                
-                batch_created = self.generate_batch(
-                    current_batch,
-                    [category],  # Only this category
-                    tags,
-                    admin_user,
-                    content_generators,
-                    total_created + category_created
-                )
-                
-                category_created += batch_created
-                total_created += batch_created
-                batch_num += 1
-                
-                self.stdout.write(f'   Progress: {category_created:,}/{needed:,}')
-            
-            self.stdout.write(self.style.SUCCESS(f'   ✅ {category.name} complete! Total: {existing_count + category_created:,}'))
+            write_started = time.monotonic()
+            total_created += self.write_batch(payloads, category, tags, admin_user, slugs)
+            write_seconds += time.monotonic() - write_started
+            self.stdout.write(f'   {category.name}: {total_created:,}/{planned:,} written')
+        elapsed = time.monotonic() - started
+
+        if total_created:
+            # Bulk inserts bypass the signal handlers that keep these current
+            taxonomy.recount_all()
+            suggestions.bump_article_version()
+            homepage.invalidate()
+
+        if options['benchmark']:
+            rate = total_generated / elapsed if elapsed else 0
+            self.stdout.write(self.style.SUCCESS(
+                f'\n⏱️  {total_generated:,} articles in {elapsed:.1f}s with {workers} worker(s): {rate:,.1f} articles/sec'
+            ))
+            if not options['dry_run']:
+                self.stdout.write(f'   of which {write_seconds:.1f}s inserting')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'\nDry run: generated {total_generated:,} articles, wrote nothing.'))
+            return
 
         self.stdout.write(self.style.SUCCESS(f'\n🎉 Article generation complete!'))
         self.stdout.write(f'   Total articles created: {total_created:,}')
@@ -426,73 +554,108 @@ class Command(BaseCommand):
             count = Article.objects.filter(category=cat).count()
             self.stdout.write(f'   {cat.name}: {count:,}')
 
-    def generate_batch(self, count, categories, tags, admin_user, content_generators, offset):
-        """Generate a batch of articles"""
-        created = 0
-        
-        for i in range(count):
-            try:
-                # Use the specific category (since we pass only one category at a time)
-                category = categories[0]
-                
-                # Get content generator for this category
-                generator = content_generators.get(
-                    category.slug,
-                    content_generators['generic']
-                )
-                
-                # Generate article data
-                article_num = offset + i + 1
-                article_data = generator(article_num, category)
-                
-                # Expand content to 1000+ lines
-                expanded_content = expand_content_to_1000_lines(
-                    article_data['content'],
-                    article_data['title'],
-                    category.name
-                )
-                
-                # Create unique slug
-                title = article_data['title']
-                slug_base = slugify(title)
-                slug = slug_base
-                counter = 1
-                
-                while Article.objects.filter(slug=slug).exists():
-                    slug = f"{slug_base}-{counter}"
-                    counter += 1
-                
-                # Create article with expanded content
-                article = Article.objects.create(
-                    title=title,
-                    slug=slug,
-                    content=expanded_content,
-                    summary=article_data['summary'],
-                    author=admin_user,
-                    category=category,
-                    difficulty=article_data.get('difficulty', random.choice(['beginner', 'intermediate', 'advanced'])),
-                    estimated_read_time=random.randint(25, 45),  # Longer read time for expanded content
-                    is_featured=(i < 10),  # First 10 in this batch are featured
-                    is_published=True,
-                    book_title=article_data.get('book_title', ''),
-                    amazon_link=article_data.get('amazon_link', '')
-                )
-                
-                # Add random tags
-                num_tags = random.randint(3, 7)
-                selected_tags = random.sample(tags, min(num_tags, len(tags)))
-                article.tags.set(selected_tags)
-                
-                created += 1
-                
-                # Show progress every 50 articles
-                if created % 50 == 0:
-                    self.stdout.write(f'   Progress: {created}/{count}...')
-                
-            except Exception as e:
+    def plan_jobs(self, categories, per_category, batch_size, seed):
+        """
+        Split the articles each category still needs into batches. Returns
+        (jobs, planned): jobs are (category, count, offset, seed) tuples, one
+        batch each, seeded seed, seed + 1, ... in order.
+        """
+        jobs = []
+        planned = 0
+        for category in categories:
+            # Check existing articles in this category
+            existing_count = Article.objects.filter(category=category).count()
+            needed = per_category - existing_count
+
+            if needed <= 0:
+                self.stdout.write(f'\n✓ {category.name}: Already has {existing_count} articles (target: {per_category})')
                 continue
+
+            self.stdout.write(f'📦 {category.name}: {needed:,} articles to generate')
+            for start in range(0, needed, batch_size):
+                count = min(batch_size, needed - start)
+                jobs.append((category, count, planned + start, seed + len(jobs)))
+            planned += needed
+        return jobs, planned
+
+    def run_jobs(self, jobs, workers, tag_count):
+        """Yield (job, payloads) in job order, generating in a process pool when workers > 1"""
+        def args(job):
+            category, count, offset, job_seed = job
+            # Workers get a plain stand-in for the category, not a model instance
+            return SimpleNamespace(name=category.name, slug=category.slug), count, offset, job_seed, tag_count
+
+        if workers == 1:
+            for job in jobs:
+                yield job, build_payloads(*args(job))
+            return
+
+        connections.close_all()  # Forked workers must not share this process's connections
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # A few batches in flight per worker keeps them busy without holding every batch in memory
+            pending = deque()
+            remaining = iter(jobs)
+            for job in remaining:
+                pending.append((job, pool.submit(_build_payloads_job, args(job))))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                job, future = pending.popleft()
+                next_job = next(remaining, None)
+                if next_job is not None:
+                    pending.append((next_job, pool.submit(_build_payloads_job, args(next_job))))
+                yield job, future.result()
+
+    def write_batch(self, payloads, category, tags, admin_user, slugs):
+        """Insert a batch of generated articles and their tags with bulk_create"""
+        articles = [
+            Article(
+                title=payload['title'],
+                slug=self.allocate_slug(payload['title'], slugs),
+                content=payload['content'],
+                summary=payload['summary'],
+                author=admin_user,
+                category=category,
+                difficulty=payload['difficulty'],
+                # Same rule as Article.save(): 200 words per minute
+                estimated_read_time=max(1, len(payload['content'].split()) // 200),
+                is_featured=payload['is_featured'],
+                is_published=True,
+                book_title=payload['book_title'],
+                amazon_link=payload['amazon_link'],
+            )
+            for payload in payloads
+        ]
+        
+        with transaction.atomic():
+            created = Article.objects.bulk_create(articles, batch_size=500)
+            if any(article.pk is None for article in created):
+                # Backends that cannot return ids from bulk inserts (MySQL)
+                ids = dict(Article.objects.filter(slug__in=[a.slug for a in created]).values_list('slug', 'id'))
+                for article in created:
+                    article.pk = ids[article.slug]
+            Through = Article.tags.through
+            Through.objects.bulk_create(
+                [
+                    Through(article_id=article.pk, tag_id=tag_id)
+                    for article, payload in zip(created, payloads)
+                    for tag_id in {tags[index].pk for index in payload['tags']}  # The tag list repeats 'research'
+                ],
+                batch_size=2000,
+            )
         
-        return created
+        return len(created)
+
+    def allocate_slug(self, title, slugs):
+        """A slug for ``title`` that is not in ``slugs`` (which it is then added to)"""
+        slug_base = slugify(title)
+        slug = slug_base
+        counter = 1
+        while slug in slugs:
+            slug = f"{slug_base}-{counter}"
+            counter += 1
+        slugs.add(slug)
+        return slug
 
     def select_weighted_category(self, categories):
         """Select category with weighting towards those with fewer articles"""
@@ -523,42 +686,9 @@ class Command(BaseCommand):
 
     def ensure_tags(self):
         """Ensure all tags exist"""
-        tags_list = [
-            # Business tags
-            'entrepreneurship', 'startup', 'marketing', 'finance', 'leadership',
-            'management', 'strategy', 'innovation', 'sales', 'branding',
-            'investment', 'economics', 'productivity', 'negotiation', 'networking',
-            
-            # Education tags
-            'learning', 'study-tips', 'online-courses', 'skills', 'teaching',
-            'education-technology', 'student-life', 'career-development', 'research', 'training',
-            
-            # Environment tags
-            'climate-change', 'sustainability', 'conservation', 'wildlife', 'renewable-energy',
-            'pollution', 'recycling', 'biodiversity', 'environmental-policy', 'green-living',
-            
-            # Science tags
-            'physics', 'biology', 'chemistry', 'astronomy', 'research',
-            'genetics', 'neuroscience', 'space-exploration', 'scientific-method', 'discoveries',
-            
-            # Technology tags
-            'ai', 'machine-learning', 'programming', 'web-development', 'cybersecurity',
-            'blockchain', 'cloud-computing', 'data-science', 'iot', 'robotics',
-            
-            # Health tags
-            'fitness', 'nutrition', 'mental-health', 'wellness', 'medicine',
-            'yoga', 'meditation', 'diet', 'exercise', 'healthcare',
-            
-            # Psychology tags
-            'mindfulness', 'self-improvement', 'motivation', 'behavior', 'therapy',
-            'cognitive-science', 'emotional-intelligence', 'relationships', 'habits', 'personality',
-            
-            # History tags
-            'ancient-civilizations', 'world-war', 'culture', 'archaeology', 'historical-figures'
-        ]
 
         tags = []
-        for tag_name in tags_list:
+        for tag_name in TAG_NAMES:
             tag, created = Tag.objects.get_or_create(
                 slug=slugify(tag_name),
                 defaults={'name': tag_name.replace('-', ' ').title()}
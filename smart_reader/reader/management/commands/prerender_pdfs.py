@@ -0,0 +1,61 @@
+"""
+Management command to render article PDF exports ahead of time.
+Usage: python manage.py prerender_pdfs [--limit N] [--workers N]
+
+The most-viewed published articles are rendered in their own language and
+in every language they have a stored translation for. Export data is read
+in this process; rendering runs in a process pool (it is CPU-bound) and
+the workers never touch the database. Exports already on disk are skipped.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reader import pdf_export
+from reader.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Render PDF exports of the most-viewed articles into the export cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help='Number of most-viewed articles (default: 500)')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count)')
+
+    def handle(self, *args, **options):
+        articles = (
+            Article.objects.filter(is_published=True)
+            .select_related('category')
+            .prefetch_related('translations')
+            .order_by('-views_count', 'id')[:options['limit']]
+        )
+        jobs = []
+        for article in articles:
+            languages = {article.language} | {t.language for t in article.translations.all()}
+            for language in sorted(languages):
+                if not pdf_export.export_path(pdf_export.export_key(article, language)).exists():
+                    jobs.append(pdf_export.export_data(article, language))
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS('All exports are already rendered.'))
+            return
+
+        connections.close_all()  # Forked workers must not share this process's connections
+        started = time.monotonic()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(pdf_export.render_export, data): data['path'] for data in jobs}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{futures[future]}: {e}')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {done:,} exports ({failed:,} failed) in {elapsed:.1f}s '
+            f'({done / elapsed if elapsed else 0:.1f}/s).'
+        ))
@@ -0,0 +1,84 @@
+"""
+Management command to translate published articles ahead of time.
+Usage: python manage.py pretranslate_articles [--languages HI TA ML] [--workers N] [--limit N] [--force]
+
+Articles are processed most-viewed first. Translation requests run in a
+thread pool (they are network-bound); results are saved from the main
+thread, so the database sees one writer. Articles whose stored translation
+still matches their text are skipped unless --force is given.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reader import translation
+from reader.models import LANGUAGE_CHOICES, Article, ArticleTranslation
+
+
+class Command(BaseCommand):
+    help = 'Translate published articles into the other site languages and store the results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--languages', nargs='+', help='Target languages (default: all site languages)')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent translations (default: 8)')
+        parser.add_argument('--limit', type=int, help='Only the N most-viewed articles')
+        parser.add_argument('--force', action='store_true', help='Re-translate even if up to date')
+
+    def handle(self, *args, **options):
+        codes = [code for code, _ in LANGUAGE_CHOICES]
+        languages = [language.upper() for language in options['languages'] or codes]
+        unknown = set(languages) - set(codes)
+        if unknown:
+            raise CommandError(f"Unknown language(s): {', '.join(sorted(unknown))}")
+
+        articles = Article.objects.filter(is_published=True).order_by('-views_count', 'id')
+        if options['limit']:
+            articles = articles[:options['limit']]
+        existing = set()
+        if not options['force']:
+            existing = set(ArticleTranslation.objects.values_list('article_id', 'language', 'content_hash'))
+
+        backend = translation.get_backend()
+        batch_size = max(1, options['workers']) * 4
+        started = time.monotonic()
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            # Batches keep only a few articles' text in memory at a time
+            for batch in self.pending(articles, languages, existing, batch_size):
+                futures = {
+                    pool.submit(translation.translate_fields, article, language, backend): (article, language, digest)
+                    for article, language, digest in batch
+                }
+                for future in as_completed(futures):
+                    article, language, digest = futures[future]
+                    try:
+                        fields = future.result()
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'{article.slug} ({language}): {e}')
+                        continue
+                    translation.store_translation(article, language, fields, digest)
+                    done += 1
+
+        if not done and not failed:
+            self.stdout.write(self.style.SUCCESS('All translations are up to date.'))
+            return
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Translated {done:,} article versions ({failed:,} failed) with {backend.name} in {elapsed:.1f}s.'
+        ))
+
+    def pending(self, articles, languages, existing, batch_size):
+        """Yield lists of (article, language, content hash) still to translate."""
+        batch = []
+        for article in articles.iterator(chunk_size=500):
+            digest = translation.content_hash(article)
+            for language in languages:
+                if language != article.language and (article.pk, language, digest) not in existing:
+                    batch.append((article, language, digest))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,56 @@
+"""
+Management command to delete expired OTPs and old visit/view logs.
+Usage: python manage.py purge_stale_data [--days N] [--chunk-size N] [--archive DIR] [--pause SECONDS] [--dry-run]
+
+Run it daily after rollup_analytics: visit and view logs are only purged
+for days the rollups already cover. Deletes run in short pk-ranged chunks
+and an interrupted run resumes from its checkpoint.
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from reader import retention
+
+
+class Command(BaseCommand):
+    help = 'Delete expired OTPs and visit/view logs older than the retention horizon'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Keep this many days of visit/view logs (default: LOG_RETENTION_DAYS)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per transaction (default: 5000)')
+        parser.add_argument('--archive', help='Append deleted rows to gzipped JSON lines files in this directory')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between chunks')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be deleted')
+
+    def handle(self, *args, **options):
+        if options['archive']:
+            Path(options['archive']).mkdir(parents=True, exist_ok=True)
+
+        found = retention.targets(options['days'])
+        if len(found) == 1:
+            self.stdout.write(self.style.WARNING(
+                'No analytics rollups yet; keeping visit/view logs (run rollup_analytics first).'
+            ))
+        else:
+            cutoff = found[1][2]['visit_date__lt']
+            self.stdout.write(f'Keeping visit/view logs from {cutoff} on.')
+
+        total = 0
+        for name, model, conditions in found:
+            count, seconds = retention.purge(
+                name, model, conditions,
+                chunk_size=max(1, options['chunk_size']),
+                archive_dir=options['archive'],
+                pause=options['pause'],
+                dry_run=options['dry_run'],
+            )
+            total += count
+            if options['dry_run']:
+                self.stdout.write(f'{name}: {count:,} rows would be deleted')
+            else:
+                rate = count / seconds if seconds else 0
+                self.stdout.write(f'{name}: deleted {count:,} rows in {seconds:.1f}s ({rate:,.0f} rows/s)')
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total:,} rows.'))
@@ -0,0 +1,25 @@
+"""
+Management command to rebuild the article full-text search index.
+Usage: python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from reader import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for articles (SQLite FTS5 / PostgreSQL tsvector)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias (default: default)')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        indexed = search.rebuild(connection)
+        if indexed is None:
+            self.stdout.write(self.style.WARNING(
+                f'Full-text search is not supported on {connection.vendor}; searches use icontains filters.'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed:,} articles.'))
@@ -0,0 +1,31 @@
+"""
+Management command to rebuild the denormalized per-user reading stats.
+Usage: python manage.py reconcile_reading_stats [--user USERNAME] [--batch-size N]
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from reader.stats import reconcile_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount UserReadingStats rows from reading progress, notes and bookmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only reconcile this username')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users per batch (default: 500)')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        batch_size = max(1, options['batch_size'])
+        user_ids = list(users.values_list('pk', flat=True))
+        written = 0
+        for start in range(0, len(user_ids), batch_size):
+            written += reconcile_user_stats(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Reconciled reading stats for {written:,} users.'))
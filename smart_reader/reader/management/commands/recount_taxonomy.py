@@ -0,0 +1,18 @@
+"""
+Management command to rebuild the denormalized category and tag article counts.
+Usage: python manage.py recount_taxonomy
+"""
+from django.core.management.base import BaseCommand
+
+from reader import taxonomy
+
+
+class Command(BaseCommand):
+    help = 'Recount published articles per category and tag (per language and in total)'
+
+    def handle(self, *args, **options):
+        categories = taxonomy.recount_categories()
+        tags = taxonomy.recount_tags()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted {categories:,} category and {tags:,} tag language counts.'
+        ))
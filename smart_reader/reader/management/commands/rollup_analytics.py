@@ -0,0 +1,35 @@
+"""
+Management command to roll up visit, view and registration logs into daily tables.
+Usage: python manage.py rollup_analytics [--since YYYY-MM-DD] [--chunk-days N]
+
+Run it daily (e.g. from cron shortly after midnight). Each run continues
+from the last closed day already rolled up.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reader import analytics
+
+
+class Command(BaseCommand):
+    help = 'Aggregate SiteVisit, ArticleViewLog and registrations into daily rollup tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Rebuild rollups from this date (YYYY-MM-DD)')
+        parser.add_argument('--chunk-days', type=int, default=7, help='Days per transaction (default: 7)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        days = analytics.rollup(since=since, chunk_days=options['chunk_days'])
+        watermark = analytics.rolled_up_until()
+        if not days:
+            self.stdout.write(self.style.SUCCESS(f'Nothing to roll up (rolled up until {watermark}).'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {days:,} days; rollups now cover up to {watermark}.'))
@@ -0,0 +1,42 @@
+"""
+Management command to deliver queued outbound email.
+Usage: python manage.py send_queued_email [--loop] [--interval SECONDS] [--batch-size N]
+
+Without --loop, sends everything that is due and exits (suitable for cron).
+With --loop, keeps running as a worker and polls every --interval seconds
+when the queue is empty.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reader import outbox
+
+
+class Command(BaseCommand):
+    help = 'Send due messages from the outbound email queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new messages')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls when idle (default: 2)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages per SMTP connection')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            close_old_connections()
+            sent, failed = outbox.send_batch(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                if options['verbosity'] > 1 or options['loop']:
+                    self.stdout.write(f'Sent {sent:,}, failed {failed:,}')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {total_sent:,} emails ({total_failed:,} failed or scheduled for retry).'
+        ))
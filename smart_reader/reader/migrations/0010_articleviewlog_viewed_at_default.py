@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 17:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reader', '0009_readinglistaccessattempt_delete_lock_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='articleviewlog',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 17:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reader', '0010_articleviewlog_viewed_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserReadingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_count', models.IntegerField(default=0)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('total_time', models.BigIntegerField(default=0)),
+                ('notes_count', models.IntegerField(default=0)),
+                ('bookmarks_count', models.IntegerField(default=0)),
+                ('recent_completions', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reading_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'User reading stats',
+            },
+        ),
+    ]
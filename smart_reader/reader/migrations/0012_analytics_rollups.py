@@ -0,0 +1,70 @@
+# Generated by Django 4.2 on 2026-10-18 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reader', '0011_userreadingstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySiteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('visits', models.IntegerField(default=0)),
+                ('unique_visitors', models.IntegerField(default=0)),
+                ('registrations', models.IntegerField(default=0)),
+                ('article_views', models.IntegerField(default=0)),
+                ('reading_time', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily site stats',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyUserVisits',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('visits', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_visits', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily user visits',
+                'ordering': ['-date'],
+                'unique_together': {('date', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyArticleStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.IntegerField(default=0)),
+                ('time_spent', models.BigIntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='reader.article')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily article stats',
+                'ordering': ['-date'],
+                'unique_together': {('date', 'article')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 17:23
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reader', '0012_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='visit_date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='visit_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
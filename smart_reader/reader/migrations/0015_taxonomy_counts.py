@@ -0,0 +1,86 @@
+# Generated by Django 4.2 on 2026-10-18 17:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_articles(apps, schema_editor):
+    # Same counts as reader.taxonomy.recount_all(), on the historical models
+    db = schema_editor.connection.alias
+    Article = apps.get_model('reader', 'Article')
+    published = Article.objects.using(db).filter(is_published=True).order_by()
+    links = Article.tags.through.objects.using(db).filter(article__is_published=True).order_by()
+
+    for model, count_model, key, rows in (
+        ('Category', 'CategoryArticleCount', 'category',
+         published.filter(category__isnull=False).values_list('category_id', 'language').annotate(n=Count('id'))),
+        ('Tag', 'TagArticleCount', 'tag',
+         links.values_list('tag_id', 'article__language').annotate(n=Count('article_id'))),
+    ):
+        model = apps.get_model('reader', model)
+        count_model = apps.get_model('reader', count_model)
+        count_model.objects.using(db).bulk_create(
+            [count_model(**{f'{key}_id': pk, 'language': language, 'article_count': n}) for pk, language, n in rows],
+            batch_size=500,
+        )
+        totals = count_model.objects.using(db).filter(**{key: OuterRef('pk')}).order_by().values(key).annotate(
+            total=Sum('article_count')
+        ).values('total')
+        model.objects.using(db).update(article_count=Coalesce(Subquery(totals), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reader', '0014_article_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='article_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='article_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='TagArticleCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('EN', 'English'), ('HI', 'हिंदी (Hindi)'), ('TA', 'தமிழ் (Tamil)'), ('ML', 'മലയാളം (Malayalam)')], max_length=2)),
+                ('article_count', models.IntegerField(default=0)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='language_counts', to='reader.tag')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CategoryArticleCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('EN', 'English'), ('HI', 'हिंदी (Hindi)'), ('TA', 'தமிழ் (Tamil)'), ('ML', 'മലയാളം (Malayalam)')], max_length=2)),
+                ('article_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='language_counts', to='reader.category')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tagarticlecount',
+            index=models.Index(fields=['language', '-article_count'], name='reader_taga_languag_570d6c_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tagarticlecount',
+            unique_together={('tag', 'language')},
+        ),
+        migrations.AddIndex(
+            model_name='categoryarticlecount',
+            index=models.Index(fields=['language', '-article_count'], name='reader_cate_languag_3748fd_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='categoryarticlecount',
+            unique_together={('category', 'language')},
+        ),
+        migrations.RunPython(count_articles, migrations.RunPython.noop),
+    ]
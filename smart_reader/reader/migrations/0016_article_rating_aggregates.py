@@ -0,0 +1,48 @@
+# Generated by Django 4.2 on 2026-10-18 17:32
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def count_ratings(apps, schema_editor):
+    # Same aggregates as reader.ratings.recount(), on the historical models
+    db = schema_editor.connection.alias
+    Article = apps.get_model('reader', 'Article')
+    Rating = apps.get_model('reader', 'Rating')
+    ratings = Rating.objects.using(db).filter(article=OuterRef('pk')).order_by().values('article')
+    Article.objects.using(db).update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('score')).values('total')), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(n=Count('id')).values('n')), 0),
+        rating_avg=Coalesce(Subquery(ratings.annotate(avg=Avg('score')).values('avg')), 0.0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reader', '0015_taxonomy_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='rating_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['language', '-rating_avg', '-rating_count', '-id'], name='article_lang_rating_idx'),
+        ),
+        migrations.RunPython(count_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reader', '0016_article_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otpverification',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['language', '-created_at', '-id'], name='article_published_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['language', '-views_count', '-id'], name='article_published_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['language', '-created_at'], name='article_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articleviewlog',
+            index=models.Index(fields=['viewed_at'], name='viewlog_viewed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articleviewlog',
+            index=models.Index(fields=['user', '-viewed_at'], name='viewlog_user_viewed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otpverification',
+            index=models.Index(fields=['email', '-created_at'], name='otp_email_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingprogress',
+            index=models.Index(fields=['user', '-last_read_at'], name='progress_user_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingprogress',
+            index=models.Index(fields=['user', 'is_completed', '-last_read_at'], name='progress_user_done_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingprogress',
+            index=models.Index(fields=['last_read_at'], name='progress_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingprogress',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['last_read_at'], name='progress_completed_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sitevisit',
+            index=models.Index(fields=['visit_date', 'user'], name='sitevisit_date_user_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reader', '0017_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTranslation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('EN', 'English'), ('HI', 'हिंदी (Hindi)'), ('TA', 'தமிழ் (Tamil)'), ('ML', 'മലയാളം (Malayalam)')], max_length=2)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('title', models.CharField(max_length=500)),
+                ('summary', models.TextField(blank=True)),
+                ('content', models.TextField()),
+                ('backend', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='reader.article')),
+            ],
+            options={
+                'unique_together': {('article', 'language', 'content_hash')},
+            },
+        ),
+    ]
@@ -41,7 +41,7 @@ class UserProfile(models.Model):
 
 # ========== OTP VERIFICATION ==========
 class OTPVerification(models.Model):
-    email = models.EmailField(db_index=True)  # Index for faster lookups
+    email = models.EmailField()  # Indexed with created_at below
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
@@ -62,12 +62,50 @@ class OTPVerification(models.Model):
         return timezone.now() > self.expires_at
     
     def increment_attempts(self):
-        """Increment failed verification attempts"""
+        """Increment failed verification attempts (atomically, without rewriting the row)"""
+        OTPVerification.objects.filter(pk=self.pk).update(attempts=models.F('attempts') + 1)
         self.attempts += 1
-        self.save()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['email', '-created_at'], name='otp_email_created_idx'),
+        ]
+
+
+# ========== OUTBOUND EMAIL QUEUE ==========
+class OutboundEmail(models.Model):
+    """An email waiting for (or done with) delivery by the send_queued_email worker."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to = models.EmailField()
+    from_email = models.CharField(max_length=254, blank=True)  # Blank uses DEFAULT_FROM_EMAIL
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    kind = models.CharField(max_length=30, blank=True)  # 'otp', 'account', 'streak', ...
+    priority = models.SmallIntegerField(default=0)  # Higher is sent first
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind or 'email'} to {self.to} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_due_idx'),
+        ]
 
 
 # ========== SITE VISIT TRACKING ==========
@@ -75,12 +113,15 @@ class SiteVisit(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
-    visit_date = models.DateField(auto_now_add=True)
-    visit_time = models.DateTimeField(auto_now_add=True)
+    visit_date = models.DateField(default=timezone.localdate)  # set from the request time by reader/visits.py
+    visit_time = models.DateTimeField(default=timezone.now)
     page_visited = models.CharField(max_length=255, blank=True)
     
     class Meta:
         ordering = ['-visit_time']
+        indexes = [
+            models.Index(fields=['visit_date', 'user'], name='sitevisit_date_user_idx'),
+        ]
     
     def __str__(self):
         return f"Visit on {self.visit_date} - {self.user or 'Anonymous'}"
@@ -91,16 +132,91 @@ class ArticleViewLog(models.Model):
     article = models.ForeignKey('Article', on_delete=models.CASCADE, related_name='view_logs')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    viewed_at = models.DateTimeField(default=timezone.now)  # set by the progress pipeline on bulk writes
     time_spent = models.IntegerField(default=0)  # seconds
     
     class Meta:
         ordering = ['-viewed_at']
+        indexes = [
+            models.Index(fields=['viewed_at'], name='viewlog_viewed_idx'),
+            models.Index(fields=['user', '-viewed_at'], name='viewlog_user_viewed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.article.title} viewed by {self.user or 'Anonymous'}"
 
 
+# ========== ANALYTICS ROLLUPS ==========
+class DailySiteStats(models.Model):
+    """
+    Site-wide totals for one closed day, built from SiteVisit, ArticleViewLog
+    and User by the `rollup_analytics` command (see reader/analytics.py).
+    """
+    date = models.DateField(unique=True)
+    visits = models.IntegerField(default=0)
+    unique_visitors = models.IntegerField(default=0)  # Anonymous visitors count as one, like the raw query
+    registrations = models.IntegerField(default=0)
+    article_views = models.IntegerField(default=0)
+    reading_time = models.BigIntegerField(default=0)  # seconds
+    
+    class Meta:
+        ordering = ['-date']
+        verbose_name_plural = "Daily site stats"
+    
+    def __str__(self):
+        return f"Site stats for {self.date}"
+
+
+class DailyArticleStats(models.Model):
+    """Views and reading time per article for one closed day."""
+    date = models.DateField()
+    article = models.ForeignKey('Article', on_delete=models.CASCADE, related_name='daily_stats')
+    views = models.IntegerField(default=0)
+    time_spent = models.BigIntegerField(default=0)  # seconds
+    
+    class Meta:
+        unique_together = ['date', 'article']
+        ordering = ['-date']
+        verbose_name_plural = "Daily article stats"
+    
+    def __str__(self):
+        return f"{self.article_id} on {self.date}: {self.views} views"
+
+
+class DailyUserVisits(models.Model):
+    """Visits per signed-in user for one closed day (active and top users)."""
+    date = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_visits')
+    visits = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['date', 'user']
+        ordering = ['-date']
+        verbose_name_plural = "Daily user visits"
+    
+    def __str__(self):
+        return f"{self.user_id} on {self.date}: {self.visits} visits"
+
+
+class JobCheckpoint(models.Model):
+    """Where a resumable background job (rollups, maintenance) left off."""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+    
+    @classmethod
+    def get_value(cls, name, default=None):
+        value = cls.objects.filter(name=name).values_list('value', flat=True).first()
+        return default if value in (None, '') else value
+    
+    @classmethod
+    def set_value(cls, name, value):
+        cls.objects.update_or_create(name=name, defaults={'value': str(value)})
+
+
 # ========== CATEGORY & TAGS ==========
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -108,6 +224,7 @@ class Category(models.Model):
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, default='fa-folder')  # FontAwesome icon
     color = models.CharField(max_length=7, default='#6366f1')  # Hex color
+    article_count = models.IntegerField(default=0, editable=False)  # Published articles, all languages
     
     class Meta:
         verbose_name_plural = "Categories"
@@ -119,11 +236,43 @@ class Category(models.Model):
 class Tag(models.Model):
     name = models.CharField(max_length=50)
     slug = models.SlugField(max_length=255, unique=True)
+    article_count = models.IntegerField(default=0, editable=False)  # Published articles, all languages
     
     def __str__(self):
         return self.name
 
 
+class CategoryArticleCount(models.Model):
+    """
+    Published articles per category and language, kept up to date by signal
+    handlers (see reader/taxonomy.py). Rebuild with `recount_taxonomy`.
+    """
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='language_counts')
+    language = models.CharField(max_length=2, choices=LANGUAGE_CHOICES)
+    article_count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['category', 'language']
+        indexes = [models.Index(fields=['language', '-article_count'])]
+    
+    def __str__(self):
+        return f"{self.category} ({self.language}): {self.article_count}"
+
+
+class TagArticleCount(models.Model):
+    """Published articles per tag and language; see CategoryArticleCount."""
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='language_counts')
+    language = models.CharField(max_length=2, choices=LANGUAGE_CHOICES)
+    article_count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['tag', 'language']
+        indexes = [models.Index(fields=['language', '-article_count'])]
+    
+    def __str__(self):
+        return f"{self.tag} ({self.language}): {self.article_count}"
+
+
 # ========== ARTICLE ==========
 class Article(models.Model):
     DIFFICULTY_CHOICES = [
@@ -146,6 +295,10 @@ class Article(models.Model):
     is_featured = models.BooleanField(default=False)
     is_published = models.BooleanField(default=True)
     views_count = models.IntegerField(default=0)
+    # Rating aggregates, kept up to date by signal handlers (see reader/ratings.py)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_count = models.IntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -157,6 +310,25 @@ class Article(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Partial on is_published: SQLite only matches a bare boolean filter against an index condition
+            models.Index(
+                fields=['language', '-created_at', '-id'],
+                condition=models.Q(is_published=True),
+                name='article_published_created_idx',
+            ),
+            models.Index(
+                fields=['language', '-views_count', '-id'],
+                condition=models.Q(is_published=True),
+                name='article_published_views_idx',
+            ),
+            models.Index(
+                fields=['language', '-created_at'],
+                condition=models.Q(is_featured=True, is_published=True),
+                name='article_featured_idx',
+            ),
+            models.Index(fields=['language', '-rating_avg', '-rating_count', '-id'], name='article_lang_rating_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -165,6 +337,17 @@ class Article(models.Model):
         """Check if any purchase link is available"""
         return bool(self.amazon_link or self.flipkart_link or self.meesho_link)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember loaded values so signal handlers can tell which taxonomy counts changed
+        instance._loaded_state = (
+            instance.__dict__.get('category_id'),
+            instance.__dict__.get('language'),
+            instance.__dict__.get('is_published'),
+        )
+        return instance
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             from django.utils.text import slugify
@@ -183,6 +366,29 @@ class Article(models.Model):
         super().save(*args, **kwargs)
 
 
+# ========== ARTICLE TRANSLATION ==========
+class ArticleTranslation(models.Model):
+    """
+    Machine translation of an article, written by reader/translation.py.
+    content_hash fingerprints the source title, summary and content, so a
+    translation stops being served as soon as the article is edited.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='translations')
+    language = models.CharField(max_length=2, choices=LANGUAGE_CHOICES)
+    content_hash = models.CharField(max_length=64)
+    title = models.CharField(max_length=500)
+    summary = models.TextField(blank=True)
+    content = models.TextField()
+    backend = models.CharField(max_length=100, blank=True)  # Translator that produced it
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['article', 'language', 'content_hash']
+    
+    def __str__(self):
+        return f"{self.article.title} ({self.language})"
+
+
 # ========== READING PROGRESS ==========
 class ReadingProgress(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reading_progress')
@@ -197,10 +403,23 @@ class ReadingProgress(models.Model):
 
     class Meta:
         unique_together = ['user', 'article']
+        indexes = [
+            models.Index(fields=['user', '-last_read_at'], name='progress_user_read_idx'),
+            models.Index(fields=['user', 'is_completed', '-last_read_at'], name='progress_user_done_read_idx'),
+            models.Index(fields=['last_read_at'], name='progress_read_idx'),
+            models.Index(fields=['last_read_at'], condition=models.Q(is_completed=True), name='progress_completed_read_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.article.title} ({self.max_scroll_percentage}%)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember loaded values so signal handlers can compute stat deltas
+        instance._loaded_state = (instance.__dict__.get('is_completed'), instance.__dict__.get('time_spent'))
+        return instance
+    
     def update_progress(self, new_percentage, position=0, time=0):
         """Update progress - percentage only increases, never decreases"""
         self.last_position = position
@@ -220,6 +439,40 @@ class ReadingProgress(models.Model):
         self.save()
 
 
+# ========== READING STATS (DENORMALIZED) ==========
+class UserReadingStats(models.Model):
+    """
+    Per-user reading totals kept up to date by the progress pipeline and by
+    signal handlers (see reader/stats.py). Rebuild with `reconcile_reading_stats`.
+    """
+    RECENT_DAYS = 14  # Days of completion history kept for weekly counts
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='reading_stats')
+    completed_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    total_time = models.BigIntegerField(default=0)  # seconds
+    notes_count = models.IntegerField(default=0)
+    bookmarks_count = models.IntegerField(default=0)
+    recent_completions = models.JSONField(default=dict, blank=True)  # {'YYYY-MM-DD': completions}
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "User reading stats"
+    
+    def __str__(self):
+        return f"Reading stats for {self.user.username}"
+    
+    @property
+    def total_articles(self):
+        return self.completed_count + self.in_progress_count
+    
+    def weekly_reads(self, today=None):
+        """Articles completed in the last 7 days (same window as the weekly goal)."""
+        today = today or timezone.localdate()
+        start = (today - timedelta(days=7)).isoformat()
+        return sum(count for day, count in self.recent_completions.items() if day >= start)
+
+
 # ========== BOOKMARKS ==========
 class Bookmark(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookmarks')
@@ -285,6 +538,13 @@ class Rating(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.article.title}: {self.score}★"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded score so signal handlers can apply the difference
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
 
 
 # ========== FEEDBACK ==========
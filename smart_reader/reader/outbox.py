@@ -0,0 +1,141 @@
+"""
+Outbound email queue.
+
+Views never talk to the mail server: enqueue() stores an OutboundEmail row
+and returns, and the `send_queued_email` worker delivers due messages in
+batches, each batch over one reused connection from settings.EMAIL_BACKEND
+(EMAIL_TIMEOUT bounds every SMTP call). A failed message is retried with
+exponential backoff (EMAIL_RETRY_DELAY * 2^n seconds, at most
+EMAIL_MAX_ATTEMPTS sends) and then marked failed.
+
+Claimed messages are leased: they are marked 'sending' with
+next_attempt_at pushed EMAIL_SEND_LEASE seconds ahead, so messages held by
+a worker that died are picked up again once the lease runs out. Where the
+database has no SKIP LOCKED (SQLite), each row is leased with a conditional
+UPDATE instead, so two workers never claim the same message.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(to, subject, body, html_body='', from_email=None, headers=None, kind='', priority=0):
+    """Queue one email for the worker. Returns the OutboundEmail row."""
+    return OutboundEmail.objects.create(
+        to=to,
+        from_email=from_email or '',
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        headers=headers or {},
+        kind=kind,
+        priority=priority,
+    )
+
+
+# ============ WORKER ============
+def _due(now):
+    return OutboundEmail.objects.filter(Q(status='queued') | Q(status='sending'), next_attempt_at__lte=now)
+
+
+def _due_ids(now, size, lock=False):
+    due = _due(now).order_by('-priority', 'next_attempt_at', 'id')
+    if lock:
+        due = due.select_for_update(skip_locked=True)
+    return list(due.values_list('id', flat=True)[:size])
+
+
+def claim_batch(size):
+    """Lease up to ``size`` due messages to this worker and return them, most urgent first."""
+    now = timezone.now()
+    lease = dict(
+        status='sending',
+        attempts=F('attempts') + 1,
+        next_attempt_at=now + timedelta(seconds=_setting('EMAIL_SEND_LEASE', 600)),
+    )
+    if db_connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = _due_ids(now, size, lock=True)
+            OutboundEmail.objects.filter(id__in=ids).update(**lease)
+    else:
+        # No row locks (SQLite): another worker may have read the same ids, so
+        # each row is leased only if it is still due when the UPDATE runs, and
+        # only the rows this worker's UPDATE actually changed are returned
+        ids = [pk for pk in _due_ids(now, size) if _due(now).filter(pk=pk).update(**lease)]
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by('-priority', 'id'))
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=[email.to],
+        headers=email.headers,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _failed(email, error):
+    """Schedule a retry, or give up after EMAIL_MAX_ATTEMPTS sends."""
+    if email.attempts >= _setting('EMAIL_MAX_ATTEMPTS', 5):
+        OutboundEmail.objects.filter(pk=email.pk).update(status='failed', last_error=str(error))
+        return
+    delay = _setting('EMAIL_RETRY_DELAY', 30) * 2 ** (email.attempts - 1)
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        status='queued',
+        next_attempt_at=timezone.now() + timedelta(seconds=delay),
+        last_error=str(error),
+    )
+
+
+def send_batch(size=None):
+    """
+    Send one batch of due messages over a single connection.
+    Returns (sent, failed) counts; failed includes messages that will be retried.
+    """
+    batch = claim_batch(size or _setting('EMAIL_BATCH_SIZE', 50))
+    if not batch:
+        return 0, 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in batch:
+            _failed(email, e)
+        return 0, len(batch)
+
+    sent = failed = 0
+    try:
+        for email in batch:
+            try:
+                build_message(email, connection).send()
+            except Exception as e:
+                failed += 1
+                _failed(email, e)
+                # The server may have dropped us; start the rest of the batch on a fresh connection
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+                continue
+            sent += 1
+            OutboundEmail.objects.filter(pk=email.pk).update(status='sent', sent_at=timezone.now(), last_error='')
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,187 @@
+"""
+Keyset (cursor) pagination.
+
+Paginator counts the whole filtered queryset and slices with OFFSET, so
+both costs grow with the table and the page number. CursorPaginator
+orders by a fixed key such as (created_at, id) and fetches the rows
+after (or before) the last row shown, which is an index range scan no
+matter how deep the page is. Pages are addressed by opaque tokens
+instead of page numbers, and totals come from estimate_count().
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_cursor(name, direction, values):
+    payload = json.dumps({'o': name, 'd': direction, 'k': [_encode(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (ordering name, direction, values), or None for a missing or malformed token."""
+    if not token:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return payload['o'], payload['d'], payload['k']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def estimate_count(queryset, cap=1000):
+    """
+    Cheap row count for page headers. Returns (count, exact).
+    Unfiltered PostgreSQL tables use the planner's row estimate; otherwise
+    counting stops at ``cap`` rows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > cap:
+            return row[0], False
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count <= cap
+
+
+def count_label(queryset, cap=1000):
+    count, exact = estimate_count(queryset, cap)
+    return f'{count:,}' if exact else f'{count:,}+'
+
+
+class CursorPage:
+    """One page of a CursorPaginator; iterable like Paginator's Page."""
+
+    is_cursor_page = True
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_query = ''
+        self.previous_query = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+
+class CursorPaginator:
+    """
+    Paginate ``queryset`` by ``ordering``, e.g. ('-created_at', '-id').
+    All fields must sort in the same direction and the last one must be
+    unique. ``name`` ties tokens to this ordering so a token from another
+    sort order starts again at the first page.
+    """
+
+    def __init__(self, queryset, per_page, ordering, name=None):
+        descending = {field.startswith('-') for field in ordering}
+        if len(descending) != 1:
+            raise ValueError('All cursor ordering fields must sort in the same direction')
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.descending = descending.pop()
+        self.name = name or ','.join(ordering)
+
+    def _after(self, values, forward):
+        """Q for rows after ``values`` in the given direction of the ordering."""
+        lookup = 'lt' if self.descending == forward else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            equal = {f: values[j] for j, f in enumerate(self.fields[:i])}
+            condition |= Q(**equal, **{f'{field}__{lookup}': values[i]})
+        return condition
+
+    def _field(self, name):
+        """The model field (or annotation output field) ``name`` sorts by."""
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        opts, parts = self.queryset.model._meta, name.split('__')
+        for part in parts[:-1]:
+            opts = opts.get_field(part).related_model._meta
+        return opts.get_field(parts[-1])
+
+    def _clean(self, values):
+        """
+        The token's values as the ordering fields' types, or None if one
+        does not convert (a tampered token), so the queryset never sees it.
+        """
+        try:
+            cleaned = [self._field(field).to_python(value) for field, value in zip(self.fields, values)]
+        except (ValidationError, TypeError, ValueError):
+            return None
+        return None if any(value is None for value in cleaned) else cleaned
+
+    def _values(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def get_page(self, token):
+        cursor = decode_cursor(token)
+        if cursor and (cursor[0] != self.name or cursor[1] not in ('next', 'prev')
+                       or not isinstance(cursor[2], list) or len(cursor[2]) != len(self.fields)):
+            cursor = None
+        if cursor:
+            values = self._clean(cursor[2])
+            cursor = (cursor[0], cursor[1], values) if values is not None else None
+
+        if cursor is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+        elif cursor[1] == 'next':
+            rows = list(self.queryset.filter(self._after(cursor[2], True)).order_by(*self.ordering)[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, True
+            rows = rows[:self.per_page]
+        else:
+            reverse = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+            rows = list(self.queryset.filter(self._after(cursor[2], False)).order_by(*reverse)[:self.per_page + 1])
+            has_next, has_previous = True, len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(self.name, 'next', self._values(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(self.name, 'prev', self._values(rows[0]))
+        return CursorPage(rows, has_next, has_previous, next_cursor, previous_cursor)
+
+
+def paginate(request, queryset, per_page, ordering, name=None, param='cursor'):
+    """Return the CursorPage for the request, with query strings for the Prev/Next links."""
+    page = CursorPaginator(queryset, per_page, ordering, name).get_page(request.GET.get(param))
+    params = request.GET.copy()
+    params.pop('page', None)
+    for attr, token in (('next_query', page.next_cursor), ('previous_query', page.previous_cursor)):
+        if token:
+            params[param] = token
+            setattr(page, attr, params.urlencode())
+    return page
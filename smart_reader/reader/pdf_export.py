@@ -0,0 +1,210 @@
+"""
+Article PDF exports.
+
+Rendering a long article with ReportLab takes seconds, so each export is
+rendered once and kept on disk under PDF_EXPORT_ROOT (default
+MEDIA_ROOT/exports) as <article id>/<updated_at>-<language>.pdf. The key
+changes whenever the article is saved, so a stale file is never served;
+signal handlers also delete an article's files when it is edited or
+deleted, or when one of its translations is stored. Readers whose language
+has a stored translation get the translated text.
+
+The `prerender_pdfs` command fills the cache for popular articles with a
+process pool. Rendering (render_export) only needs the plain dict built by
+export_data, so it can run in a worker process without database access.
+
+Without ReportLab the export is a plain text file, cached the same way.
+"""
+import os
+import re
+import shutil
+import tempfile
+from html import unescape
+from pathlib import Path
+
+from django.conf import settings
+
+from . import translation
+
+# Try to import reportlab for PDF generation
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+
+EXTENSION = 'pdf' if REPORTLAB_AVAILABLE else 'txt'
+CONTENT_TYPE = 'application/pdf' if REPORTLAB_AVAILABLE else 'text/plain'
+
+
+def export_root():
+    return Path(getattr(settings, 'PDF_EXPORT_ROOT', None) or Path(settings.MEDIA_ROOT) / 'exports')
+
+
+# ============ KEYS ============
+def export_language(article, language):
+    """The language an export for a reader of ``language`` is written in."""
+    if language != article.language and translation.get_translation(article, language):
+        return language
+    return article.language
+
+
+def export_key(article, language):
+    """(article id, updated_at stamp, language) for the reader's language."""
+    return article.pk, article.updated_at.strftime('%Y%m%d%H%M%S%f'), export_language(article, language)
+
+
+def export_path(key):
+    article_id, stamp, language = key
+    return export_root() / str(article_id) / f'{stamp}-{language}.{EXTENSION}'
+
+
+def export_etag(key):
+    return '"{}-{}-{}-{}"'.format(*key, EXTENSION)
+
+
+# ============ RENDERING ============
+def strip_html(html_content):
+    """Strip HTML tags and convert to plain text for PDF generation"""
+    if not html_content:
+        return ''
+    # Replace <br>, <br/>, <br /> with newlines
+    text = re.sub(r'<br\s*/?>', '\n', html_content, flags=re.IGNORECASE)
+    # Replace </p> with double newlines for paragraph breaks
+    text = re.sub(r'</p>', '\n\n', text, flags=re.IGNORECASE)
+    # Remove all other HTML tags
+    text = re.sub(r'<[^>]+>', '', text)
+    text = unescape(text)
+    # Clean up multiple newlines
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def export_data(article, language):
+    """Everything render_export needs, as plain data (picklable, no database access)."""
+    key = export_key(article, language)
+    title, content = article.title, article.content
+    if key[2] != article.language:
+        stored = translation.get_translation(article, key[2])
+        title, content = stored['title'], stored['content']
+    return {
+        'path': str(export_path(key)),
+        'title': title,
+        'category': article.category.name if article.category else 'N/A',
+        'difficulty': article.get_difficulty_display(),
+        'read_time': article.estimated_read_time,
+        'content': strip_html(content),
+    }
+
+
+def _write_pdf(data, out):
+    doc = SimpleDocTemplate(out, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+    )
+
+    story = [Paragraph(data['title'], title_style), Spacer(1, 12)]
+    meta_text = f"Category: {data['category']} | Difficulty: {data['difficulty']} | {data['read_time']} min read"
+    story.append(Paragraph(meta_text, styles['Normal']))
+    story.append(Spacer(1, 24))
+
+    for para in data['content'].split('\n\n'):
+        if para.strip():
+            # Escape any remaining special XML characters for ReportLab
+            safe_para = para.strip().replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            try:
+                story.append(Paragraph(safe_para, styles['Normal']))
+            except Exception:
+                # If paragraph still fails, add as plain text
+                story.append(Paragraph(safe_para.encode('ascii', 'ignore').decode('ascii'), styles['Normal']))
+            story.append(Spacer(1, 12))
+    doc.build(story)
+
+
+def _write_text(data, out):
+    out.write(
+        f"{data['title']}\n\n"
+        f"Category: {data['category']}\n"
+        f"Difficulty: {data['difficulty']}\n"
+        f"Reading Time: {data['read_time']} minutes\n\n"
+        + "=" * 50 + "\n\n"
+        + data['content']
+    )
+
+
+def render_export(data):
+    """
+    Render ``data`` (from export_data) to its path and return the path.
+    The file is written to a temporary name and renamed into place, so
+    concurrent renders of the same export never expose a partial file.
+    """
+    path = Path(data['path'])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        if REPORTLAB_AVAILABLE:
+            with os.fdopen(fd, 'wb') as out:
+                _write_pdf(data, out)
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8') as out:
+                _write_text(data, out)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return path
+
+
+def open_export(article, language, attempts=3):
+    """
+    (open binary file, key) of the article's export for ``language``,
+    rendering it if not cached. Saving the article deletes its exports
+    directory, possibly between rendering a file and opening it, so a file
+    that vanishes is rendered again; after ``attempts`` tries the export is
+    rendered to a private temporary file instead. An open handle stays
+    readable after the file is deleted.
+    """
+    key = export_key(article, language)
+    path = export_path(key)
+    for _ in range(attempts):
+        try:
+            return open(path, 'rb'), key
+        except FileNotFoundError:
+            pass
+        try:
+            render_export(export_data(article, language))
+        except FileNotFoundError:
+            # The directory was removed while rendering into it
+            pass
+
+    data = export_data(article, language)
+    with tempfile.TemporaryDirectory() as tmp:
+        data['path'] = str(Path(tmp) / path.name)
+        return open(render_export(data), 'rb'), key
+
+
+# ============ INVALIDATION ============
+def invalidate(article_id):
+    """Delete every cached export of the article."""
+    shutil.rmtree(export_root() / str(article_id), ignore_errors=True)
+
+
+def invalidate_many(article_ids):
+    """invalidate() for many articles, only visiting the directories that exist."""
+    article_ids = {str(pk) for pk in article_ids}
+    root = export_root()
+    if not article_ids or not root.is_dir():
+        return
+    for entry in root.iterdir():
+        if entry.name in article_ids:
+            shutil.rmtree(entry, ignore_errors=True)
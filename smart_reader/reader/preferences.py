@@ -0,0 +1,109 @@
+"""
+Per-request reader preferences.
+
+ReaderPreferencesMiddleware attaches ``request.reader``, which resolves the
+reader's language, theme, weekly reading goal, admin flag and display role
+on first use. The resolved values are kept in the session and reused until
+the user's profile or user row changes (signal handlers bump a per-user
+version stamp), so most requests get them without touching the database.
+Views that need the whole UserProfile use ``request.reader.profile``, which
+is loaded (or created) at most once per request.
+"""
+from django.utils.functional import cached_property
+
+from .cache import USER, namespace
+from .models import UserProfile
+
+
+ADMIN_EMAILS = ['sanjaigiri001@gmail.com', 'sanjaig111@gmail.com']
+SESSION_KEY = '_reader_preferences'
+DEFAULTS = {
+    'language': 'EN',
+    'theme': 'light',
+    'reading_goal': 5,
+    'is_admin': False,
+    'display_role': None,
+}
+
+PROFILE = namespace('reader.preferences', scope=USER)  # Version stamp only
+
+
+def is_admin(user):
+    return user.is_staff or user.is_superuser or user.email in ADMIN_EMAILS
+
+
+class ReaderPreferences:
+    def __init__(self, request):
+        self._request = request
+        self._profile = None
+
+    @property
+    def profile(self):
+        """The user's UserProfile, created if missing; None for anonymous visitors."""
+        user = self._request.user
+        if not user.is_authenticated:
+            return None
+        if self._profile is None:
+            self._profile, _ = UserProfile.objects.get_or_create(user=user)
+            user.profile = self._profile  # Templates using user.profile reuse this row
+        return self._profile
+
+    @cached_property
+    def _values(self):
+        user = self._request.user
+        if not user.is_authenticated:
+            return DEFAULTS
+
+        session = getattr(self._request, 'session', None)
+        version = PROFILE.version(user.pk)
+        stored = session.get(SESSION_KEY) if session is not None else None
+        if stored and stored.get('user') == user.pk and stored.get('version') == version:
+            return stored
+
+        profile = self.profile
+        admin = is_admin(user)
+        values = {
+            'user': user.pk,
+            'version': version,
+            'language': profile.preferred_language or 'EN',
+            'theme': profile.theme or ('dark' if profile.dark_mode else 'light'),
+            'reading_goal': profile.reading_goal,
+            'is_admin': admin,
+            'display_role': 'Admin' if admin else 'User',
+        }
+        if session is not None:
+            session[SESSION_KEY] = values
+        return values
+
+    @property
+    def language(self):
+        return self._values['language']
+
+    @property
+    def theme(self):
+        return self._values['theme']
+
+    @property
+    def reading_goal(self):
+        return self._values['reading_goal']
+
+    @property
+    def is_admin(self):
+        return self._values['is_admin']
+
+    @property
+    def display_role(self):
+        return self._values['display_role']
+
+
+def for_request(request):
+    """request.reader, attaching one if the middleware did not run (e.g. RequestFactory requests)."""
+    reader = getattr(request, 'reader', None)
+    if reader is None:
+        reader = request.reader = ReaderPreferences(request)
+    return reader
+
+
+def invalidate(user_id):
+    """Make every session re-resolve this user's preferences."""
+    PROFILE.invalidate(user_id)
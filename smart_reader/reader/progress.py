@@ -0,0 +1,294 @@
+"""
+Ingestion pipeline for reading-progress heartbeats.
+
+The reader page posts a heartbeat every few seconds. Each heartbeat is
+applied to an in-process snapshot of the (user, article) progress row and
+the deltas are coalesced until the next flush, which writes every dirty
+ReadingProgress row and one ArticleViewLog row per (user, article) in a
+single transaction together with the per-user stats deltas, then advances
+the achievement counters.
+
+Flushes run on the worker's background flush thread (see flusher.py)
+every PROGRESS_FLUSH_INTERVAL seconds. Completions and the heartbeat the
+page sends when it is left (``final``) are written immediately, so pages
+read right after leaving an article see it even when another worker
+handled the heartbeats.
+
+Several workers can hold entries for the same pair. Time is written as an
+F() delta, so every worker's time adds up; the position and percentage
+are absolute and only overwrite the row if it was not read more recently
+(last_read_at), so an older worker's flush never rolls a newer one back.
+An entry with nothing pending is reloaded from the database on the next
+heartbeat, so totals reported to the page include other workers' writes.
+"""
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import achievements, flusher, stats
+from .models import Article, ArticleViewLog, ReadingProgress
+
+
+MAX_HEARTBEAT_SECONDS = 3600  # A single heartbeat never reports more than an hour
+
+_entries = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _flush_interval():
+    return getattr(settings, 'PROGRESS_FLUSH_INTERVAL', 60)  # seconds
+
+
+def _flush_threshold():
+    return getattr(settings, 'PROGRESS_FLUSH_THRESHOLD', 500)  # dirty (user, article) pairs
+
+
+def _entry_ttl():
+    return getattr(settings, 'PROGRESS_ENTRY_TTL', 900)  # seconds an idle snapshot is kept
+
+
+class InvalidHeartbeat(ValueError):
+    """Raised when a heartbeat payload cannot be used."""
+
+
+class _Entry:
+    """Coalesced progress state for one (user, article) pair."""
+
+    __slots__ = (
+        'progress_id', 'user_id', 'article_id', 'position', 'percentage',
+        'max_percentage', 'total_time', 'is_completed', 'pending_time',
+        'pending_completed', 'dirty', 'last_seen', 'ip_address', 'touched',
+    )
+
+    def __init__(self, progress):
+        self.progress_id = progress.pk
+        self.user_id = progress.user_id
+        self.article_id = progress.article_id
+        self.position = progress.last_position
+        self.percentage = progress.scroll_percentage
+        self.max_percentage = progress.max_scroll_percentage
+        self.total_time = progress.time_spent
+        self.is_completed = progress.is_completed
+        self.pending_time = 0
+        self.pending_completed = False
+        self.dirty = False
+        self.last_seen = None
+        self.ip_address = None
+        self.touched = time.monotonic()
+
+
+class HeartbeatResult:
+    """Progress values returned to the reader page after a heartbeat."""
+
+    def __init__(self, entry, just_completed):
+        self.percentage = entry.percentage
+        self.max_percentage = entry.max_percentage
+        self.total_time = entry.total_time
+        self.is_completed = entry.is_completed
+        self.just_completed = just_completed
+
+
+def parse_heartbeat(data):
+    """Validate a heartbeat payload and return (article_id, percentage, position, time)."""
+    try:
+        article_id = int(data['article_id'])
+        percentage = int(float(data.get('percentage', 0)))
+        position = int(float(data.get('position', 0)))
+        time_delta = int(float(data.get('time', 0)))
+    except (KeyError, TypeError, ValueError):
+        raise InvalidHeartbeat('article_id, percentage, position and time must be numbers')
+
+    if article_id <= 0:
+        raise InvalidHeartbeat('Invalid article ID')
+
+    percentage = min(max(percentage, 0), 100)
+    position = max(position, 0)
+    time_delta = min(max(time_delta, 0), MAX_HEARTBEAT_SECONDS)
+    return article_id, percentage, position, time_delta
+
+
+def _load_entry(user, article_id):
+    progress = ReadingProgress.objects.filter(user=user, article_id=article_id).first()
+    if progress is None:
+        if not Article.objects.filter(pk=article_id).exists():
+            return None
+        progress, _ = ReadingProgress.objects.get_or_create(user=user, article_id=article_id)
+    return _Entry(progress)
+
+
+def record_heartbeat(user, article_id, percentage, position=0, time_delta=0, ip_address=None, final=False):
+    """
+    Apply a heartbeat to the coalesced state and return a HeartbeatResult,
+    or None if the article does not exist.
+    A heartbeat that completes the article, or is the last one before the
+    reader leaves the page (``final``), is flushed immediately.
+    """
+    key = (user.pk, article_id)
+    with _lock:
+        entry = _entries.get(key)
+
+    if entry is None or not entry.dirty:
+        # Nothing of ours is pending, so start from the row as other workers left it
+        loaded = _load_entry(user, article_id)
+        if loaded is None:
+            return None
+        with _lock:
+            entry = _entries.get(key)
+            if entry is None or not entry.dirty:
+                entry = _entries[key] = loaded
+
+    with _lock:
+        entry.position = position
+        entry.percentage = percentage
+        entry.max_percentage = max(entry.max_percentage, percentage)
+        entry.total_time += time_delta
+        entry.pending_time += time_delta
+        entry.last_seen = timezone.now()
+        entry.ip_address = ip_address
+        entry.touched = time.monotonic()
+        entry.dirty = True
+
+        # Progress only increases; 90% counts as finished
+        just_completed = False
+        if not entry.is_completed and (entry.max_percentage >= 90 or percentage >= 100):
+            entry.is_completed = True
+            entry.pending_completed = True
+            just_completed = True
+        if entry.is_completed:
+            entry.max_percentage = 100
+
+        result = HeartbeatResult(entry, just_completed)
+        dirty_count = sum(1 for e in _entries.values() if e.dirty)
+        due = (
+            dirty_count >= _flush_threshold()
+            or time.monotonic() - _last_flush >= _flush_interval()
+        )
+
+    if just_completed or final:
+        flush(user_id=user.pk)
+    else:
+        flusher.notify('progress', due)
+    return result
+
+
+def apply_pending(progress):
+    """Overlay unflushed heartbeat state onto a ReadingProgress instance."""
+    if progress is None:
+        return progress
+    with _lock:
+        entry = _entries.get((progress.user_id, progress.article_id))
+        if entry is not None and entry.dirty:
+            progress.last_position = entry.position
+            progress.scroll_percentage = entry.percentage
+            progress.max_scroll_percentage = max(progress.max_scroll_percentage, entry.max_percentage)
+            progress.time_spent += entry.pending_time
+            progress.is_completed = progress.is_completed or entry.is_completed
+    return progress
+
+
+def flush(user_id=None):
+    """
+    Write coalesced heartbeats to the database.
+    Pass user_id to flush only that user's entries (held by this worker).
+    Returns the set of user ids whose progress was written.
+    """
+    global _last_flush
+    now = time.monotonic()
+    batch = []
+    with _lock:
+        for key, entry in list(_entries.items()):
+            if user_id is not None and entry.user_id != user_id:
+                continue
+            if entry.dirty:
+                batch.append((
+                    entry.progress_id, entry.user_id, entry.article_id, entry.position,
+                    entry.percentage, entry.max_percentage, entry.pending_time,
+                    entry.pending_completed, entry.last_seen, entry.ip_address,
+                ))
+                entry.pending_time = 0
+                entry.pending_completed = False
+                entry.dirty = False
+            elif now - entry.touched >= _entry_ttl():
+                # Drop idle snapshots so other workers' writes are picked up again
+                del _entries[key]
+        if user_id is None:
+            _last_flush = now
+
+    if not batch:
+        return set()
+
+    view_logs = []
+    deltas = {}  # user_id -> [completed, seconds]
+    try:
+        with transaction.atomic():
+            for (progress_id, uid, article_id, position, percentage, max_percentage,
+                 time_delta, completed, last_seen, ip_address) in batch:
+                # Absolute fields only move forward in time; see the module docstring
+                newer = Q(last_read_at__isnull=True) | Q(last_read_at__lte=last_seen)
+                ReadingProgress.objects.filter(pk=progress_id).update(
+                    last_position=Case(When(newer, then=Value(position)), default=F('last_position')),
+                    scroll_percentage=Case(When(newer, then=Value(percentage)), default=F('scroll_percentage')),
+                    last_read_at=Case(When(newer, then=Value(last_seen)), default=F('last_read_at')),
+                    max_scroll_percentage=Greatest(F('max_scroll_percentage'), max_percentage),
+                    time_spent=F('time_spent') + time_delta,
+                )
+                newly_completed = 0
+                if completed:
+                    # Only count the completion if no other worker recorded it first
+                    newly_completed = ReadingProgress.objects.filter(
+                        pk=progress_id, is_completed=False
+                    ).update(is_completed=True, max_scroll_percentage=100)
+                user_delta = deltas.setdefault(uid, [0, 0])
+                user_delta[0] += newly_completed
+                user_delta[1] += time_delta
+                view_logs.append(ArticleViewLog(
+                    article_id=article_id,
+                    user_id=uid,
+                    ip_address=ip_address,
+                    time_spent=time_delta,
+                    viewed_at=last_seen,
+                ))
+            ArticleViewLog.objects.bulk_create(view_logs)
+            for uid, (completed, time_delta) in deltas.items():
+                stats.apply_progress_delta(
+                    uid, completed=completed, in_progress=-completed, time_spent=time_delta
+                )
+    except Exception:
+        # Re-queue the deltas so the next flush retries them
+        with _lock:
+            for (progress_id, uid, article_id, position, percentage, max_percentage,
+                 time_delta, completed, last_seen, ip_address) in batch:
+                entry = _entries.get((uid, article_id))
+                if entry is not None:
+                    entry.pending_time += time_delta
+                    entry.pending_completed = entry.pending_completed or completed
+                    entry.dirty = True
+        raise
+
+    # Advance the achievement counters with what was just written
+    for uid, (completed, time_delta) in deltas.items():
+        achievements.record_progress(uid, completed_delta=completed, time_delta=time_delta)
+
+    return set(deltas)
+
+
+flusher.register('progress', flush, 'PROGRESS_FLUSH_INTERVAL', 60)
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass  # Never block interpreter shutdown
+
+
+def register_shutdown_hook():
+    """Drain pending heartbeats when the worker process exits."""
+    atexit.register(_flush_at_exit)
@@ -0,0 +1,112 @@
+"""
+Cache-backed rate limits.
+
+Each RateLimit allows ``limit`` events per ``window`` seconds for one key
+(an email address, client IP or user id). Counting uses a sliding window
+built from two fixed windows in the shared cache: the current window's
+counter is bumped with an atomic incr, and the previous window's counter
+is weighted by how much of it still overlaps the sliding window. That
+needs no database queries and no locking, and holds across processes as
+long as they share the cache (see CACHES in settings).
+
+Counts are only exact on redis and memcached, where incr is atomic. The
+file cache implements incr as a read followed by a write, so hits from
+concurrent requests can overwrite each other and a burst may get a few
+more attempts through than the limit; use redis or memcached where that
+matters. locmem counts exactly but only within one process.
+
+    if ratelimit.exceeded((OTP_SEND_EMAIL, email), (OTP_SEND_IP, ip)):
+        ...  # reject
+
+Limits that should only count failures (wrong OTPs, wrong PINs) use
+is_limited() before the check and hit() after a failure.
+
+settings.RATE_LIMITS can override a limit: {'otp.send.email': (10, 3600)}.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import namespace
+from .visits import get_client_ip
+
+
+LIMITS = namespace('ratelimit')
+
+
+class RateLimit:
+    def __init__(self, name, limit, window):
+        self.name = name
+        self.default = (limit, window)
+
+    @property
+    def limit(self):
+        return getattr(settings, 'RATE_LIMITS', {}).get(self.name, self.default)[0]
+
+    @property
+    def window(self):
+        return getattr(settings, 'RATE_LIMITS', {}).get(self.name, self.default)[1]
+
+    def _keys(self, key, now):
+        """(current window key, previous window key, fraction of the previous window still counted)."""
+        window = self.window
+        index = int(now // window)
+        digest = hashlib.sha1(str(key).lower().encode('utf-8')).hexdigest()[:20]
+        prefix = LIMITS.key(self.name, digest)
+        return f'{prefix}:{index}', f'{prefix}:{index - 1}', 1 - (now % window) / window
+
+    def _estimate(self, current, previous, overlap):
+        counts = cache.get_many([current, previous])
+        return counts.get(previous, 0) * overlap + counts.get(current, 0)
+
+    def hit(self, key):
+        """Count one event for ``key``. Returns True while ``key`` is within the limit."""
+        current, previous, overlap = self._keys(key, time.time())
+        cache.add(current, 0, self.window * 2)
+        try:
+            count = cache.incr(current)
+        except ValueError:  # Expired between add and incr
+            cache.set(current, 1, self.window * 2)
+            count = 1
+        else:
+            # The file cache's incr rewrites the entry with the default TIMEOUT
+            cache.touch(current, self.window * 2)
+        return (cache.get(previous, 0) * overlap + count) <= self.limit
+
+    def is_limited(self, key):
+        """True if ``key`` has used up its limit (without counting an event)."""
+        return self._estimate(*self._keys(key, time.time())) >= self.limit
+
+    def reset(self, key):
+        current, previous, _ = self._keys(key, time.time())
+        cache.delete_many([current, previous])
+
+
+# ============ LIMITS ============
+OTP_SEND_EMAIL = RateLimit('otp.send.email', 5, 60 * 60)
+OTP_SEND_IP = RateLimit('otp.send.ip', 20, 60 * 60)
+OTP_VERIFY_EMAIL = RateLimit('otp.verify.email', 5, 10 * 60)  # Wrong codes
+OTP_VERIFY_IP = RateLimit('otp.verify.ip', 30, 60 * 60)  # Wrong codes
+PASSWORD_RESET_EMAIL = RateLimit('password_reset.email', 5, 60 * 60)
+PASSWORD_RESET_IP = RateLimit('password_reset.ip', 20, 60 * 60)
+CHECK_EMAIL_IP = RateLimit('check_email.ip', 30, 60)
+READING_LIST_PIN_USER = RateLimit('reading_list.pin.user', 10, 60 * 60)  # Wrong PINs, across all lists
+
+
+def client_ip(request):
+    return get_client_ip(request) or 'unknown'
+
+
+def exceeded(*checks):
+    """
+    Count one event against each (RateLimit, key) pair and return the first
+    limit that is now exceeded, or None. Every pair is counted even when an
+    earlier one is over, so per-IP limits see all traffic.
+    """
+    over = None
+    for limit, key in checks:
+        if not limit.hit(key) and over is None:
+            over = limit
+    return over
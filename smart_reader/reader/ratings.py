@@ -0,0 +1,43 @@
+"""
+Denormalized rating aggregates on Article.
+
+Article.rating_sum / rating_count / rating_avg are adjusted with a single
+UPDATE whenever a rating is created, changed or deleted (see the signal
+handlers), so they commit or roll back together with the rating itself.
+Listing and sorting by rating then reads indexed columns instead of
+aggregating the ratings table. `recount` rebuilds them from scratch.
+"""
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from .models import Article, Rating
+
+
+def apply_rating_delta(article_id, score_delta, count_delta):
+    """Add a rating (count_delta=1), remove one (-1), or change a score (0)."""
+    if not score_delta and not count_delta:
+        return
+    new_sum = F('rating_sum') + score_delta
+    new_count = F('rating_count') + count_delta
+    Article.objects.filter(pk=article_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating_avg=Case(
+            When(rating_count__gt=-count_delta, then=Cast(new_sum, FloatField()) / new_count),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def recount(article_ids=None):
+    """Recompute the aggregates from the ratings table. Returns the number of articles updated."""
+    ratings = Rating.objects.filter(article=OuterRef('pk')).order_by().values('article')
+    articles = Article.objects.all()
+    if article_ids is not None:
+        articles = articles.filter(pk__in=article_ids)
+    return articles.update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('score')).values('total')), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(n=Count('id')).values('n')), 0),
+        rating_avg=Coalesce(Subquery(ratings.annotate(avg=Avg('score')).values('avg')), 0.0),
+    )
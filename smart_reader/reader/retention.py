@@ -0,0 +1,108 @@
+"""
+Retention for raw log tables.
+
+purge() deletes rows matching a condition in primary-key ranges: each
+chunk finds the pk of its last matching row, then deletes the matching
+rows up to it in a short transaction of its own, so SQLite never holds the
+write lock for long and Postgres never sees one huge DELETE. The last pk
+reached is saved as a JobCheckpoint, and a run interrupted half way picks
+up from there as long as the cutoff has not moved.
+
+The `purge_stale_data` command applies it to:
+- OTPVerification rows whose code has expired (verified codes are kept
+  until then, because registration checks them);
+- SiteVisit and ArticleViewLog rows older than LOG_RETENTION_DAYS, but
+  never for days the analytics rollups do not cover yet, so reports keep
+  their numbers.
+
+Rows can be archived to gzipped JSON lines before they are deleted.
+"""
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics
+from .models import ArticleViewLog, JobCheckpoint, OTPVerification, SiteVisit
+
+
+CHECKPOINT = 'retention:{}'
+
+
+def log_cutoff(days=None, today=None):
+    """
+    First day whose visit/view logs are kept: LOG_RETENTION_DAYS ago, or
+    the day after the rollup watermark if that is earlier. None if nothing
+    has been rolled up.
+    """
+    today = today or timezone.localdate()
+    days = days if days is not None else getattr(settings, 'LOG_RETENTION_DAYS', 400)
+    rolled_up = analytics.rolled_up_until()
+    if rolled_up is None:
+        return None
+    return min(today - timedelta(days=days), rolled_up + timedelta(days=1))
+
+
+def targets(days=None, now=None):
+    """[(name, model, filter kwargs)] of rows due for deletion."""
+    now = now or timezone.now()
+    found = [('otp', OTPVerification, {'expires_at__lt': now})]
+    cutoff = log_cutoff(days, timezone.localdate(now))
+    if cutoff is not None:
+        found += [
+            ('site_visits', SiteVisit, {'visit_date__lt': cutoff}),
+            ('article_view_logs', ArticleViewLog, {'viewed_at__lt': analytics._day_start(cutoff)}),
+        ]
+    return found
+
+
+def _archive(path, rows):
+    with gzip.open(path, 'at', encoding='utf-8') as out:
+        for row in rows:
+            out.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+
+
+def purge(name, model, conditions, chunk_size=5000, archive_dir=None, pause=0.0, dry_run=False):
+    """
+    Delete ``model`` rows matching ``conditions`` in pk-ranged chunks.
+    Returns (rows deleted or, with dry_run, matched; seconds taken).
+    """
+    checkpoint = CHECKPOINT.format(name)
+    marker = json.dumps(conditions, cls=DjangoJSONEncoder, sort_keys=True)
+    saved = json.loads(JobCheckpoint.get_value(checkpoint, '{}'))
+    last_pk = saved.get('pk', 0) if saved.get('conditions') == marker else 0
+
+    matching = model.objects.filter(**conditions)
+    if dry_run:
+        return matching.filter(pk__gt=last_pk).count(), 0.0
+
+    archive_path = None
+    if archive_dir:
+        archive_path = f'{archive_dir}/{model._meta.db_table}-{timezone.localdate():%Y%m%d}.jsonl.gz'
+
+    started = time.monotonic()
+    deleted = 0
+    while True:
+        upper = (
+            matching.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', flat=True)[chunk_size - 1:chunk_size].first()
+        )
+        if upper is None:
+            upper = matching.filter(pk__gt=last_pk).order_by('-pk').values_list('pk', flat=True).first()
+            if upper is None:
+                break
+        chunk = matching.filter(pk__gt=last_pk, pk__lte=upper)
+        with transaction.atomic():
+            if archive_path:
+                _archive(archive_path, chunk.order_by('pk').values().iterator())
+            deleted += chunk.delete()[0]  # No cascades or signals, so a single DELETE
+            JobCheckpoint.set_value(checkpoint, json.dumps({'conditions': marker, 'pk': upper}))
+        last_pk = upper
+        if pause:
+            time.sleep(pause)  # Let other writers in between chunks
+    return deleted, time.monotonic() - started
@@ -0,0 +1,226 @@
+"""
+Full-text search over articles.
+
+On SQLite the index is an FTS5 table (reader_article_fts) using
+reader_article as its external content; on PostgreSQL it is a
+search_vector tsvector column on reader_article with a GIN index. In both
+cases database triggers keep the index in sync whenever an article's
+title, summary or content is inserted, updated or deleted, including bulk
+inserts that bypass Article.save(). Results are ranked with BM25 (SQLite)
+or ts_rank (PostgreSQL), title matches weighing most.
+
+On SQLite the FTS table is joined to reader_article on rowid, so MATCH runs
+once and bm25() is read off each joined hit; a correlated rank subquery
+would re-run the MATCH for every matching row.
+
+Other databases, or SQLite builds without FTS5, fall back to the old
+icontains filters. `rebuild_search_index` recreates the index.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Article
+
+
+FTS_TABLE = 'reader_article_fts'
+MAX_TERMS = 8
+MAX_INDEXED_CHARS = 500000  # PostgreSQL tsvectors are limited to 1MB
+
+_SQLITE_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON reader_article BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON reader_article BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, summary, content ON reader_article BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END""",
+)
+
+_POSTGRES_INSTALL = (
+    "ALTER TABLE reader_article ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""CREATE OR REPLACE FUNCTION reader_article_search_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.summary, '')), 'B') ||
+            setweight(to_tsvector('simple', left(coalesce(NEW.content, ''), {MAX_INDEXED_CHARS})), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS reader_article_search_trigger ON reader_article",
+    """CREATE TRIGGER reader_article_search_trigger
+        BEFORE INSERT OR UPDATE OF title, summary, content ON reader_article
+        FOR EACH ROW EXECUTE FUNCTION reader_article_search_update()""",
+    "CREATE INDEX IF NOT EXISTS reader_article_search_idx ON reader_article USING GIN (search_vector)",
+)
+
+_available = {}
+
+
+# ============ INDEX MAINTENANCE ============
+def install(connection):
+    """Create the index structures and triggers if they are missing. Safe to call repeatedly."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                    "title, summary, content, content='reader_article', content_rowid='id', "
+                    "tokenize='unicode61 remove_diacritics 2')"
+                )
+            except Exception:
+                return False  # SQLite built without FTS5
+            for statement in _SQLITE_TRIGGERS:
+                cursor.execute(statement)
+        elif connection.vendor == 'postgresql':
+            for statement in _POSTGRES_INSTALL:
+                cursor.execute(statement)
+        else:
+            return False
+    _available.pop(connection.alias, None)
+    return True
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP TRIGGER IF EXISTS reader_article_search_trigger ON reader_article')
+            cursor.execute('DROP FUNCTION IF EXISTS reader_article_search_update()')
+            cursor.execute('ALTER TABLE reader_article DROP COLUMN IF EXISTS search_vector')
+    _available.pop(connection.alias, None)
+
+
+def rebuild(connection=None, batch_size=2000):
+    """Re-index every article. Returns the number of articles indexed, or None if unsupported."""
+    connection = connection or connections[DEFAULT_DB_ALIAS]
+    if not install(connection):
+        return None
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute('SELECT COUNT(*) FROM reader_article')
+            return cursor.fetchone()[0]
+
+        # Touching title fires the trigger; batches keep each UPDATE short
+        cursor.execute('SELECT MIN(id), MAX(id), COUNT(*) FROM reader_article')
+        first_id, last_id, total = cursor.fetchone()
+        if total:
+            for start in range(first_id, last_id + 1, batch_size):
+                cursor.execute(
+                    'UPDATE reader_article SET title = title WHERE id >= %s AND id < %s',
+                    [start, start + batch_size],
+                )
+        return total
+
+
+def install_after_migrate(using=DEFAULT_DB_ALIAS):
+    """
+    Called after migrations. SQLite drops triggers when a migration rebuilds
+    reader_article, so recreate them once the index table exists.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        install(connection)
+
+
+def is_available(using=DEFAULT_DB_ALIAS):
+    if using not in _available:
+        connection = connections[using]
+        if connection.vendor == 'sqlite':
+            _available[using] = FTS_TABLE in connection.introspection.table_names()
+        else:
+            _available[using] = connection.vendor == 'postgresql'
+    return _available[using]
+
+
+# ============ QUERIES ============
+def _terms(query):
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def _sqlite_expression(terms, prefix):
+    expression = ' '.join(f'"{term}"' for term in terms)
+    return expression + '*' if prefix else expression
+
+
+def _postgres_sql(terms, prefix):
+    """Return (match subquery, rank expression, params) for the search terms."""
+    expression = ' & '.join(terms)
+    if prefix:
+        expression += ':*'
+    match = "SELECT id FROM reader_article WHERE search_vector @@ to_tsquery('simple', %s)"
+    rank = "-ts_rank(reader_article.search_vector, to_tsquery('simple', %s))"
+    return match, rank, [expression]
+
+
+def _sqlite_filter(queryset, terms, prefix, tag_match):
+    expression = _sqlite_expression(terms, prefix)
+    matched = queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = reader_article.id', f'{FTS_TABLE} MATCH %s'],
+        params=[expression],
+    ).annotate(search_rank=RawSQL(f'bm25({FTS_TABLE}, 10.0, 5.0, 1.0)', (), output_field=FloatField()))
+    if tag_match is None:
+        return matched
+
+    # Articles matching only by tag have no FTS row to join; they follow unranked
+    tagged = (
+        queryset.filter(tag_match)
+        .exclude(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression]))
+        .annotate(search_rank=Value(None, output_field=FloatField()))
+    )
+    return matched.order_by().union(tagged.order_by(), all=True)
+
+
+def filter_articles(queryset, query, prefix=False, include_tags=False):
+    """
+    Restrict an Article queryset to articles matching ``query`` and annotate
+    ``search_rank`` (lower is better). ``prefix`` also matches words starting
+    with the last term; ``include_tags`` also matches articles by tag name
+    (on SQLite the result is then a union, which can be ordered and sliced
+    but not filtered further).
+    """
+    terms = _terms(query)
+    if not terms:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    tag_match = Q(pk__in=Article.tags.through.objects.filter(tag__name__icontains=query).values('article_id'))
+    if not is_available(queryset.db):
+        matches = Q(title__icontains=query) | Q(content__icontains=query) | Q(summary__icontains=query)
+        if include_tags:
+            matches |= tag_match
+        return queryset.filter(matches).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connections[queryset.db].vendor == 'sqlite':
+        return _sqlite_filter(queryset, terms, prefix, tag_match if include_tags else None)
+
+    match, rank, params = _postgres_sql(terms, prefix)
+    matches = Q(pk__in=RawSQL(match, params))
+    if include_tags:
+        matches |= tag_match
+    return queryset.filter(matches).annotate(search_rank=RawSQL(rank, params, output_field=FloatField()))
+
+
+def search_articles(query, language=None, prefix=False, include_tags=False):
+    """Published articles matching ``query``, best matches first."""
+    articles = Article.objects.filter(is_published=True)
+    if language:
+        articles = articles.filter(language=language)
+    return filter_articles(articles, query, prefix=prefix, include_tags=include_tags).order_by(
+        F('search_rank').asc(nulls_last=True), '-views_count'
+    )
@@ -0,0 +1,268 @@
+"""
+Signal handlers that keep cached and denormalized data in sync with the models.
+Connected in ReaderConfig.ready(). Bulk article deletes go through
+delete_articles(), which skips the per-row delete handlers and catches up
+once at the end.
+"""
+from contextlib import contextmanager
+
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete
+from django.contrib.auth.models import User
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import achievements
+from . import homepage
+from . import pdf_export
+from . import preferences
+from . import ratings
+from . import search
+from . import stats
+from . import suggestions
+from . import taxonomy
+from . import translation
+from .cache import invalidate_on
+from .models import (
+    Achievement, Article, ArticleTranslation, Bookmark, Category, Note, Rating, ReadingProgress, Tag, UserAchievement,
+    UserProfile,
+)
+
+
+# ============ READING STATS ============
+@receiver(post_save, sender=ReadingProgress)
+def reading_progress_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.apply_progress_delta(
+            instance.user_id,
+            completed=1 if instance.is_completed else 0,
+            in_progress=0 if instance.is_completed else 1,
+            time_spent=instance.time_spent,
+        )
+    else:
+        loaded = getattr(instance, '_loaded_state', None)
+        if loaded is None:
+            return
+        was_completed, old_time = loaded
+        newly_completed = int(bool(instance.is_completed) and not was_completed)
+        stats.apply_progress_delta(
+            instance.user_id,
+            completed=newly_completed,
+            in_progress=-newly_completed,
+            time_spent=(instance.time_spent or 0) - (old_time or 0),
+        )
+    instance._loaded_state = (instance.is_completed, instance.time_spent)
+
+
+@receiver(post_delete, sender=ReadingProgress)
+def reading_progress_deleted(sender, instance, **kwargs):
+    stats.apply_progress_delta(
+        instance.user_id,
+        completed=-1 if instance.is_completed else 0,
+        in_progress=0 if instance.is_completed else -1,
+        time_spent=-(instance.time_spent or 0),
+        # recent_completions counts completions by last read day (see compute_user_stats)
+        completed_on=timezone.localdate(instance.last_read_at) if instance.last_read_at else None,
+    )
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.apply_count_delta(instance.user_id, 'notes_count', 1)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    stats.apply_count_delta(instance.user_id, 'notes_count', -1)
+
+
+@receiver(post_save, sender=Bookmark)
+def bookmark_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.apply_count_delta(instance.user_id, 'bookmarks_count', 1)
+
+
+@receiver(post_delete, sender=Bookmark)
+def bookmark_deleted(sender, instance, **kwargs):
+    stats.apply_count_delta(instance.user_id, 'bookmarks_count', -1)
+
+
+# ============ RATING AGGREGATES ============
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        ratings.apply_rating_delta(instance.article_id, instance.score, 1)
+    else:
+        loaded = getattr(instance, '_loaded_score', None)
+        if loaded is None:
+            ratings.recount([instance.article_id])
+        else:
+            ratings.apply_rating_delta(instance.article_id, instance.score - loaded, 0)
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    ratings.apply_rating_delta(instance.article_id, -instance.score, -1)
+
+
+# ============ CACHE INVALIDATION ============
+def article_languages(article):
+    """The article's language, and the one it was loaded with if that differs."""
+    loaded = getattr(article, '_loaded_state', None)
+    return {article.language, loaded[1] if loaded else None}
+
+
+# Connected before the taxonomy handlers, which reset _loaded_state
+article_home_stale = invalidate_on(Article, homepage.PAYLOAD, homepage.PAGE, scope=article_languages)
+article_suggestions_stale = invalidate_on(Article, suggestions.ARTICLES)
+invalidate_on(Category, suggestions.ARTICLES, homepage.PAYLOAD, homepage.PAGE, taxonomy.SIDEBAR)
+invalidate_on(Tag, taxonomy.SIDEBAR)
+invalidate_on(Achievement, achievements.THRESHOLDS, achievements.NEXT)
+invalidate_on(UserAchievement, achievements.NEXT, scope=lambda earned: earned.user_id)
+translation_cache_stale = invalidate_on(
+    ArticleTranslation, translation.TRANSLATIONS, scope=lambda row: row.article_id,
+)
+invalidate_on(UserProfile, preferences.PROFILE, scope=lambda profile: profile.user_id)
+invalidate_on(User, preferences.PROFILE, scope=lambda user: user.pk)  # Admin flag and role
+
+
+# ============ PDF EXPORTS ============
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_exports_stale(sender, instance, raw=False, **kwargs):
+    if not raw:
+        pdf_export.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=ArticleTranslation)
+@receiver(post_delete, sender=ArticleTranslation)
+def translation_exports_stale(sender, instance, raw=False, **kwargs):
+    if not raw:
+        pdf_export.invalidate(instance.article_id)
+
+
+# ============ TAXONOMY COUNTS ============
+@receiver(post_save, sender=Article)
+def article_taxonomy_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.category_id, instance.language, instance.is_published)
+    loaded = getattr(instance, '_loaded_state', None)
+    instance._loaded_state = current
+    if created:
+        if instance.is_published:
+            taxonomy.recount_categories([instance.category_id])  # New articles have no tags yet
+        return
+    if loaded == current:
+        return
+    taxonomy.recount_categories([instance.category_id, loaded[0] if loaded else None])
+    taxonomy.recount_tags(instance.tags.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Article)
+def article_taxonomy_deleting(sender, instance, **kwargs):
+    # The tag links are gone by post_delete
+    instance._deleted_tag_ids = list(instance.tags.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Article)
+def article_taxonomy_deleted(sender, instance, **kwargs):
+    if instance.is_published:
+        taxonomy.recount_categories([instance.category_id])
+        taxonomy.recount_tags(getattr(instance, '_deleted_tag_ids', []))
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # tag.articles.add(...) and friends: only this tag's count changes
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            taxonomy.recount_tags([instance.pk])
+        return
+    if not instance.is_published:
+        return
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = list(instance.tags.values_list('id', flat=True))
+    elif action == 'post_clear':
+        taxonomy.recount_tags(getattr(instance, '_cleared_tag_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        taxonomy.recount_tags(pk_set or [])
+
+
+# ============ BULK DELETES ============
+# Every per-row handler an article delete can reach through its cascades,
+# as (signal, handler, sender). Django only deletes a cascaded table with
+# one query when the model has no delete receivers.
+DELETE_RECEIVERS = [
+    (pre_delete, article_taxonomy_deleting, Article),
+    (post_delete, article_taxonomy_deleted, Article),
+    (post_delete, article_exports_stale, Article),
+    (post_delete, article_home_stale, Article),
+    (post_delete, article_suggestions_stale, Article),
+    (post_delete, translation_exports_stale, ArticleTranslation),
+    (post_delete, translation_cache_stale, ArticleTranslation),
+    (post_delete, reading_progress_deleted, ReadingProgress),
+    (post_delete, note_deleted, Note),
+    (post_delete, bookmark_deleted, Bookmark),
+    (post_delete, rating_deleted, Rating),
+]
+
+
+@contextmanager
+def delete_receivers_disconnected():
+    """
+    Disconnect DELETE_RECEIVERS for the duration. Signals are process-wide,
+    so this is meant for management commands, not request handling.
+    """
+    disconnected = []
+    for signal, handler, sender in DELETE_RECEIVERS:
+        uid = getattr(handler, 'dispatch_uid', None)  # Set by invalidate_on()
+        if signal.disconnect(handler, sender=sender, dispatch_uid=uid):
+            disconnected.append((signal, handler, sender, uid))
+    try:
+        yield
+    finally:
+        for signal, handler, sender, uid in disconnected:
+            signal.connect(handler, sender=sender, weak=False, dispatch_uid=uid)
+
+
+def delete_articles(queryset):
+    """
+    Delete the articles in ``queryset`` and everything that cascades from
+    them, then bring the taxonomy counts, reading stats, export files and
+    caches up to date once. Returns queryset.delete()'s result.
+    """
+    articles = queryset.values('pk')
+    article_ids = list(queryset.values_list('pk', flat=True))
+    category_ids = set(
+        queryset.filter(is_published=True).order_by().values_list('category_id', flat=True).distinct()
+    )
+    tag_ids = set(
+        Article.tags.through.objects.filter(article__in=articles, article__is_published=True)
+        .order_by().values_list('tag_id', flat=True).distinct()
+    )
+    user_ids = set()
+    for model in (ReadingProgress, Note, Bookmark):
+        user_ids.update(model.objects.filter(article__in=articles).order_by().values_list('user_id', flat=True).distinct())
+
+    with delete_receivers_disconnected():
+        deleted = queryset.delete()
+
+    taxonomy.recount_categories(category_ids)
+    taxonomy.recount_tags(tag_ids)
+    stats.reconcile_user_stats(user_ids)
+    pdf_export.invalidate_many(article_ids)
+    homepage.invalidate()
+    suggestions.bump_article_version()
+    translation.TRANSLATIONS.invalidate()
+    return deleted
+
+
+# ============ SEARCH INDEX ============
+@receiver(post_migrate)
+def search_index_migrated(sender, using, **kwargs):
+    if sender.name == 'reader':
+        search.install_after_migrate(using)
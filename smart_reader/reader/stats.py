@@ -0,0 +1,214 @@
+"""
+Per-user reading statistics.
+
+UserReadingStats holds the totals the dashboard, profile and stats API
+show, so those pages read one row instead of re-counting ReadingProgress,
+Note and Bookmark. The progress pipeline and the signal handlers apply
+deltas here; reconcile_user_stats() rebuilds a row from the source tables.
+
+QuerySet.update() sends no signals, so code that bulk-updates
+is_completed or time_spent must apply the deltas itself or reconcile the
+affected users afterwards (normalize_user_progress() reconciles). Bulk
+updates of other fields, like fix_completed_progress setting
+max_scroll_percentage, do not touch the stats. Queryset deletes send
+post_delete per row; signals.delete_articles() skips that and reconciles
+the affected users once. `manage.py reconcile_reading_stats` repairs any
+drift.
+
+activity_series() buckets a user's activity by day, week or month for
+charts and calendars.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from . import analytics
+from .models import Bookmark, Note, ReadingProgress, UserReadingStats
+
+
+def _recent_completions(user_ids, today=None):
+    """Completed articles per user per day for the recent window."""
+    today = today or timezone.localdate()
+    start = analytics._day_start(today - timedelta(days=UserReadingStats.RECENT_DAYS))
+    recent = {}
+    rows = (
+        ReadingProgress.objects
+        .filter(user_id__in=user_ids, is_completed=True, last_read_at__gte=start)
+        .values_list('user_id', 'last_read_at')
+    )
+    for user_id, last_read_at in rows:
+        day = timezone.localdate(last_read_at).isoformat()
+        days = recent.setdefault(user_id, {})
+        days[day] = days.get(day, 0) + 1
+    return recent
+
+
+def compute_user_stats(user_ids):
+    """Recount stats for the given users from the source tables, in four grouped queries."""
+    values = {
+        user_id: {
+            'completed_count': 0, 'in_progress_count': 0, 'total_time': 0,
+            'notes_count': 0, 'bookmarks_count': 0, 'recent_completions': {},
+        }
+        for user_id in user_ids
+    }
+    progress_rows = (
+        ReadingProgress.objects
+        .filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(
+            completed=Count('id', filter=Q(is_completed=True)),
+            in_progress=Count('id', filter=Q(is_completed=False)),
+            time=Sum('time_spent'),
+        )
+    )
+    for row in progress_rows:
+        values[row['user_id']].update(
+            completed_count=row['completed'],
+            in_progress_count=row['in_progress'],
+            total_time=row['time'] or 0,
+        )
+    for row in Note.objects.filter(user_id__in=user_ids).values('user_id').annotate(n=Count('id')):
+        values[row['user_id']]['notes_count'] = row['n']
+    for row in Bookmark.objects.filter(user_id__in=user_ids).values('user_id').annotate(n=Count('id')):
+        values[row['user_id']]['bookmarks_count'] = row['n']
+    for user_id, days in _recent_completions(user_ids).items():
+        values[user_id]['recent_completions'] = days
+    return values
+
+
+def reconcile_user_stats(user_ids):
+    """Rebuild UserReadingStats rows for the given users. Returns the number of rows written."""
+    user_ids = list(user_ids)
+    computed = compute_user_stats(user_ids)
+    with transaction.atomic():
+        for user_id, fields in computed.items():
+            UserReadingStats.objects.update_or_create(user_id=user_id, defaults=fields)
+    return len(computed)
+
+
+def get_user_stats(user):
+    """Return the user's stats row, building it from the source tables on first use."""
+    stats = UserReadingStats.objects.filter(user=user).first()
+    if stats is None:
+        try:
+            reconcile_user_stats([user.pk])
+        except IntegrityError:
+            pass  # Created concurrently by another request
+        stats = UserReadingStats.objects.get(user=user)
+    return stats
+
+
+def apply_progress_delta(user_id, completed=0, in_progress=0, time_spent=0, completed_on=None):
+    """
+    Add progress deltas to a user's stats row.
+    Rows that do not exist yet are left alone; get_user_stats() builds them
+    from the source tables, which already include the change.
+    ``completed_on`` is the day recent_completions counts the change for:
+    today for new completions, the row's last read day when one is removed.
+    """
+    if not (completed or in_progress or time_spent):
+        return
+    with transaction.atomic():
+        if completed:
+            stats = UserReadingStats.objects.select_for_update().filter(user_id=user_id).first()
+            if stats is None:
+                return
+            today = timezone.localdate()
+            day = (completed_on or today).isoformat()
+            cutoff = (today - timedelta(days=UserReadingStats.RECENT_DAYS)).isoformat()
+            recent = {d: n for d, n in stats.recent_completions.items() if d >= cutoff}
+            if day >= cutoff:
+                recent[day] = max(0, recent.get(day, 0) + completed)
+                if not recent[day]:
+                    del recent[day]
+            UserReadingStats.objects.filter(pk=stats.pk).update(
+                completed_count=F('completed_count') + completed,
+                in_progress_count=F('in_progress_count') + in_progress,
+                total_time=F('total_time') + time_spent,
+                recent_completions=recent,
+                updated_at=timezone.now(),
+            )
+        else:
+            UserReadingStats.objects.filter(user_id=user_id).update(
+                completed_count=F('completed_count') + completed,
+                in_progress_count=F('in_progress_count') + in_progress,
+                total_time=F('total_time') + time_spent,
+                updated_at=timezone.now(),
+            )
+
+
+def apply_count_delta(user_id, field, delta):
+    """Adjust notes_count or bookmarks_count."""
+    UserReadingStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta, 'updated_at': timezone.now()}
+    )
+
+
+# ============ ACTIVITY SERIES ============
+BUCKETS = ('day', 'week', 'month')
+
+
+def _bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _previous_bucket(start, bucket):
+    if bucket == 'week':
+        return start - timedelta(days=7)
+    if bucket == 'month':
+        return (start - timedelta(days=1)).replace(day=1)
+    return start - timedelta(days=1)
+
+
+def activity_series(queryset, date_field, bucket='day', periods=7, sum_field=None, today=None):
+    """
+    Count rows of ``queryset`` per day, week (starting Monday) or month for
+    the last ``periods`` buckets up to and including ``today``.
+
+    Runs one grouped query over a ``date_field >= start`` range, so an index
+    on the field can be used. Returns a list of
+    ``{'start': date, 'count': int, 'total': int}`` ordered oldest first,
+    with empty buckets filled in; ``total`` is the sum of ``sum_field``.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of {", ".join(BUCKETS)}')
+    periods = max(1, periods)
+    today = today or timezone.localdate()
+
+    starts = [_bucket_start(today, bucket)]
+    for _ in range(periods - 1):
+        starts.append(_previous_bucket(starts[-1], bucket))
+    starts.reverse()
+
+    range_start = analytics._day_start(starts[0])
+
+    annotations = {'count': Count('pk')}
+    if sum_field:
+        annotations['total'] = Sum(sum_field)
+    rows = (
+        queryset
+        .filter(**{f'{date_field}__gte': range_start})
+        .annotate(bucket=Trunc(date_field, bucket, output_field=DateField()))
+        .values('bucket')
+        .annotate(**annotations)
+        .order_by()
+    )
+    found = {row['bucket']: row for row in rows}
+
+    series = []
+    for start in starts:
+        row = found.get(start, {})
+        series.append({
+            'start': start,
+            'count': row.get('count', 0),
+            'total': row.get('total') or 0,
+        })
+    return series
@@ -0,0 +1,169 @@
+"""
+In-process prefix index for search autocomplete.
+
+For each language the published article titles are tokenized into a
+sorted array of distinct tokens, each with the list of articles using it
+(ordered by popularity). A lookup bisects to the tokens starting with the
+typed prefix and merges their article lists, so the first matches found
+are the most popular ones. Category names are stored with each entry.
+
+An index is rebuilt when the article version stamp changes (bumped on
+Article/Category save and delete) or after SUGGESTION_INDEX_TTL seconds,
+which also refreshes the popularity order. Lookups otherwise never touch
+the database.
+
+Rebuilds do not run on the keystroke that notices the stale index: the
+old index keeps answering while the rebuild runs on the worker's
+background thread (flusher.defer). A lock in the shared cache lets one
+worker rebuild a language at a time, so an edit does not make every
+worker query all titles at once; the others retry on a later lookup.
+Only a worker with no index for the language yet builds it inline.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models.functions import Left
+
+from . import flusher
+from .cache import LANGUAGE, namespace
+
+
+MAX_SUGGESTIONS = 8
+ARTICLES = namespace('articles')  # Version stamp only; bumped on Article/Category changes
+REBUILDING = namespace('suggestions.rebuilding', scope=LANGUAGE, timeout=120)  # Cross-worker rebuild lock
+_indexes = {}  # language -> (version, built_at, PrefixIndex)
+_lock = threading.Lock()
+_first_build_lock = threading.Lock()
+
+
+def _index_ttl():
+    return getattr(settings, 'SUGGESTION_INDEX_TTL', 900)  # seconds
+
+
+# ============ ARTICLE VERSION STAMP ============
+def article_version():
+    return ARTICLES.version()
+
+
+def bump_article_version():
+    """Called when an article or category changes."""
+    ARTICLES.invalidate()
+
+
+# ============ INDEX ============
+def tokenize(text):
+    return re.findall(r'\w+', unicodedata.normalize('NFKC', text).casefold())
+
+
+class PrefixIndex:
+    """Sorted token array over article titles, with popularity-ordered postings."""
+
+    def __init__(self, rows):
+        """rows: (id, title, slug, summary, category name) ordered by popularity."""
+        self.entries = []
+        self.entry_tokens = []
+        postings = {}
+        for position, (pk, title, slug, summary, category) in enumerate(rows):
+            self.entries.append({
+                'id': pk,
+                'title': title,
+                'slug': slug,
+                'summary': summary or '',
+                'category': category or '',
+            })
+            tokens = set(tokenize(title))
+            self.entry_tokens.append(tokens)
+            for token in tokens:
+                postings.setdefault(token, []).append(position)
+        self.tokens = sorted(postings)
+        self.postings = [postings[token] for token in self.tokens]
+
+    def _positions(self, prefix):
+        lo = bisect_left(self.tokens, prefix)
+        hi = bisect_left(self.tokens, prefix + '\U0010ffff', lo)
+        lists = self.postings[lo:hi]
+        if len(lists) == 1:
+            return iter(lists[0])
+        return heapq.merge(*lists)
+
+    def search(self, query, limit=MAX_SUGGESTIONS):
+        """Most popular articles whose title has a word starting with every query term."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        terms.sort(key=len, reverse=True)
+        driver, others = terms[0], terms[1:]  # The longest term has the shortest postings
+
+        results = []
+        previous = None
+        for position in self._positions(driver):
+            if position == previous:
+                continue  # Title has several words with this prefix
+            previous = position
+            tokens = self.entry_tokens[position]
+            if all(any(token.startswith(term) for token in tokens) for term in others):
+                results.append(self.entries[position])
+                if len(results) >= limit:
+                    break
+        return results
+
+
+def build_index(language):
+    from .models import Article
+
+    rows = (
+        Article.objects
+        .filter(is_published=True, language=language)
+        .annotate(short_summary=Left('summary', 100))
+        .order_by('-views_count', 'id')
+        .values_list('id', 'title', 'slug', 'short_summary', 'category__name')
+    )
+    return PrefixIndex(rows.iterator(chunk_size=2000))
+
+
+def _store(language, version, index):
+    with _lock:
+        _indexes[language] = (version, time.monotonic(), index)
+
+
+def rebuild(language):
+    """Rebuild the language's index unless another worker is rebuilding it. True if rebuilt."""
+    version = article_version()  # Read first: changes made during the build trigger another one
+    if not REBUILDING.add(True, language):
+        return False
+    try:
+        _store(language, version, build_index(language))
+    finally:
+        REBUILDING.delete(language)
+    return True
+
+
+def get_index(language):
+    version = article_version()
+    with _lock:
+        cached = _indexes.get(language)
+
+    if cached is None:
+        # Nothing to serve yet: build inline, once per process
+        with _first_build_lock:
+            with _lock:
+                cached = _indexes.get(language)
+            if cached is None:
+                index = build_index(language)
+                _store(language, version, index)
+                return index
+
+    if cached[0] != version or time.monotonic() - cached[1] >= _index_ttl():
+        flusher.defer(f'suggestions:{language}', lambda: rebuild(language))
+        with _lock:
+            cached = _indexes[language]  # Already rebuilt if the task ran inline
+    return cached[2]
+
+
+def suggest(query, language, limit=MAX_SUGGESTIONS):
+    return get_index(language).search(query, limit)
@@ -0,0 +1,124 @@
+"""
+Denormalized article counts for categories and tags.
+
+Category.article_count / Tag.article_count hold the number of published
+articles in all languages (used by the admin), and CategoryArticleCount /
+TagArticleCount hold the same per language (used by the article list
+sidebar). Signal handlers recount the categories and tags an article
+belongs to when it is created, deleted, published or unpublished, moved
+to another category or language, or when its tags change. Bulk inserts
+and queryset updates bypass the signals; run `recount_taxonomy` after
+them.
+
+The sidebar (top categories and tags for a language) is cached until
+the counts change or TAXONOMY_SIDEBAR_TTL seconds pass.
+"""
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .cache import LANGUAGE, namespace
+from .models import Article, Category, CategoryArticleCount, Tag, TagArticleCount
+
+
+SIDEBAR_CATEGORIES = 8
+SIDEBAR_TAGS = 15
+SIDEBAR = namespace('taxonomy.sidebar', scope=LANGUAGE, timeout=3600, setting='TAXONOMY_SIDEBAR_TTL')
+
+
+# ============ RECOUNT ============
+def _recount(model, count_model, key, rows, ids):
+    """
+    Replace the per-language rows of ``count_model`` for ``ids`` (every row
+    when ids is None) with ``rows`` of (id, language, count), then refresh
+    the totals on ``model``.
+    """
+    counts = [count_model(**{f'{key}_id': pk, 'language': language, 'article_count': n}) for pk, language, n in rows]
+    totals = count_model.objects.filter(**{key: OuterRef('pk')}).order_by().values(key).annotate(
+        total=Sum('article_count')
+    ).values('total')
+
+    with transaction.atomic():
+        stale = count_model.objects.all()
+        targets = model.objects.all()
+        if ids is not None:
+            stale = stale.filter(**{f'{key}_id__in': ids})
+            targets = targets.filter(pk__in=ids)
+        stale.delete()
+        count_model.objects.bulk_create(counts, batch_size=500)
+        targets.update(article_count=Coalesce(Subquery(totals), 0))
+    return len(counts)
+
+
+def recount_categories(category_ids=None):
+    """Recount the given categories, or all of them. Returns the number of per-language rows written."""
+    if category_ids is not None:
+        category_ids = {pk for pk in category_ids if pk is not None}
+        if not category_ids:
+            return 0
+    articles = Article.objects.filter(is_published=True, category__isnull=False)
+    if category_ids is not None:
+        articles = articles.filter(category_id__in=category_ids)
+    rows = articles.order_by().values_list('category_id', 'language').annotate(n=Count('id'))
+    written = _recount(Category, CategoryArticleCount, 'category', list(rows), category_ids)
+    invalidate_sidebar()
+    return written
+
+
+def recount_tags(tag_ids=None):
+    """Recount the given tags, or all of them. Returns the number of per-language rows written."""
+    if tag_ids is not None:
+        tag_ids = set(tag_ids)
+        if not tag_ids:
+            return 0
+    links = Article.tags.through.objects.filter(article__is_published=True)
+    if tag_ids is not None:
+        links = links.filter(tag_id__in=tag_ids)
+    rows = links.order_by().values_list('tag_id', 'article__language').annotate(n=Count('article_id'))
+    written = _recount(Tag, TagArticleCount, 'tag', list(rows), tag_ids)
+    invalidate_sidebar()
+    return written
+
+
+def recount_all():
+    return recount_categories() + recount_tags()
+
+
+# ============ SIDEBAR ============
+def invalidate_sidebar():
+    SIDEBAR.invalidate()
+
+
+def get_sidebar(language):
+    """
+    Top categories and tags for ``language`` by published article count, as
+    {'categories': [...], 'tags': [...]} lists of dicts.
+    """
+    def build():
+        categories = (
+            CategoryArticleCount.objects
+            .filter(language=language, article_count__gt=0)
+            .order_by('-article_count', 'category__name')
+            .values('category__name', 'category__slug', 'category__icon', 'article_count')
+            [:SIDEBAR_CATEGORIES]
+        )
+        tags = (
+            TagArticleCount.objects
+            .filter(language=language, article_count__gt=0)
+            .order_by('-article_count', 'tag__name')
+            .values('tag__name', 'tag__slug', 'article_count')
+            [:SIDEBAR_TAGS]
+        )
+        return {
+            'categories': [
+                {'name': row['category__name'], 'slug': row['category__slug'],
+                 'icon': row['category__icon'], 'article_count': row['article_count']}
+                for row in categories
+            ],
+            'tags': [
+                {'name': row['tag__name'], 'slug': row['tag__slug'], 'article_count': row['article_count']}
+                for row in tags
+            ],
+        }
+
+    return SIDEBAR.get_or_set(build, language)
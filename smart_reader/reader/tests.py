@@ -1,3 +1,1492 @@
-from django.test import TestCase
+import io
+import json
+import pickle
+import re
+import tempfile
+import threading
+import time
+import warnings
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Avg, Count, F, Sum
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    achievements, analytics, cache as app_cache, flusher, homepage, pdf_export, preferences, progress, ratelimit,
+    ratings, search as article_search, signals, stats as reading_stats, suggestions, taxonomy, view_counter,
+    visits,
+)
+from .management.commands.generate_massive_articles import TAG_NAMES, Command as GenerateArticlesCommand
+from .models import (
+    Achievement, Article, ArticleTranslation, ArticleViewLog, Bookmark, Category, CategoryArticleCount, DailySiteStats,
+    Note, OTPVerification, OutboundEmail, Rating, ReadingProgress, SiteVisit, Tag, TagArticleCount, UserAchievement,
+    UserProfile, UserReadingStats,
+)
+from .pagination import CursorPaginator, encode_cursor, paginate
+
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+
+
+def file_caches(location):
+    """CACHES using the (default) file backend in ``location``."""
+    return {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+
+
+def file_cache_expiry(key):
+    """Expiry timestamp the file cache stored for ``key``."""
+    with open(cache._key_to_file(key), 'rb') as entry:
+        return pickle.load(entry)
+
+
+# Every test case gets a private cache, and buffers flushed inline by the
+# request that fills them: a flush thread would write outside the test's
+# transaction. Test classes can add their own overrides on top.
+@override_settings(CACHES=TEST_CACHES, BACKGROUND_FLUSH=False)
+class ReaderTestCase(TestCase):
+    pass
+
+
+# Plain static storage (no collectstatic manifest) and no visit flushes inside measured requests
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    VISIT_FLUSH_INTERVAL=3600,
+    VISIT_FLUSH_THRESHOLD=10 ** 6,
+)
+class ArticleListQueryCountTests(ReaderTestCase):
+    """The article list must cost the same number of queries however much data a page shows."""
+
+    PAGE_QUERIES = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'pass12345')
+        UserProfile.objects.create(user=cls.user)
+        cls.category = Category.objects.create(name='Science', slug='science')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_articles(self, count, start=0):
+        raters = [User.objects.create_user(f'rater{start}-{i}') for i in range(3)]
+        for i in range(start, start + count):
+            article = Article.objects.create(
+                title=f'Article {i}', content='word ' * 50, category=self.category,
+            )
+            for rater in raters:
+                Rating.objects.create(user=rater, article=article, score=4)
+            ReadingProgress.objects.create(user=self.user, article=article, scroll_percentage=40)
+            Bookmark.objects.create(user=self.user, article=article)
+
+    def test_query_count_is_constant(self):
+        self.add_articles(2)
+        self.client.get(reverse('articles'))  # Resolves and stores the reader's preferences in the session
+        self.add_articles(1, start=2)
+        with self.assertNumQueries(self.PAGE_QUERIES):
+            response = self.client.get(reverse('articles'))
+        self.assertEqual(response.status_code, 200)
+
+        self.add_articles(30, start=3)
+        with self.assertNumQueries(self.PAGE_QUERIES):
+            response = self.client.get(reverse('articles'))
+        self.assertEqual(len(response.context['articles']), 9)
+        self.assertEqual(len(response.context['user_progress']), 9)
+
+    def test_cards_carry_rating_summary(self):
+        self.add_articles(1)
+        response = self.client.get(reverse('articles'))
+        article = response.context['articles'][0]
+        self.assertEqual(article.rating_count, 3)
+        self.assertEqual(article.rating_avg, 4)
+        self.assertContains(response, 'Science')
+
+
+# Plain static storage (no collectstatic manifest) and no visit flushes inside measured requests
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    VISIT_FLUSH_INTERVAL=3600,
+    VISIT_FLUSH_THRESHOLD=10 ** 6,
+)
+class HotPathIndexTests(ReaderTestCase):
+    """
+    EXPLAIN every query a view runs against the tables listed for it and fail
+    on a full table scan. SQLite reports those as a bare "SCAN <table>" and
+    PostgreSQL as "Seq Scan on <table>" (sequential scans are disabled first,
+    so one only appears when no index applies). With ``ordered=True`` a SQLite
+    sort step (temporary B-tree) is also an error: the index must deliver rows
+    in page order.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'pass12345')
+        UserProfile.objects.create(user=cls.user)
+        cls.admin = User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+        UserProfile.objects.create(user=cls.admin)
+        category = Category.objects.create(name='Science', slug='science')
+        articles = [
+            Article.objects.create(
+                title=f'Article {i}', content='word ' * 50, category=category,
+                language='EN' if i % 2 else 'HI', is_featured=i % 5 == 0,
+            )
+            for i in range(40)
+        ]
+        today = timezone.localdate()
+        for i, article in enumerate(articles[:20]):
+            ReadingProgress.objects.create(
+                user=cls.user, article=article, scroll_percentage=100 if i % 3 else 40,
+                is_completed=bool(i % 3), time_spent=60,
+            )
+            ArticleViewLog.objects.create(article=article, user=cls.user, time_spent=30)
+            SiteVisit.objects.create(user=cls.user, page_visited='/', visit_date=today - timedelta(days=i % 7))
+            OTPVerification.objects.create(
+                email=f'user{i}@example.com', otp='123456', expires_at=timezone.now() + timedelta(minutes=10),
+            )
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+                return [row[0] for row in cursor.fetchall()]
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def full_scans(self, queries, tables, ordered=False):
+        scans = []
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or not any(table in sql for table in tables):
+                continue
+            for line in self.explain(sql):
+                for table in tables:
+                    if re.search(rf'^SCAN {table}(?: AS \w+)?$|Seq Scan on {table}\b', line.strip()):
+                        scans.append(f'{table}: {sql}')
+                if ordered and line.strip() == 'USE TEMP B-TREE FOR ORDER BY':
+                    scans.append(f'sort: {sql}')
+        return scans
+
+    def assertIndexedRequest(self, tables, method, *args, ordered=False, **kwargs):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('EXPLAIN parsing is implemented for SQLite and PostgreSQL only')
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(*args, **kwargs)
+        self.assertLess(response.status_code, 400)
+        self.assertEqual(self.full_scans(captured.captured_queries, tables, ordered), [])
+
+    def test_home(self):
+        self.client.force_login(self.user)
+        self.assertIndexedRequest(['reader_article', 'reader_readingprogress'], 'get', reverse('home'))
+
+    def test_article_list(self):
+        self.client.force_login(self.user)
+        for sort in ('-created_at', 'popular', 'rating'):
+            self.assertIndexedRequest(
+                ['reader_article', 'reader_readingprogress', 'reader_bookmark'],
+                'get', reverse('articles'), {'sort': sort}, ordered=True,
+            )
+
+    def test_dashboard(self):
+        self.client.force_login(self.user)
+        self.assertIndexedRequest(
+            ['reader_readingprogress', 'reader_userachievement', 'reader_userreadingstats'],
+            'get', reverse('dashboard'),
+        )
+
+    def test_admin_analytics(self):
+        self.client.force_login(self.admin)
+        self.assertIndexedRequest(
+            ['reader_readingprogress', 'reader_sitevisit', 'reader_articleviewlog',
+             'reader_dailysitestats', 'reader_dailyarticlestats', 'reader_dailyuservisits'],
+            'get', reverse('admin_analytics'), {'period': '30'},
+        )
+
+    def test_send_otp(self):
+        with redirect_stdout(io.StringIO()):
+            self.assertIndexedRequest(
+                ['reader_otpverification'], 'post', reverse('send_otp'),
+                json.dumps({'email': 'new.reader@gmail.com'}), content_type='application/json',
+            )
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    TRANSLATION_BACKEND='reader.translation.OfflineTranslator',
+)
+class ArticleTranslationTests(ReaderTestCase):
+    """Translations are made ahead of time and served only while they match the article's text."""
+
+    def setUp(self):
+        from . import translation
+        translation._backend = None
+        self.addCleanup(setattr, translation, '_backend', None)
+        self.user = User.objects.create_user('hindi', 'hindi@example.com', 'pass12345')
+        UserProfile.objects.create(user=self.user, preferred_language='HI')
+        self.article = Article.objects.create(title='Tides', summary='Why seas rise', content='The moon pulls.')
+        self.client.force_login(self.user)
+
+    def read(self):
+        return self.client.get(reverse('article_detail', args=[self.article.slug]))
+
+    def test_pretranslated_article_is_served(self):
+        response = self.read()
+        self.assertEqual(response.context['translated_title'], 'Tides')
+        self.assertIsNone(response.context['translated_language'])
+
+        with redirect_stdout(io.StringIO()):
+            call_command('pretranslate_articles', languages=['HI'], workers=2)
+        self.assertEqual(ArticleTranslation.objects.filter(article=self.article, language='HI').count(), 1)
+        response = self.read()
+        self.assertEqual(response.context['translated_title'], '[HI] Tides')
+        self.assertEqual(response.context['translated_content'], '[HI] The moon pulls.')
+        self.assertContains(response, 'Translated to हिंदी (Hindi)')
+
+    def test_edited_article_falls_back_to_original(self):
+        with redirect_stdout(io.StringIO()):
+            call_command('pretranslate_articles', languages=['HI'])
+        self.article.content = 'The moon and the sun pull.'
+        self.article.save()
+        response = self.read()
+        self.assertEqual(response.context['translated_content'], 'The moon and the sun pull.')
+
+        with redirect_stdout(io.StringIO()):
+            call_command('pretranslate_articles', languages=['HI'])
+        self.assertEqual(ArticleTranslation.objects.filter(article=self.article).count(), 1)
+        self.assertEqual(self.read().context['translated_content'], '[HI] The moon and the sun pull.')
+
+
+class TranslationChunkingTests(ReaderTestCase):
+    def test_chunks_follow_block_boundaries(self):
+        from .translation import iter_chunks
+        text = ''.join(f'<p>Paragraph {i} ' + 'text ' * 40 + '</p>\n' for i in range(50))
+        chunks = list(iter_chunks(text, limit=1000))
+        self.assertEqual(''.join(chunks), text)
+        self.assertTrue(all(len(chunk) <= 1000 for chunk in chunks))
+        self.assertTrue(all(chunk.rstrip().endswith('</p>') for chunk in chunks))
+
+    def test_failed_chunk_keeps_original_text(self):
+        from .translation import BaseTranslator, translate_text
+
+        class Flaky(BaseTranslator):
+            def translate(self, text, target, source='auto'):
+                if 'broken' in text:
+                    raise RuntimeError('unavailable')
+                return text.upper()
+
+        fine, broken = '<p>' + 'fine ' * 800 + '</p>', '<p>' + 'broken ' * 600 + '</p>'
+        self.assertEqual(translate_text(fine + broken, 'HI', backend=Flaky()), fine.upper() + broken)
+        with self.assertRaises(RuntimeError):
+            translate_text('broken', 'HI', backend=Flaky())
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class ArticleExportTests(ReaderTestCase):
+    def setUp(self):
+        export_root = tempfile.TemporaryDirectory()
+        self.addCleanup(export_root.cleanup)
+        export_settings = override_settings(PDF_EXPORT_ROOT=export_root.name)
+        export_settings.enable()
+        self.addCleanup(export_settings.disable)
+        user = User.objects.create_user('exporter', 'exporter@example.com', 'pass12345')
+        UserProfile.objects.create(user=user)
+        self.article = Article.objects.create(title='Glaciers', content='<p>Ice moves.</p>')
+        self.client.force_login(user)
+        self.url = reverse('download_article', args=[self.article.pk])
+
+    def test_export_is_cached_until_the_article_changes(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], pdf_export.CONTENT_TYPE)
+        response.close()
+        etag = response['ETag']
+        path = pdf_export.export_path(pdf_export.export_key(self.article, 'EN'))
+        self.assertTrue(path.exists())
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.article.content = '<p>Ice melts.</p>'
+        self.article.save()
+        self.assertFalse(path.exists())
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_export_deleted_after_rendering_is_rendered_again(self):
+        render = pdf_export.render_export
+        calls = []
+
+        def render_then_save(data):
+            # An article save lands between rendering and opening the file
+            path = render(data)
+            calls.append(path)
+            if len(calls) == 1:
+                pdf_export.invalidate(self.article.pk)
+            return path
+
+        with mock.patch.object(pdf_export, 'render_export', side_effect=render_then_save):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Glaciers', b''.join(response.streaming_content))
+        self.assertEqual(len(calls), 2)
+
+    def test_export_that_keeps_vanishing_falls_back_to_a_private_file(self):
+        render = pdf_export.render_export
+
+        def render_then_save(data):
+            path = render(data)
+            pdf_export.invalidate(self.article.pk)
+            return path
+
+        with mock.patch.object(pdf_export, 'render_export', side_effect=render_then_save):
+            export, key = pdf_export.open_export(self.article, 'EN')
+        with export:
+            self.assertIn(b'Glaciers', export.read())
+        self.assertEqual(key, pdf_export.export_key(self.article, 'EN'))
+        self.assertFalse(pdf_export.export_path(key).exists())
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    """locmem backend that counts opened connections and rejects one address."""
+
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if any('bounce@example.com' in message.to for message in messages):
+            raise ConnectionError('mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='reader.tests.CountingEmailBackend',
+    EMAIL_RETRY_DELAY=60,
+    EMAIL_MAX_ATTEMPTS=2,
+)
+class OutboundEmailTests(ReaderTestCase):
+    def setUp(self):
+        cache.clear()  # send_otp counts requests against the rate limits
+
+    def send_queued(self):
+        with redirect_stdout(io.StringIO()):
+            call_command('send_queued_email')
+
+    def test_otp_request_only_enqueues(self):
+        with redirect_stdout(io.StringIO()):
+            response = self.client.post(
+                reverse('send_otp'), json.dumps({'email': 'new@example.com'}), content_type='application/json',
+            )
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual((queued.to, queued.kind, queued.status), ('new@example.com', 'otp', 'queued'))
+
+        self.send_queued()
+        self.assertEqual(len(mail.outbox), 1)
+        otp = OTPVerification.objects.get(email='new@example.com').otp
+        self.assertIn(otp, mail.outbox[0].body)
+        self.assertEqual(OutboundEmail.objects.get().status, 'sent')
+
+    def test_messages_are_claimed_by_one_worker(self):
+        from . import outbox
+        for i in range(3):
+            outbox.enqueue(f'reader{i}@example.com', 'Hello', 'Body')
+        stale = outbox._due_ids(timezone.now(), 10)  # Read by a second worker before the first claims
+        self.assertEqual(len(outbox.claim_batch(10)), 3)
+        with mock.patch.object(outbox, '_due_ids', return_value=stale):
+            self.assertEqual(outbox.claim_batch(10), [])
+        self.assertEqual(set(OutboundEmail.objects.values_list('attempts', flat=True)), {1})
+
+    def test_batch_shares_a_connection_and_retries_failures(self):
+        from . import outbox
+        for i in range(3):
+            outbox.enqueue(f'reader{i}@example.com', 'Hello', 'Body')
+        bounce = outbox.enqueue('bounce@example.com', 'Hello', 'Body')
+        CountingEmailBackend.opened = 0
+        self.send_queued()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingEmailBackend.opened, 2)  # The batch, and a reopen after the failure
+
+        bounce.refresh_from_db()
+        self.assertEqual((bounce.status, bounce.attempts), ('queued', 1))
+        self.assertGreater(bounce.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        self.assertIn('mailbox unavailable', bounce.last_error)
+
+        OutboundEmail.objects.filter(pk=bounce.pk).update(next_attempt_at=timezone.now())
+        self.send_queued()
+        bounce.refresh_from_db()
+        self.assertEqual((bounce.status, bounce.attempts), ('failed', 2))
+
+
+@override_settings(RATE_LIMITS={'check_email.ip': (3, 60)})
+class RateLimitTests(ReaderTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def post(self, name, payload, **extra):
+        with redirect_stdout(io.StringIO()):
+            return self.client.post(reverse(name), json.dumps(payload), content_type='application/json', **extra)
+
+    def test_otp_requests_are_limited_per_email_without_counting_rows(self):
+        for _ in range(5):
+            self.assertEqual(self.post('send_otp', {'email': 'burst@example.com'}).json()['status'], 'success')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('send_otp', {'email': 'burst@example.com'})
+        self.assertIn('Too many OTP requests', response.json()['message'])
+        # Only the registered-email check; no OTP rows are counted or written
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('otpverification', queries[0]['sql'])
+        # Another address from the same client is still allowed
+        self.assertEqual(self.post('send_otp', {'email': 'other@example.com'}).json()['status'], 'success')
+
+    def test_wrong_codes_lock_verification(self):
+        self.post('send_otp', {'email': 'guess@example.com'})
+        otp = OTPVerification.objects.get(email='guess@example.com')
+        wrong = '000000' if otp.otp != '000000' else '111111'
+        for _ in range(5):
+            self.post('verify_otp', {'email': 'guess@example.com', 'otp': wrong})
+        otp.refresh_from_db()
+        self.assertEqual(otp.attempts, 5)
+        response = self.post('verify_otp', {'email': 'guess@example.com', 'otp': otp.otp})
+        self.assertIn('Too many incorrect attempts', response.json()['message'])
+
+    def test_counters_outlive_the_default_timeout_on_the_file_cache(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES=file_caches(location)):
+            limit = ratelimit.OTP_SEND_EMAIL
+            for _ in range(3):
+                limit.hit('slow@example.com')
+            current, _, _ = limit._keys('slow@example.com', time.time())
+            self.assertGreater(file_cache_expiry(current), time.time() + limit.window)
+            self.assertEqual(cache.get(current), 3)
+
+    def test_check_email_is_limited_per_ip(self):
+        for _ in range(3):
+            self.assertEqual(self.post('check_email', {'email': 'free@example.com'}).status_code, 200)
+        self.assertEqual(self.post('check_email', {'email': 'free@example.com'}).status_code, 429)
+        response = self.post('check_email', {'email': 'free@example.com'}, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 200)
+
+    def test_forwarded_for_only_counts_hops_added_by_trusted_proxies(self):
+        for _ in range(3):
+            self.post('check_email', {'email': 'free@example.com'})
+        # A client cannot pick a fresh address by sending its own header
+        response = self.post('check_email', {'email': 'free@example.com'}, HTTP_X_FORWARDED_FOR='198.51.100.1')
+        self.assertEqual(response.status_code, 429)
+
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='198.51.100.1, 203.0.113.7', REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(ratelimit.client_ip(request), '203.0.113.7')
+            request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(ratelimit.client_ip(request), '10.0.0.1')
+
+    def test_rejected_otp_requests_do_not_use_up_the_limit(self):
+        User.objects.create_user('taken', 'taken@example.com', 'pass12345')
+        for _ in range(6):
+            self.assertEqual(self.post('send_otp', {'email': 'taken@example.com'}).json()['message'],
+                             'Email already registered')
+            self.assertEqual(self.post('send_otp', {'email': 'typo@gmial.com'}).json()['status'], 'typo')
+        self.assertEqual(self.post('send_otp', {'email': 'typo@gmail.com'}).json()['status'], 'success')
+
+
+class RetentionTests(ReaderTestCase):
+    def test_purge_respects_horizon_and_rollups(self):
+        from . import analytics
+        from .models import JobCheckpoint
+
+        today = timezone.localdate()
+        article = Article.objects.create(title='Logs', content='text')
+        for age in (400, 300, 200, 100, 5):
+            SiteVisit.objects.create(page_visited='/', visit_date=today - timedelta(days=age))
+            ArticleViewLog.objects.create(article=article, viewed_at=timezone.now() - timedelta(days=age))
+        OTPVerification.objects.create(email='old@example.com', otp='123456', expires_at=timezone.now() - timedelta(minutes=1))
+        OTPVerification.objects.create(email='new@example.com', otp='123456', expires_at=timezone.now() + timedelta(minutes=9))
+
+        out = io.StringIO()
+        call_command('purge_stale_data', days=30, stdout=out)
+        self.assertIn('No analytics rollups yet', out.getvalue())
+        self.assertEqual(SiteVisit.objects.count(), 5)
+        self.assertEqual(list(OTPVerification.objects.values_list('email', flat=True)), ['new@example.com'])
+
+        # Rollups only cover up to 250 days ago, so the 200-day-old rows stay
+        JobCheckpoint.set_value(analytics.WATERMARK, (today - timedelta(days=250)).isoformat())
+        with tempfile.TemporaryDirectory() as archive:
+            call_command('purge_stale_data', days=30, chunk_size=1, archive=archive, stdout=io.StringIO())
+            archived = sorted(Path(archive).iterdir())
+        self.assertEqual(len(archived), 2)
+        self.assertEqual(SiteVisit.objects.count(), 3)
+        self.assertEqual(ArticleViewLog.objects.count(), 3)
+
+
+class CacheRegistryTests(ReaderTestCase):
+    def setUp(self):
+        cache.clear()
+        app_cache.reset_stats()
+
+    def test_namespaces_are_registered_once(self):
+        ns = app_cache.namespace('tests.registry', timeout=60)
+        self.assertIs(app_cache.namespace('tests.registry', timeout=5), ns)
+        self.assertIs(app_cache.registered()['tests.registry'], ns)
+        self.assertEqual(ns.timeout, 60)
+
+    def test_invalidate_namespace_or_one_scope(self):
+        ns = app_cache.namespace('tests.scoped', scope=app_cache.ARTICLE, timeout=60)
+        ns.set('one', 1)
+        ns.set('two', 2)
+        ns.invalidate(1)
+        self.assertIsNone(ns.get(1))
+        self.assertEqual(ns.get(2), 'two')
+        ns.invalidate()
+        self.assertIsNone(ns.get(2))
+        with self.assertRaises(ValueError):
+            ns.key()
+
+    def test_model_changes_invalidate_registered_namespaces(self):
+        from . import taxonomy
+        from .models import Tag
+        taxonomy.SIDEBAR.set('cached', 'EN')
+        Tag.objects.create(name='Fresh', slug='fresh')
+        self.assertIsNone(taxonomy.SIDEBAR.get('EN'))
+
+    def test_stamps_keep_their_expiry_on_the_file_cache(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES=file_caches(location)):
+            ns = app_cache.namespace('tests.file', scope=app_cache.USER, timeout=3600)
+            ns.set('before', 7)
+            ns.invalidate()
+            ns.invalidate(7)
+            self.assertIsNone(file_cache_expiry(ns._version_key()))
+            self.assertGreater(file_cache_expiry(ns._version_key(7)), time.time() + 3600)
+            self.assertIsNone(ns.get(7))
+
+            # A stamp lost to culling comes back newer, so old entries stay unreachable
+            ns.set('current', 7)
+            time.sleep(0.002)
+            cache.delete(ns._version_key())
+            self.assertIsNone(ns.get(7))
+
+    def test_stats_view_reports_hits_and_misses(self):
+        ns = app_cache.namespace('tests.stats', timeout=60)
+        ns.get_or_set(lambda: 'built', 'key')
+        ns.get_or_set(lambda: 'built', 'key')
+        self.client.force_login(User.objects.create_user('plain'))
+        self.assertEqual(self.client.get(reverse('admin_cache_stats')).status_code, 302)
+
+        self.client.force_login(User.objects.create_superuser('boss', 'boss@example.com', 'pass12345'))
+        payload = self.client.get(reverse('admin_cache_stats')).json()
+        self.assertIn('tests.stats', payload['namespaces'])
+        self.assertEqual(payload['stats']['tests.stats'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+
+class FlusherTests(ReaderTestCase):
+    def test_due_and_requested_buffers_are_flushed(self):
+        calls = []
+        with mock.patch.dict(flusher._buffers, clear=True), override_settings(TESTS_FLUSH_INTERVAL=3600):
+            flusher.register('tests', lambda: calls.append('flushed'), 'TESTS_FLUSH_INTERVAL', 60)
+            self.assertEqual(flusher.flush_due(), [])
+            flusher._requested.add('tests')
+            self.assertEqual(flusher.flush_due(), ['tests'])
+            with override_settings(TESTS_FLUSH_INTERVAL=0):
+                self.assertEqual(flusher.flush_due(), ['tests'])
+        self.assertEqual(len(calls), 2)
+
+    def test_thread_flushes_idle_buffers(self):
+        flushed = threading.Event()
+        with mock.patch.dict(flusher._buffers, clear=True):
+            flusher.register('tests', flushed.set, 'TESTS_FLUSH_INTERVAL', 60)
+            with override_settings(BACKGROUND_FLUSH=True, TESTS_FLUSH_INTERVAL=0):
+                flusher.notify('tests')
+                self.assertTrue(flushed.wait(5))
+            # The thread stops once background flushing is turned off
+            flusher._wake.set()
+            flusher._thread.join(5)
+        self.assertFalse(flusher._thread.is_alive())
+
+
+@override_settings(VIEW_COUNT_FLUSH_THRESHOLD=3, VIEW_COUNT_FLUSH_INTERVAL=3600)
+class ViewCounterTests(ReaderTestCase):
+    def test_views_are_buffered_until_the_threshold(self):
+        view_counter.flush()
+        article = Article.objects.create(title='Counted', content='text')
+        view_counter.record_view(article.pk)
+        view_counter.record_view(article.pk)
+        article.refresh_from_db()
+        self.assertEqual((article.views_count, view_counter.pending_views(article.pk)), (0, 2))
+
+        view_counter.record_view(article.pk)  # Crosses the threshold
+        article.refresh_from_db()
+        self.assertEqual((article.views_count, view_counter.pending_views(article.pk)), (3, 0))
+
+    def test_flush_groups_articles_by_increment(self):
+        view_counter.flush()
+        first, second, third = (Article.objects.create(title=f'Article {i}', content='text') for i in range(3))
+        view_counter.record_view(first.pk)
+        view_counter.record_view(second.pk)
+        view_counter._pending[third.pk] += 2
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(view_counter.flush(), 4)
+        self.assertEqual(sum('UPDATE' in query['sql'] for query in queries), 2)
+        self.assertEqual(
+            list(Article.objects.order_by('pk').values_list('views_count', flat=True)), [1, 1, 2]
+        )
+
+
+@override_settings(PROGRESS_FLUSH_THRESHOLD=10 ** 6, PROGRESS_FLUSH_INTERVAL=3600)
+class ProgressPipelineTests(ReaderTestCase):
+    def setUp(self):
+        progress.flush()
+        progress._entries.clear()
+        self.user = User.objects.create_user('heartbeat')
+        self.article = Article.objects.create(title='Long read', content='text')
+        reading_stats.get_user_stats(self.user)  # Deltas only apply to existing rows
+
+    def row(self):
+        return ReadingProgress.objects.get(user=self.user, article=self.article)
+
+    def test_heartbeats_are_coalesced_until_a_flush(self):
+        for percentage in (10, 20, 30):
+            result = progress.record_heartbeat(self.user, self.article.pk, percentage, position=percentage * 10, time_delta=30)
+        self.assertEqual(result.total_time, 90)
+        self.assertEqual((self.row().time_spent, ArticleViewLog.objects.count()), (0, 0))
+
+        self.assertEqual(progress.flush(), {self.user.pk})
+        row = self.row()
+        self.assertEqual((row.time_spent, row.scroll_percentage, row.last_position), (90, 30, 300))
+        self.assertEqual(ArticleViewLog.objects.get().time_spent, 90)
+        self.assertEqual(reading_stats.get_user_stats(self.user).total_time, 90)
+
+    def test_completion_and_final_heartbeats_are_written_immediately(self):
+        progress.record_heartbeat(self.user, self.article.pk, 50, time_delta=10, final=True)
+        self.assertEqual(self.row().time_spent, 10)
+
+        result = progress.record_heartbeat(self.user, self.article.pk, 95, time_delta=5)
+        self.assertTrue(result.just_completed)
+        row = self.row()
+        self.assertEqual((row.is_completed, row.max_scroll_percentage, row.time_spent), (True, 100, 15))
+        self.assertEqual(reading_stats.get_user_stats(self.user).completed_count, 1)
+
+    def test_an_older_flush_adds_time_but_keeps_newer_positions(self):
+        progress.record_heartbeat(self.user, self.article.pk, 40, position=400, time_delta=20)
+        # Another worker flushed a later heartbeat in the meantime
+        ReadingProgress.objects.filter(pk=self.row().pk).update(
+            last_position=700, scroll_percentage=70, max_scroll_percentage=70, time_spent=F('time_spent') + 30,
+            last_read_at=timezone.now() + timedelta(minutes=1),
+        )
+        progress.flush()
+        row = self.row()
+        self.assertEqual((row.last_position, row.scroll_percentage, row.max_scroll_percentage), (700, 70, 70))
+        self.assertEqual(row.time_spent, 50)
+
+    def test_clean_entries_are_reloaded_with_other_workers_writes(self):
+        progress.record_heartbeat(self.user, self.article.pk, 10, time_delta=20)
+        progress.flush()
+        ReadingProgress.objects.filter(pk=self.row().pk).update(time_spent=F('time_spent') + 100)
+        result = progress.record_heartbeat(self.user, self.article.pk, 20, time_delta=5)
+        self.assertEqual(result.total_time, 125)
+
+
+@override_settings(PROGRESS_FLUSH_THRESHOLD=10 ** 6, PROGRESS_FLUSH_INTERVAL=3600)
+class AchievementTests(ReaderTestCase):
+    def setUp(self):
+        cache.clear()
+        progress._entries.clear()
+        self.user = User.objects.create_user('achiever')
+        self.first_read = Achievement.objects.create(
+            name='First read', description='', icon='book', requirement_type='articles_read', requirement_value=1,
+        )
+        self.hour = Achievement.objects.create(
+            name='An hour', description='', icon='clock', requirement_type='time_spent', requirement_value=3600,
+        )
+
+    def earned(self):
+        return set(UserAchievement.objects.filter(user=self.user).values_list('achievement_id', flat=True))
+
+    def test_completion_awards_once(self):
+        article = Article.objects.create(title='Short read', content='text')
+        progress.record_heartbeat(self.user, article.pk, 100, time_delta=60)
+        self.assertEqual(self.earned(), {self.first_read.pk})
+        self.assertEqual(achievements.evaluate(self.user.pk), [])
+
+    def test_time_from_concurrent_flushes_adds_up(self):
+        reading_stats.get_user_stats(self.user)
+        # Two workers flushing half an hour each; the stats row adds both with F()
+        reading_stats.apply_progress_delta(self.user.pk, time_spent=1800)
+        self.assertEqual(achievements.record_progress(self.user.pk, time_delta=1800), [])
+        reading_stats.apply_progress_delta(self.user.pk, time_spent=1800)
+        self.assertEqual(achievements.record_progress(self.user.pk, time_delta=1800), [self.hour.pk])
+
+    def test_new_achievements_are_picked_up(self):
+        reading_stats.get_user_stats(self.user)
+        reading_stats.apply_progress_delta(self.user.pk, time_spent=600)
+        achievements.evaluate(self.user.pk)
+        self.assertEqual(self.earned(), set())
+        ten_minutes = Achievement.objects.create(
+            name='Ten minutes', description='', icon='clock', requirement_type='time_spent', requirement_value=600,
+        )
+        self.assertEqual(achievements.evaluate(self.user.pk), [ten_minutes.pk])
+
+    def test_zero_deltas_skip_the_check(self):
+        reading_stats.get_user_stats(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(achievements.record_progress(self.user.pk), [])
+
+    def test_only_the_next_unmet_threshold_is_checked(self):
+        reading_stats.get_user_stats(self.user)
+        achievements.evaluate(self.user.pk)
+        reading_stats.apply_progress_delta(self.user.pk, time_spent=600)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(achievements.record_progress(self.user.pk, time_delta=600), [])
+        self.assertEqual(len(queries), 1)  # The stats row; nothing about earned achievements
+        self.assertNotIn('userachievement', queries[0]['sql'])
+
+        reading_stats.apply_progress_delta(self.user.pk, time_spent=3000)
+        self.assertEqual(achievements.record_progress(self.user.pk, time_delta=3000), [self.hour.pk])
+        # Every time_spent threshold is earned, so more time reads nothing at all
+        with self.assertNumQueries(0):
+            self.assertEqual(achievements.record_progress(self.user.pk, time_delta=60), [])
+
+    def test_revoked_achievement_is_awarded_again(self):
+        reading_stats.get_user_stats(self.user)
+        reading_stats.apply_progress_delta(self.user.pk, time_spent=3600)
+        self.assertEqual(achievements.record_progress(self.user.pk, time_delta=3600), [self.hour.pk])
+        UserAchievement.objects.filter(user=self.user, achievement=self.hour).delete()
+        self.assertEqual(achievements.record_progress(self.user.pk, time_delta=1), [self.hour.pk])
+
+
+class ReadingStatsTests(ReaderTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('counted')
+        self.articles = [Article.objects.create(title=f'Stats {i}', content='text') for i in range(3)]
+        reading_stats.get_user_stats(self.user)
+
+    def stats_row(self):
+        row = reading_stats.get_user_stats(self.user)
+        return (row.completed_count, row.in_progress_count, row.total_time, row.recent_completions)
+
+    def assertMatchesRecount(self):
+        recounted = reading_stats.compute_user_stats([self.user.pk])[self.user.pk]
+        self.assertEqual(self.stats_row(), (
+            recounted['completed_count'], recounted['in_progress_count'], recounted['total_time'],
+            recounted['recent_completions'],
+        ))
+
+    def test_signals_track_saves_and_deletes(self):
+        today = timezone.localdate().isoformat()
+        first = ReadingProgress.objects.create(user=self.user, article=self.articles[0], time_spent=100)
+        ReadingProgress.objects.create(user=self.user, article=self.articles[1], time_spent=50, is_completed=True)
+        self.assertEqual(self.stats_row(), (1, 1, 150, {today: 1}))
+
+        first = ReadingProgress.objects.get(pk=first.pk)
+        first.is_completed = True
+        first.time_spent = 160
+        first.save()
+        self.assertEqual(self.stats_row(), (2, 0, 210, {today: 2}))
+        self.assertMatchesRecount()
+
+        ReadingProgress.objects.filter(user=self.user).delete()
+        self.assertEqual(self.stats_row(), (0, 0, 0, {}))
+        self.assertMatchesRecount()
+
+    def test_reconcile_repairs_bulk_updates(self):
+        ReadingProgress.objects.create(user=self.user, article=self.articles[0], time_spent=30)
+        ReadingProgress.objects.filter(user=self.user).update(is_completed=True, time_spent=90)
+        self.assertEqual(self.stats_row()[:3], (0, 1, 30))  # update() sends no signals
+
+        call_command('reconcile_reading_stats', user='counted', stdout=io.StringIO())
+        self.assertEqual(self.stats_row()[:3], (1, 0, 90))
+        self.assertMatchesRecount()
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_recent_days_follow_the_local_calendar(self):
+        # 02:00 in Kolkata is still the previous day in UTC
+        now = timezone.make_aware(datetime(2026, 3, 20, 2, 0)).astimezone(dt_timezone.utc)
+        oldest = timezone.make_aware(datetime(2026, 3, 20 - UserReadingStats.RECENT_DAYS, 1, 0))
+        progress = ReadingProgress.objects.create(user=self.user, article=self.articles[0], is_completed=True)
+        ReadingProgress.objects.filter(pk=progress.pk).update(last_read_at=oldest)
+        with mock.patch('django.utils.timezone.now', return_value=now), warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)  # No naive datetimes in the filters
+            recent = reading_stats.compute_user_stats([self.user.pk])[self.user.pk]['recent_completions']
+            self.assertEqual(recent, {'2026-03-06': 1})
+
+            row = UserReadingStats(recent_completions={'2026-03-12': 1, '2026-03-13': 2, '2026-03-20': 4})
+            self.assertEqual(row.weekly_reads(), 6)
+
+
+
+class ActivitySeriesTests(ReaderTestCase):
+    TODAY = date(2026, 3, 4)  # A Wednesday
+
+    def setUp(self):
+        self.user = User.objects.create_user('active')
+
+    def read_at(self, *moments):
+        for i, (moment, seconds) in enumerate(moments):
+            article = Article.objects.create(title=f'Series {ReadingProgress.objects.count()} {i}', content='text')
+            progress = ReadingProgress.objects.create(user=self.user, article=article, time_spent=seconds)
+            ReadingProgress.objects.filter(pk=progress.pk).update(last_read_at=timezone.make_aware(moment))
+
+    def series(self, bucket, periods=3):
+        return [
+            (row['start'], row['count'], row['total'])
+            for row in reading_stats.activity_series(
+                ReadingProgress.objects.filter(user=self.user), 'last_read_at', bucket, periods,
+                sum_field='time_spent', today=self.TODAY,
+            )
+        ]
+
+    def test_days(self):
+        self.read_at(
+            (datetime(2026, 3, 1, 23, 59), 5),  # Before the first bucket
+            (datetime(2026, 3, 2, 0, 0), 10),
+            (datetime(2026, 3, 4, 8, 0), 20), (datetime(2026, 3, 4, 23, 59), 30),
+        )
+        self.assertEqual(self.series('day'), [
+            (date(2026, 3, 2), 1, 10), (date(2026, 3, 3), 0, 0), (date(2026, 3, 4), 2, 50),
+        ])
+
+    def test_weeks_start_on_monday(self):
+        self.read_at(
+            (datetime(2026, 2, 15, 23, 0), 5),  # Sunday before the first bucket
+            (datetime(2026, 2, 16, 0, 0), 10),
+            (datetime(2026, 3, 1, 23, 59), 20),  # Sunday: the week starting 2026-02-23
+            (datetime(2026, 3, 2, 0, 0), 30),
+        )
+        self.assertEqual(self.series('week'), [
+            (date(2026, 2, 16), 1, 10), (date(2026, 2, 23), 1, 20), (date(2026, 3, 2), 1, 30),
+        ])
+        self.read_at((datetime(2026, 2, 20, 12, 0), 1))
+        self.assertEqual(self.series('week', periods=1), [(date(2026, 3, 2), 1, 30)])
+
+    def test_months(self):
+        self.read_at(
+            (datetime(2025, 12, 31, 23, 59), 5),
+            (datetime(2026, 1, 1, 0, 0), 10), (datetime(2026, 1, 31, 23, 59), 15),
+            (datetime(2026, 3, 4, 12, 0), 20),
+        )
+        self.assertEqual(self.series('month'), [
+            (date(2026, 1, 1), 2, 25), (date(2026, 2, 1), 0, 0), (date(2026, 3, 1), 1, 20),
+        ])
+        self.assertEqual(self.series('month', periods=4)[0], (date(2025, 12, 1), 1, 5))
+
+    def test_empty_series_and_bad_buckets(self):
+        self.assertEqual(self.series('day', periods=0), [(self.TODAY, 0, 0)])
+        with self.assertRaises(ValueError):
+            self.series('year')
+
+class AnalyticsRollupTests(ReaderTestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.articles = [Article.objects.create(title=f'Ranked {i}', content='text') for i in range(3)]
+        self.reader = User.objects.create_user('visitor')
+
+    def at(self, days_ago, hours=12, minutes=0):
+        return analytics._day_start(self.today - timedelta(days=days_ago)) + timedelta(hours=hours, minutes=minutes)
+
+    def view(self, article, when, seconds=60):
+        ArticleViewLog.objects.create(article=article, viewed_at=when, time_spent=seconds)
+
+    def visit(self, days_ago, user=None):
+        SiteVisit.objects.create(page_visited='/', user=user, visit_date=self.today - timedelta(days=days_ago))
+
+    def test_rollups_and_raw_rows_meet_at_midnight(self):
+        for days_ago in (3, 2, 1, 0):
+            self.visit(days_ago, user=self.reader)
+        self.view(self.articles[0], self.at(1, hours=23, minutes=59))  # Last minute of yesterday
+        self.view(self.articles[0], self.at(0, hours=0))  # First minute of today
+        raw = analytics.period_summary(self.today - timedelta(days=3), today=self.today)
+
+        self.assertEqual(analytics.rollup(today=self.today), 3)  # From the first raw day through yesterday
+        self.assertEqual(analytics.rolled_up_until(), self.today - timedelta(days=1))
+        yesterday = DailySiteStats.objects.get(date=self.today - timedelta(days=1))
+        self.assertEqual((yesterday.visits, yesterday.article_views), (1, 1))
+
+        merged = analytics.period_summary(self.today - timedelta(days=3), today=self.today)
+        self.assertEqual(merged, raw)
+        self.assertEqual((merged['total_visits'], merged['total_article_views'], merged['active_users']), (4, 2, 1))
+
+    def test_top_articles_rank_rollups_and_today_together(self):
+        for days_ago, article, count in ((2, 0, 3), (2, 1, 2), (1, 2, 1), (0, 1, 2), (0, 2, 1)):
+            for _ in range(count):
+                self.view(self.articles[article], self.at(days_ago))
+        analytics.rollup(today=self.today)
+        summary = analytics.period_summary(self.today - timedelta(days=2), today=self.today, top_articles=2)
+        self.assertEqual(
+            [(row['article__title'], row['views']) for row in summary['top_articles']],
+            [('Ranked 1', 4), ('Ranked 0', 3)],
+        )
+
+    def test_interrupted_rollup_resumes_from_the_watermark(self):
+        for days_ago in (4, 3, 2, 1):
+            self.visit(days_ago)
+        real_store = analytics._store
+        stored = []
+
+        def store_then_fail(totals):
+            if stored:
+                raise RuntimeError('interrupted')
+            stored.append(totals.end)
+            real_store(totals)
+
+        with mock.patch.object(analytics, '_store', store_then_fail), self.assertRaises(RuntimeError):
+            analytics.rollup(chunk_days=2, today=self.today)
+        self.assertEqual(analytics.rolled_up_until(), self.today - timedelta(days=3))
+
+        # A row arriving late for the watermark day is picked up when the run resumes there
+        self.visit(3)
+        self.assertEqual(analytics.rollup(chunk_days=2, today=self.today), 3)
+        self.assertEqual(
+            list(DailySiteStats.objects.order_by('date').values_list('visits', flat=True)), [1, 2, 1, 1],
+        )
+        self.assertEqual(analytics.rollup(today=self.today), 1)  # Only yesterday is redone
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    VISIT_FLUSH_INTERVAL=3600,
+    VISIT_FLUSH_THRESHOLD=3,
+)
+class VisitTrackingTests(ReaderTestCase):
+    def setUp(self):
+        visits.get_backend()._buffer.clear()  # Visits buffered by other tests' requests
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_visits_are_buffered_and_written_in_bulk(self):
+        request = RequestFactory().get('/articles/', HTTP_X_FORWARDED_FOR='203.0.113.7, 10.0.0.1')
+        request.user = AnonymousUser()
+        self.assertTrue(visits.record_request(request))
+        self.assertTrue(visits.record_request(request))
+        self.assertEqual((SiteVisit.objects.count(), visits.get_backend().pending()), (0, 2))
+
+        with CaptureQueriesContext(connection) as queries:
+            visits.record_request(request)  # Crosses the threshold
+        self.assertEqual(sum('INSERT' in query['sql'] for query in queries), 1)
+        self.assertEqual(set(SiteVisit.objects.values_list('ip_address', flat=True)), {'203.0.113.7'})
+
+    def test_filtered_and_unsampled_requests_are_skipped(self):
+        request = RequestFactory().get('/static/css/site.css')
+        request.user = AnonymousUser()
+        self.assertFalse(visits.record_request(request))
+        request = RequestFactory().get('/articles/')
+        request.user = AnonymousUser()
+        with override_settings(VISIT_SAMPLE_RATE=0.0):
+            self.assertFalse(visits.record_request(request))
+        self.assertEqual(visits.get_backend().pending(), 0)
+
+    def test_requests_do_not_write_visits(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('home'))
+        self.assertFalse(any('reader_sitevisit' in query['sql'] for query in queries))
+        self.assertEqual(visits.flush(), 1)
+        self.assertEqual(SiteVisit.objects.get().page_visited, '/')
+
+
+class ArticleSearchTests(ReaderTestCase):
+    def setUp(self):
+        if not article_search.is_available():
+            self.skipTest('SQLite built without FTS5')
+
+    def titles(self, query, **kwargs):
+        return [article.title for article in article_search.search_articles(query, **kwargs)]
+
+    def test_triggers_keep_the_index_in_sync(self):
+        article = Article.objects.create(title='Volcano basics', content='Magma and ash.')
+        Article.objects.bulk_create([Article(title='Glacier basics', slug='glacier-basics', content='Ice.')])
+        self.assertEqual(self.titles('magma'), ['Volcano basics'])
+        self.assertEqual(self.titles('glacier'), ['Glacier basics'])
+
+        article.title = 'Earthquake basics'
+        article.save()
+        self.assertEqual(self.titles('volcano'), [])
+        self.assertEqual(self.titles('earthquake'), ['Earthquake basics'])
+
+        article.delete()
+        self.assertEqual(self.titles('magma'), [])
+
+    def test_title_matches_rank_first_and_hits_are_joined(self):
+        Article.objects.create(title='Gardening', content='Soil, compost and tomatoes.')
+        Article.objects.create(title='Tomatoes', content='How to grow them.')
+        results = article_search.search_articles('tomato', prefix=True)
+        self.assertEqual([article.title for article in results], ['Tomatoes', 'Gardening'])
+        sql = str(results.query)
+        self.assertIn(f'{article_search.FTS_TABLE}.rowid = reader_article.id', sql)
+        self.assertNotIn('SELECT bm25', sql)  # No correlated rank subquery per hit
+
+    def test_tag_only_matches_follow_ranked_hits(self):
+        from .models import Tag
+        ranked = Article.objects.create(title='Astronomy for beginners', content='Stars.', views_count=1)
+        tagged = Article.objects.create(title='Night sky', content='Look up.', views_count=5)
+        tagged.tags.add(Tag.objects.create(name='Astronomy', slug='astronomy'))
+        results = article_search.search_articles('astronomy', include_tags=True)
+        self.assertEqual([article.pk for article in results], [ranked.pk, tagged.pk])
+        self.assertIsNone(list(results)[1].search_rank)
+
+
+class SuggestionIndexTests(ReaderTestCase):
+    def setUp(self):
+        cache.clear()
+        suggestions._indexes.clear()
+        Article.objects.create(title='Python basics', content='text', views_count=5)
+        Article.objects.create(title='Advanced Python patterns', content='text', views_count=50)
+        Article.objects.create(title='Pasta recipes', content='text', views_count=500)
+
+    def titles(self, query):
+        return [entry['title'] for entry in suggestions.suggest(query, 'EN')]
+
+    def test_prefix_lookup_orders_by_popularity(self):
+        self.assertEqual(self.titles('py'), ['Advanced Python patterns', 'Python basics'])
+        self.assertEqual(self.titles('pa'), ['Pasta recipes', 'Advanced Python patterns'])
+        self.assertEqual(self.titles('py ba'), ['Python basics'])
+        with self.assertNumQueries(0):
+            self.titles('python')
+
+    def test_stale_index_is_served_while_the_rebuild_is_deferred(self):
+        self.titles('py')
+        Article.objects.create(title='Pythonic testing', content='text', views_count=9)
+        deferred = {}
+        with mock.patch.object(suggestions.flusher, 'defer', side_effect=deferred.setdefault), \
+                self.assertNumQueries(0):
+            self.assertNotIn('Pythonic testing', self.titles('py'))
+        self.assertEqual(list(deferred), ['suggestions:EN'])
+
+        self.assertTrue(deferred['suggestions:EN']())
+        self.assertEqual(self.titles('py')[1], 'Pythonic testing')
+
+    def test_one_worker_rebuilds_at_a_time(self):
+        self.titles('py')
+        suggestions.REBUILDING.add(True, 'EN')  # Another worker is rebuilding
+        with self.assertNumQueries(0):
+            self.assertFalse(suggestions.rebuild('EN'))
+        suggestions.REBUILDING.delete('EN')
+        self.assertTrue(suggestions.rebuild('EN'))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class CursorPaginationTests(ReaderTestCase):
+    def setUp(self):
+        # Seven articles whose view counts and timestamps tie in groups
+        stamp = timezone.now().replace(microsecond=0)
+        for i in range(7):
+            article = Article.objects.create(title=f'Paged {i}', content='text', views_count=i // 3)
+            Article.objects.filter(pk=article.pk).update(created_at=stamp - timedelta(hours=i // 2))
+        self.articles = Article.objects.all()
+
+    def walk(self, ordering, per_page=3):
+        paginator = CursorPaginator(self.articles, per_page, ordering)
+        pages, token = [], None
+        while True:
+            page = paginator.get_page(token)
+            pages.append(page)
+            if not page.has_next():
+                return paginator, pages
+            token = page.next_cursor
+
+    def test_pages_cover_ties_exactly_once_in_both_directions(self):
+        for ordering in (('-views_count', '-id'), ('-created_at', '-id'), ('created_at', 'id')):
+            paginator, pages = self.walk(ordering)
+            expected = list(self.articles.order_by(*ordering).values_list('pk', flat=True))
+            self.assertEqual([a.pk for page in pages for a in page], expected, ordering)
+            self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+            # Back from the last page, one page at a time
+            page = pages[-1]
+            for previous in reversed(pages[:-1]):
+                page = paginator.get_page(page.previous_cursor)
+                self.assertEqual([a.pk for a in page], [a.pk for a in previous], ordering)
+            self.assertFalse(page.has_previous())
+            self.assertIsNone(page.previous_cursor)
+
+    def test_last_page_of_an_exact_multiple_has_no_next(self):
+        Article.objects.filter(title='Paged 6').delete()
+        _, pages = self.walk(('-id',))
+        self.assertEqual([len(page) for page in pages], [3, 3])
+        self.assertIsNone(pages[-1].next_cursor)
+        self.assertTrue(pages[-1].has_previous())
+
+    def test_bad_cursors_start_at_the_first_page(self):
+        paginator = CursorPaginator(self.articles, 3, ('-id',), name='newest')
+        first = [a.pk for a in paginator.get_page(None)]
+        for token in (
+            'not-base64!', encode_cursor('oldest', 'next', [1]), encode_cursor('newest', 'sideways', [1]),
+            encode_cursor('newest', 'next', [1, 2]),
+        ):
+            page = paginator.get_page(token)
+            self.assertEqual([a.pk for a in page], first, token)
+            self.assertFalse(page.has_previous())
+        with self.assertRaises(ValueError):
+            CursorPaginator(self.articles, 3, ('-views_count', 'id'))
+
+    def test_tampered_cursor_values_start_at_the_first_page(self):
+        for ordering, values in (
+            (('-created_at', '-id'), ['2026-13-45T99:00:00', 3]),
+            (('-created_at', '-id'), ['yesterday', 3]),
+            (('-created_at', '-id'), [{'a': 1}, 3]),
+            (('-views_count', '-id'), ['many', 3]),
+            (('-views_count', '-id'), [None, 3]),
+            (('-views_count', '-id'), [[1, 2], 3]),
+            (('-id',), ['1 OR 1=1']),
+        ):
+            paginator = CursorPaginator(self.articles, 3, ordering, name='sort')
+            page = paginator.get_page(encode_cursor('sort', 'next', values))
+            self.assertEqual([a.pk for a in page], [a.pk for a in paginator.get_page(None)], values)
+            self.assertFalse(page.has_previous())
+
+        # Through the view: a corrupted cursor is the first page, not a 500
+        user = User.objects.create_user('pager', 'pager@example.com', 'pass12345')
+        UserProfile.objects.create(user=user)
+        self.client.force_login(user)
+        token = encode_cursor('popular', 'next', ['lots', 'of'])
+        response = self.client.get(reverse('articles'), {'sort': 'popular', 'cursor': token})
+        self.assertEqual(response.status_code, 200)
+
+    def test_paginate_keeps_other_parameters(self):
+        request = RequestFactory().get('/articles/', {'sort': 'popular', 'page': '4'})
+        page = paginate(request, self.articles, 3, ('-id',), name='popular')
+        self.assertEqual(page.previous_query, '')
+        self.assertIn('sort=popular', page.next_query)
+        self.assertNotIn('page=', page.next_query)
+        self.assertIn(f'cursor={page.next_cursor}', page.next_query)
+
+
+class GenerateArticlesTests(ReaderTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('generator', 'generator@example.com', 'pass12345')
+        self.science = Category.objects.create(name='Science', slug='science')
+        self.history = Category.objects.create(name='History', slug='history')
+        self.command = GenerateArticlesCommand(stdout=io.StringIO())
+
+    def test_jobs_cover_what_each_category_still_needs(self):
+        Article.objects.create(title='Existing', content='text', category=self.science)
+        Article.objects.bulk_create(
+            [Article(title=f'Full {i}', slug=f'full-{i}', content='text', category=self.history) for i in range(3)]
+        )
+        # History is already full
+        jobs, planned = self.command.plan_jobs([self.science, self.history], 3, 2, seed=40)
+        self.assertEqual(planned, 2)
+        self.assertEqual(jobs, [(self.science, 2, 0, 40)])
+
+        jobs, planned = self.command.plan_jobs([self.science, self.history], 5, 2, seed=40)
+        self.assertEqual(planned, 6)
+        self.assertEqual(jobs, [
+            (self.science, 2, 0, 40), (self.science, 2, 2, 41), (self.history, 2, 4, 42),
+        ])
+
+    def test_payloads_do_not_depend_on_the_number_of_workers(self):
+        jobs, _ = self.command.plan_jobs([self.science, self.history], 3, 2, seed=7)
+        serial = list(self.command.run_jobs(jobs, 1, len(TAG_NAMES)))
+        pooled = list(self.command.run_jobs(jobs, 2, len(TAG_NAMES)))
+        self.assertEqual([job for job, _ in pooled], jobs)
+        self.assertEqual(pooled, serial)
+        reseeded, _ = self.command.plan_jobs([self.science, self.history], 3, 2, seed=8)
+        self.assertNotEqual(list(self.command.run_jobs(reseeded, 1, len(TAG_NAMES))), serial)
+
+    def test_batches_are_written_in_job_order(self):
+        jobs, _ = self.command.plan_jobs([self.science, self.history], 3, 2, seed=3)
+        expected = [payload['title'] for _, payloads in self.command.run_jobs(jobs, 1, len(TAG_NAMES)) for payload in payloads]
+        call_command(
+            'generate_massive_articles', per_category=3, batch=2, seed=3, workers=2, stdout=io.StringIO(),
+        )
+        self.assertEqual(list(Article.objects.order_by('pk').values_list('title', flat=True)), expected)
+        self.assertEqual(list(Article.objects.order_by('pk').values_list('category', flat=True)),
+                         [self.science.pk] * 3 + [self.history.pk] * 3)
+
+    def test_dry_run_writes_nothing(self):
+        out = io.StringIO()
+        call_command('generate_massive_articles', per_category=2, seed=3, dry_run=True, stdout=out)
+        self.assertIn('generated 4 articles', out.getvalue())
+        self.assertFalse(Article.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+
+    def test_slugs_are_unique_against_existing_rows_and_the_batch(self):
+        Article.objects.create(title='Solar Wind', content='text')
+        Article.objects.create(title='Solar Wind', content='text')
+        slugs = set(Article.objects.values_list('slug', flat=True))
+        self.assertEqual(
+            [self.command.allocate_slug('Solar Wind', slugs) for _ in range(2)], ['solar-wind-2', 'solar-wind-3'],
+        )
+        self.assertEqual(self.command.allocate_slug('Tides', slugs), 'tides')
+        # Article.save() picks the same suffix for the next one
+        self.assertEqual(Article.objects.create(title='Solar Wind', content='text').slug, 'solar-wind-2')
+
+    def test_written_batch_matches_saved_articles(self):
+        tags = self.command.ensure_tags()
+        research = [i for i, name in enumerate(TAG_NAMES) if name == 'research']
+        self.assertEqual(len(research), 2)  # the list repeats it, so links must be deduplicated
+        payloads = [
+            {'title': f'Batch {i}', 'summary': 'summary', 'content': 'word ' * (199 + 300 * i),
+             'difficulty': 'beginner', 'is_featured': i == 0, 'book_title': '', 'amazon_link': '',
+             'tags': research + [i]}
+            for i in range(3)
+        ]
+        slugs = set(Article.objects.values_list('slug', flat=True))
+        self.assertEqual(self.command.write_batch(payloads, self.science, tags, self.user, slugs), 3)
+
+        for article in Article.objects.filter(title__startswith='Batch '):
+            read_time = article.estimated_read_time
+            article.save()
+            self.assertEqual(article.estimated_read_time, read_time)
+            self.assertEqual(article.tags.count(), 2)
+            self.assertIn(article.slug, slugs)
+        self.assertEqual(Article.tags.through.objects.filter(tag__slug='research').count(), 3)
+
+    def test_counts_after_a_run_match_a_full_recount(self):
+        call_command('generate_massive_articles', per_category=3, batch=2, seed=5, stdout=io.StringIO())
+        counts = lambda: (
+            sorted(Category.objects.values_list('slug', 'article_count')),
+            sorted(Tag.objects.values_list('slug', 'article_count')),
+        )
+        after_run = counts()
+        self.assertEqual(after_run[0], [('history', 3), ('science', 3)])
+        for slug, article_count in after_run[1]:
+            self.assertEqual(article_count, Article.objects.filter(tags__slug=slug).count(), slug)
+        taxonomy.recount_all()
+        self.assertEqual(counts(), after_run)
+
+
+class TaxonomyCountTests(ReaderTestCase):
+    def setUp(self):
+        self.science = Category.objects.create(name='Science', slug='science')
+        self.history = Category.objects.create(name='History', slug='history')
+        self.space = Tag.objects.create(name='Space', slug='space')
+        self.rome = Tag.objects.create(name='Rome', slug='rome')
+
+    def counts(self):
+        return {
+            'categories': dict(Category.objects.values_list('slug', 'article_count')),
+            'tags': dict(Tag.objects.values_list('slug', 'article_count')),
+            'languages': sorted(
+                list(CategoryArticleCount.objects.values_list('category__slug', 'language', 'article_count'))
+                + list(TagArticleCount.objects.values_list('tag__slug', 'language', 'article_count'))
+            ),
+        }
+
+    def assertCountsMatchRecount(self):
+        kept = self.counts()
+        taxonomy.recount_all()
+        self.assertEqual(kept, self.counts())
+
+    def test_counts_follow_article_changes(self):
+        article = Article.objects.create(title='Orbits', content='text', category=self.science)
+        article.tags.add(self.space)
+        self.assertEqual(self.counts()['categories'], {'science': 1, 'history': 0})
+        self.assertEqual(self.counts()['tags'], {'space': 1, 'rome': 0})
+        self.assertCountsMatchRecount()
+
+        article.tags.set([self.rome])
+        self.assertEqual(self.counts()['tags'], {'space': 0, 'rome': 1})
+        self.assertCountsMatchRecount()
+
+        article.category = self.history
+        article.language = 'HI'
+        article.save()
+        self.assertEqual(self.counts()['categories'], {'science': 0, 'history': 1})
+        self.assertEqual(self.counts()['languages'], [('history', 'HI', 1), ('rome', 'HI', 1)])
+        self.assertCountsMatchRecount()
+
+        article.is_published = False
+        article.save()
+        self.assertEqual(self.counts()['tags'], {'space': 0, 'rome': 0})
+        self.assertCountsMatchRecount()
+
+        article.is_published = True
+        article.save()
+        Article.objects.get(pk=article.pk).delete()
+        self.assertEqual(self.counts()['categories'], {'science': 0, 'history': 0})
+        self.assertEqual(self.counts()['tags'], {'space': 0, 'rome': 0})
+        self.assertCountsMatchRecount()
+
+    def create_articles(self, n):
+        reader = User.objects.create_user(f'reader{n}', f'reader{n}@example.com', 'pass12345')
+        for i in range(n):
+            article = Article.objects.create(title=f'Bulk {n} {i}', content='text', category=self.science)
+            article.tags.add(self.space, self.rome)
+            ReadingProgress.objects.create(user=reader, article=article, is_completed=i % 2 == 0, time_spent=60)
+            Bookmark.objects.create(user=reader, article=article)
+            Note.objects.create(user=reader, article=article, note='note')
+            Rating.objects.create(user=reader, article=article, score=4)
+        return reader
+
+    def test_bulk_delete_takes_a_fixed_number_of_queries(self):
+        queries = []
+        for n in (2, 6):
+            reader = self.create_articles(n)
+            reading_stats.get_user_stats(reader)
+            with CaptureQueriesContext(connection) as captured:
+                signals.delete_articles(Article.objects.filter(title__startswith=f'Bulk {n} '))
+            queries.append(len(captured))
+
+            self.assertFalse(Article.objects.exists())
+            self.assertEqual(self.counts()['categories'], {'science': 0, 'history': 0})
+            self.assertEqual(self.counts()['tags'], {'space': 0, 'rome': 0})
+            stats_row = UserReadingStats.objects.get(user=reader)
+            self.assertEqual(
+                (stats_row.completed_count, stats_row.in_progress_count, stats_row.total_time,
+                 stats_row.notes_count, stats_row.bookmarks_count, stats_row.recent_completions),
+                (0, 0, 0, 0, 0, {}),
+            )
+        self.assertEqual(queries[0], queries[1])
+
+        # The per-row handlers are connected again afterwards
+        article = Article.objects.create(title='Single', content='text', category=self.science)
+        article.delete()
+        self.assertEqual(self.counts()['categories']['science'], 0)
+        self.assertTrue(signals.post_delete.has_listeners(ReadingProgress))
+
+    def test_delete_all_articles_command(self):
+        self.create_articles(3)
+        call_command('delete_all_articles', confirm=True, stdout=io.StringIO())
+        self.assertFalse(Article.objects.exists())
+        self.assertFalse(Note.objects.exists())
+        self.assertEqual(self.counts()['tags'], {'space': 0, 'rome': 0})
+        self.assertCountsMatchRecount()
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class HomepageCacheTests(ReaderTestCase):
+    def setUp(self):
+        self.article = Article.objects.create(title='Tidal Forces', content='Moons pull oceans. ' * 2000)
+
+    def test_anonymous_page_is_served_from_the_cache_with_its_headers(self):
+        first = self.client.get(reverse('home'))
+        self.assertContains(first, 'Tidal Forces')
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(reverse('home'))
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'text/html; charset=utf-8')
+        self.assertIn('Cookie', second['Vary'])
+
+    def test_publishing_or_editing_an_article_refreshes_the_page(self):
+        self.client.get(reverse('home'))
+        Article.objects.create(title='Solar Tides', content='text')
+        self.assertContains(self.client.get(reverse('home')), 'Solar Tides')
+
+        self.article.title = 'Tidal Locking'
+        self.article.save()
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Tidal Locking')
+        self.assertNotContains(response, 'Tidal Forces')
+
+    def test_logged_in_users_and_pending_messages_bypass_the_page_cache(self):
+        user = User.objects.create_user('homer', 'homer@example.com', 'pass12345')
+        UserProfile.objects.create(user=user)
+        self.client.force_login(user)
+        self.client.get(reverse('home'))
+        self.assertIsNone(homepage.get_page('EN'))
+        self.client.logout()
+
+        with mock.patch('reader.views.messages.get_messages', return_value=['Signed out']):
+            self.client.get(reverse('home'))
+        self.assertIsNone(homepage.get_page('EN'))
+        self.client.get(reverse('home'))
+        self.assertIsNotNone(homepage.get_page('EN'))
+
+    def test_payload_keeps_an_excerpt_instead_of_the_content(self):
+        card = homepage.build_payload('EN')['recent_articles'][0]
+        self.assertIn('content', card.get_deferred_fields())
+        self.assertEqual(len(card.excerpt), homepage.EXCERPT_LENGTH)
+        self.assertLess(len(pickle.dumps(homepage.build_payload('EN'))), len(self.article.content))
+        # Cards without a summary still show the start of the article
+        self.assertContains(self.client.get(reverse('home')), 'Moons pull oceans.')
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ReaderPreferencesTests(ReaderTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('prefs', 'prefs@example.com', 'pass12345')
+        self.profile = UserProfile.objects.create(user=self.user, preferred_language='EN', theme='light')
+        self.client.force_login(self.user)
+
+    def stored(self):
+        return self.client.session[preferences.SESSION_KEY]
+
+    def test_preferences_are_reused_from_the_session(self):
+        self.client.get(reverse('home'))
+        self.assertEqual((self.stored()['language'], self.stored()['theme']), ('EN', 'light'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.wsgi_request.reader.language, 'EN')
+        self.assertFalse([q for q in queries if 'reader_userprofile' in q['sql']])
+
+    def test_profile_changes_reach_the_next_request(self):
+        self.client.get(reverse('home'))
+        self.client.post(reverse('change_language'), {'language': 'ta'})
+        self.client.post(reverse('change_theme'), {'theme': 'dark'})
+        response = self.client.get(reverse('home'))
+        self.assertEqual((response.wsgi_request.reader.language, response.wsgi_request.reader.theme), ('TA', 'dark'))
+        self.assertEqual((self.stored()['language'], self.stored()['theme']), ('TA', 'dark'))
+
+        # Saved elsewhere (another session, the admin) goes through the same version stamp
+        profile = UserProfile.objects.get(user=self.user)
+        profile.reading_goal = 12
+        profile.save()
+        self.assertEqual(self.client.get(reverse('home')).wsgi_request.reader.reading_goal, 12)
+
+    def test_user_changes_refresh_the_admin_flag(self):
+        self.assertFalse(self.client.get(reverse('home')).wsgi_request.reader.is_admin)
+        self.user.is_staff = True
+        self.user.save()
+        reader = self.client.get(reverse('home')).wsgi_request.reader
+        self.assertEqual((reader.is_admin, reader.display_role), (True, 'Admin'))
+
+
+class RatingAggregateTests(ReaderTestCase):
+    def setUp(self):
+        self.article = Article.objects.create(title='Rated', content='text')
+        self.raters = [User.objects.create_user(f'critic{i}') for i in range(3)]
+
+    def assertMatchesAggregate(self):
+        self.article.refresh_from_db()
+        fresh = Rating.objects.filter(article=self.article).aggregate(total=Sum('score'), n=Count('id'), avg=Avg('score'))
+        self.assertEqual(
+            (self.article.rating_sum, self.article.rating_count),
+            (fresh['total'] or 0, fresh['n']),
+        )
+        self.assertAlmostEqual(self.article.rating_avg, fresh['avg'] or 0.0)
+        return self.article.rating_count, round(self.article.rating_avg, 3)
+
+    def rate(self, user, score):
+        # Same call as the rate_article view
+        Rating.objects.update_or_create(user=user, article=self.article, defaults={'score': score})
+
+    def test_create_change_and_delete_follow_the_ratings_table(self):
+        for user, score in zip(self.raters, (5, 4, 2)):
+            self.rate(user, score)
+        self.assertEqual(self.assertMatchesAggregate(), (3, 3.667))
+
+        self.rate(self.raters[2], 5)
+        self.assertEqual(self.assertMatchesAggregate(), (3, 4.667))
+
+        # A rating saved without being loaded first is recounted
+        rating = Rating.objects.get(user=self.raters[0], article=self.article)
+        Rating(pk=rating.pk, user=self.raters[0], article=self.article, score=1, created_at=rating.created_at).save()
+        self.assertEqual(self.assertMatchesAggregate(), (3, 3.333))
+
+        Rating.objects.get(user=self.raters[1], article=self.article).delete()
+        self.assertEqual(self.assertMatchesAggregate(), (2, 3.0))
+        Rating.objects.filter(article=self.article).delete()
+        self.assertEqual(self.assertMatchesAggregate(), (0, 0.0))
+
+        self.rate(self.raters[1], 3)
+        self.assertEqual(self.assertMatchesAggregate(), (1, 3.0))
+
+    def test_recount_matches_incremental_updates(self):
+        for user, score in zip(self.raters, (1, 2, 4)):
+            self.rate(user, score)
+        incremental = self.assertMatchesAggregate()
+        Article.objects.filter(pk=self.article.pk).update(rating_sum=0, rating_count=0, rating_avg=0)
+        ratings.recount([self.article.pk])
+        self.assertEqual(self.assertMatchesAggregate(), incremental)
@@ -0,0 +1,280 @@
+"""
+Article translation.
+
+Translations are produced ahead of time (see the `pretranslate_articles`
+command) and stored as ArticleTranslation rows keyed by article, language
+and a hash of the source text, so article_detail only has to look one up.
+Lookups are cached per article (saving a translation drops the article's
+entries); an edited article gets a new hash and its old translations are
+simply no longer found.
+
+The translator is pluggable (settings.TRANSLATION_BACKEND):
+GoogleTranslatorBackend calls Google Translate through deep-translator,
+OfflineTranslator is a deterministic local stand-in for tests and
+development without network access.
+
+Long text is split at HTML block boundaries into chunks the backend
+accepts, and the chunks are translated concurrently (TRANSLATION_WORKERS
+threads, at most TRANSLATION_RATE_LIMIT requests per second to the
+backend) and joined back in order.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .cache import ARTICLE, namespace
+from .models import ArticleTranslation
+
+
+MAX_CHUNK_LENGTH = 4500  # Google Translate rejects requests over ~5000 characters
+
+logger = logging.getLogger(__name__)
+
+TRANSLATIONS = namespace('article.translation', scope=ARTICLE, timeout=24 * 60 * 60)
+
+
+# ============ BACKENDS ============
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads. rate=None disables it."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BaseTranslator:
+    """Interface for translator backends. Languages are our codes ('EN', 'HI', ...)."""
+
+    name = 'base'
+    rate_limit = None  # Requests per second this backend accepts
+
+    def __init__(self, rate_limit=None):
+        self.limiter = RateLimiter(rate_limit or self.rate_limit)
+
+    def translate(self, text, target, source='auto'):
+        raise NotImplementedError
+
+
+class GoogleTranslatorBackend(BaseTranslator):
+    name = 'google'
+    rate_limit = 5
+
+    def translate(self, text, target, source='auto'):
+        from deep_translator import GoogleTranslator
+
+        source = source.lower() if source != 'auto' else source
+        return GoogleTranslator(source=source, target=target.lower()).translate(text)
+
+
+class OfflineTranslator(BaseTranslator):
+    """Marks text with the target language instead of translating it."""
+
+    name = 'offline'
+
+    def translate(self, text, target, source='auto'):
+        return f'[{target}] {text}'
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'TRANSLATION_BACKEND', 'reader.translation.GoogleTranslatorBackend')
+                _backend = import_string(path)(getattr(settings, 'TRANSLATION_RATE_LIMIT', None))
+    return _backend
+
+
+# ============ CHUNKING ============
+# A chunk may end after a closing block tag, a <br>/<hr>, or a blank line
+BLOCK_BOUNDARY = re.compile(
+    r'</(?:p|div|h[1-6]|li|ul|ol|blockquote|pre|table|tr|section|article|figure)\s*>'
+    r'|<(?:br|hr)\s*/?>|\n[ \t]*\n',
+    re.IGNORECASE,
+)
+
+
+def _blocks(text, limit):
+    """Yield consecutive pieces of ``text`` ending at block boundaries, none longer than ``limit``."""
+    start = 0
+    for match in BLOCK_BOUNDARY.finditer(text):
+        yield from _split_long(text[start:match.end()], limit)
+        start = match.end()
+    if start < len(text):
+        yield from _split_long(text[start:], limit)
+
+
+def _split_long(block, limit):
+    """Cut a block over ``limit`` at the last space outside a tag (or hard at the limit)."""
+    while len(block) > limit:
+        cut = block.rfind(' ', 0, limit)
+        while cut > 0 and block.rfind('<', 0, cut) > block.rfind('>', 0, cut):
+            cut = block.rfind(' ', 0, cut)
+        cut = cut + 1 if cut > 0 else limit
+        yield block[:cut]
+        block = block[cut:]
+    if block:
+        yield block
+
+
+def iter_chunks(text, limit=MAX_CHUNK_LENGTH):
+    """
+    Split ``text`` into chunks of at most ``limit`` characters, packing whole
+    HTML blocks (or blank-line separated paragraphs) together where they fit.
+    The chunks are consecutive slices: ''.join(chunks) == text.
+    """
+    parts = []
+    size = 0
+    for block in _blocks(text, limit):
+        if parts and size + len(block) > limit:
+            yield ''.join(parts)
+            parts, size = [], 0
+        parts.append(block)
+        size += len(block)
+    if parts:
+        yield ''.join(parts)
+
+
+# ============ TEXT ============
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, 'TRANSLATION_WORKERS', 8)
+                _pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='translate')
+    return _pool
+
+
+def _translate_chunk(chunk, target, source, backend):
+    """Translate one chunk, keeping its surrounding whitespace; retried once before giving up."""
+    body = chunk.strip()
+    if not body:
+        return chunk
+    lead = chunk[:len(chunk) - len(chunk.lstrip())]
+    trail = chunk[len(chunk.rstrip()):]
+    for attempt in range(2):
+        backend.limiter.wait()
+        try:
+            return lead + backend.translate(body, target, source) + trail
+        except Exception:
+            if attempt:
+                raise
+
+
+def translate_texts(texts, target, source='auto', backend=None):
+    """
+    Translate several texts at once. Every chunk of every text is sent to a
+    bounded thread pool (TRANSLATION_WORKERS) under the backend's rate limit,
+    so the wall time is close to the slowest chunk rather than the sum.
+    A chunk that fails keeps its original text; if every chunk of a text
+    fails the error is raised instead.
+    """
+    backend = backend or get_backend()
+    pool = _get_pool()
+    pending = [
+        [(chunk, pool.submit(_translate_chunk, chunk, target, source, backend)) for chunk in iter_chunks(text)]
+        if text else None
+        for text in texts
+    ]
+
+    results = []
+    for text, chunks in zip(texts, pending):
+        if chunks is None:
+            results.append(text)
+            continue
+        translated, errors = [], []
+        for chunk, future in chunks:
+            try:
+                translated.append(future.result())
+            except Exception as e:
+                errors.append(e)
+                translated.append(chunk)
+        if errors and len(errors) == len(chunks):
+            raise errors[0]
+        if errors:
+            logger.warning('%d of %d chunks left untranslated (%s): %s', len(errors), len(chunks), target, errors[0])
+        results.append(''.join(translated))
+    return results
+
+
+def translate_text(text, target, source='auto', backend=None):
+    """Translate ``text`` into ``target``; see translate_texts."""
+    return translate_texts([text], target, source, backend)[0]
+
+
+# ============ ARTICLES ============
+def content_hash(article):
+    source = '\x1f'.join([article.title, article.summary or '', article.content])
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def translate_fields(article, language, backend=None):
+    """Translate an article's title, summary and content. Network-bound; writes nothing."""
+    backend = backend or get_backend()
+    title, summary, content = translate_texts(
+        [article.title, article.summary, article.content], language, article.language, backend,
+    )
+    return {'title': title, 'summary': summary or '', 'content': content, 'backend': backend.name}
+
+
+def store_translation(article, language, fields, digest=None):
+    """Save translated fields for the article's current text, replacing older versions."""
+    digest = digest or content_hash(article)
+    with transaction.atomic():
+        ArticleTranslation.objects.filter(article=article, language=language).exclude(content_hash=digest).delete()
+        translation, _ = ArticleTranslation.objects.update_or_create(
+            article=article, language=language, content_hash=digest, defaults=fields,
+        )
+    return translation
+
+
+def translate_article(article, language, backend=None):
+    return store_translation(article, language, translate_fields(article, language, backend))
+
+
+def get_translation(article, language):
+    """
+    {'title', 'summary', 'content'} of the stored translation of the article's
+    current text, or None if there is none yet.
+    """
+    if language == article.language:
+        return None
+    digest = content_hash(article)
+
+    def load():
+        row = (
+            ArticleTranslation.objects
+            .filter(article=article, language=language, content_hash=digest)
+            .values('title', 'summary', 'content')
+            .first()
+        )
+        return row or {}  # Cache misses too, until a translation is stored
+
+    return TRANSLATIONS.get_or_set(load, article.pk, language, digest) or None
@@ -87,5 +87,6 @@ urlpatterns = [
     path('admin-panel/articles/edit/<int:article_id>/', views.admin_edit_article, name='admin_edit_article'),
     path('admin-panel/articles/delete/<int:article_id>/', views.admin_delete_article, name='admin_delete_article'),
     path('admin-panel/analytics/', views.admin_analytics, name='admin_analytics'),
+    path('admin-panel/cache-stats/', views.admin_cache_stats, name='admin_cache_stats'),
     path('admin-panel/feedbacks/', views.admin_feedbacks, name='admin_feedbacks'),
 ]
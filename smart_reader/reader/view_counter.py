@@ -0,0 +1,100 @@
+"""
+Write-behind view counter for articles.
+
+Article views are buffered per process and written back periodically as
+atomic ``F('views_count') + n`` updates, so the article page never does a
+read-modify-write on the article row. The writes happen on the worker's
+background flush thread (see flusher.py) every VIEW_COUNT_FLUSH_INTERVAL
+seconds, or sooner once VIEW_COUNT_FLUSH_THRESHOLD views are buffered.
+"""
+import atexit
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from . import flusher
+
+
+_pending = Counter()
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _flush_interval():
+    return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 30)  # seconds
+
+
+def _flush_threshold():
+    return getattr(settings, 'VIEW_COUNT_FLUSH_THRESHOLD', 200)  # buffered views
+
+
+def record_view(article_id, count=1):
+    """Buffer a view for an article; the buffer is flushed once it is old or large."""
+    with _lock:
+        _pending[article_id] += count
+        due = (
+            sum(_pending.values()) >= _flush_threshold()
+            or time.monotonic() - _last_flush >= _flush_interval()
+        )
+    flusher.notify('view_counts', due)
+
+
+def pending_views(article_id):
+    """Views recorded in this process that have not been written yet."""
+    with _lock:
+        return _pending.get(article_id, 0)
+
+
+def flush():
+    """
+    Write buffered views to the database.
+    Articles with the same increment share one UPDATE statement.
+    Returns the number of views written.
+    """
+    global _last_flush
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+
+    if not batch:
+        return 0
+
+    by_increment = defaultdict(list)
+    for article_id, count in batch.items():
+        by_increment[count].append(article_id)
+
+    from .models import Article
+
+    try:
+        with transaction.atomic():
+            for count, article_ids in by_increment.items():
+                Article.objects.filter(pk__in=article_ids).update(
+                    views_count=F('views_count') + count
+                )
+    except Exception:
+        # Put the views back so the next flush can retry them
+        with _lock:
+            _pending.update(batch)
+        raise
+
+    return sum(batch.values())
+
+
+flusher.register('view_counts', flush, 'VIEW_COUNT_FLUSH_INTERVAL', 30)
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass  # Never block interpreter shutdown
+
+
+def register_shutdown_hook():
+    """Drain the buffer when the worker process exits."""
+    atexit.register(_flush_at_exit)
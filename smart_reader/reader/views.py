@@ -1,8 +1,7 @@
 import json
 import re
-import socket
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, JsonResponse, HttpResponse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required, user_passes_test
@@ -12,112 +11,55 @@ from django.contrib import messages
 from django.db.models import Sum, Count, Avg, Q
 from django.core.paginator import Paginator
 from django.utils import timezone, translation
-from django.core.mail import send_mail
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.conf import settings
 from datetime import timedelta, datetime
-import io
-from deep_translator import GoogleTranslator
 
 from .models import (
     Article, ReadingProgress, Note, UserProfile, Category, Tag,
     Bookmark, Highlight, Rating, ReadingStreak, Achievement, 
-    UserAchievement, ReadingList, ReadingListAccessAttempt, OTPVerification, SiteVisit, ArticleViewLog, Feedback
+    UserAchievement, ReadingList, ReadingListAccessAttempt, OTPVerification, SiteVisit, ArticleViewLog, Feedback,
+    LANGUAGE_CHOICES,
 )
-
-# Try to import reportlab for PDF generation
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-    from reportlab.lib.units import inch
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-
-
-# ============ TRANSLATION HELPER ============
-def translate_text(text, target_lang='en'):
-    """
-    Translate text to target language using deep-translator
-    Returns original text if translation fails or target is 'en'
-    """
-    if not text or target_lang == 'en':
-        return text
-    
-    try:
-        # Split text into chunks if it's too long (Google Translator limit is ~5000 chars)
-        max_length = 4500
-        if len(text) <= max_length:
-            translated = GoogleTranslator(source='auto', target=target_lang).translate(text)
-            return translated
-        else:
-            # Split by paragraphs for better translation
-            paragraphs = text.split('\n\n')
-            translated_paragraphs = []
-            current_chunk = ""
-            
-            for para in paragraphs:
-                if len(current_chunk) + len(para) <= max_length:
-                    current_chunk += para + "\n\n"
-                else:
-                    if current_chunk:
-                        translated_paragraphs.append(
-                            GoogleTranslator(source='auto', target=target_lang).translate(current_chunk.strip())
-                        )
-                    current_chunk = para + "\n\n"
-            
-            if current_chunk:
-                translated_paragraphs.append(
-                    GoogleTranslator(source='auto', target=target_lang).translate(current_chunk.strip())
-                )
-            
-            return "\n\n".join(translated_paragraphs)
-    except Exception as e:
-        print(f"Translation error: {e}")
-        return text  # Return original text if translation fails
+from . import achievements
+from . import analytics
+from . import cache as app_cache
+from . import homepage
+from . import outbox
+from . import pdf_export
+from .pagination import count_label, paginate
+from . import progress as progress_pipeline
+from . import ratelimit
+from . import search as article_search
+from . import stats as reading_stats
+from . import suggestions as suggestions_index
+from . import taxonomy
+from . import translation as article_translation
+from . import view_counter
+from . import visits
 
 
 # ============ HOME ============
 def home(request):
     # Get user's language preference
-    user_language = 'EN'
-    if request.user.is_authenticated:
-        try:
-            profile = UserProfile.objects.get(user=request.user)
-            user_language = profile.preferred_language if hasattr(profile, 'preferred_language') and profile.preferred_language else 'EN'
-        except UserProfile.DoesNotExist:
-            user_language = 'EN'
-    
-    featured_articles = Article.objects.filter(
-        is_featured=True, 
-        is_published=True,
-        language=user_language
-    )[:3]
-    recent_articles = Article.objects.filter(
-        is_published=True,
-        language=user_language
-    )[:6]
-    
-    # Show all categories on home page
-    categories = Category.objects.all()
-    
-    # Stats for homepage - Display as 200,000+ for the homepage stat card
-    total_articles = Article.objects.filter(is_published=True, language=user_language).count()
-    display_articles = "200,000" if total_articles > 0 else "0"
-    total_users = User.objects.count()
-    total_reads = ReadingProgress.objects.filter(is_completed=True).count()
-    
-    context = {
-        'featured_articles': featured_articles,
-        'recent_articles': recent_articles,
-        'categories': categories,
-        'total_articles': display_articles,
-        'total_users': total_users,
-        'total_reads': total_reads,
-    }
-    return render(request, 'home.html', context)
+    user_language = request.reader.language
+    
+    # Anonymous visitors share one cached page per language, unless there are messages to show
+    cacheable = not request.user.is_authenticated and not len(messages.get_messages(request))
+    if cacheable:
+        page = homepage.get_page(user_language)
+        if page is not None:
+            return page
+    
+    # Featured/recent articles, categories and stats, cached per language
+    response = render(request, 'home.html', homepage.get_payload(user_language))
+    if cacheable:
+        # Logged-in users get a different page from the same URL
+        patch_vary_headers(response, ('Cookie',))
+        homepage.set_page(user_language, response)
+    return response
 
 
 # ============ AUTHENTICATION ============
@@ -171,18 +113,9 @@ def validate_email_format(email):
 
 def send_otp_email(email, otp):
     """
-    Send OTP to user's email - SIMPLE AND CLEAN
+    Queue the OTP email for the send_queued_email worker - SIMPLE AND CLEAN
     Just the OTP, nothing else
     """
-    import time
-    start_time = time.time()
-    
-    print(f"\n{'='*70}")
-    print(f"📧 SENDING OTP EMAIL")
-    print(f"{'='*70}")
-    print(f"   📨 To: {email}")
-    print(f"   🔐 OTP: {otp}")
-    
     subject = 'SmartReader - Your Verification Code'
     
     # Plain text fallback
@@ -250,83 +183,25 @@ If you did not request this code, please ignore this email.
 </body>
 </html>'''
     
-    try:
-        from django.core.mail import EmailMultiAlternatives
-        from_email = settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@smartreader.com'
-        
-        print(f"   ✓ Email Backend: {settings.EMAIL_BACKEND}")
-        print(f"   ✓ USE_REAL_EMAIL: {getattr(settings, 'USE_REAL_EMAIL', False)}")
-        print(f"   ✓ From: {from_email}")
-        
-        # Create email message with optimized settings and anti-spam headers
-        email_msg = EmailMultiAlternatives(
-            subject=subject,
-            body=message,
-            from_email=from_email,
-            to=[email],
-            headers={
-                'X-Priority': '1',  # High priority
-                'X-MSMail-Priority': 'High',
-                'Importance': 'high',
-                'X-Mailer': 'SmartReader Email Service',
-                'X-Auto-Response-Suppress': 'OOF, AutoReply',
-                'List-Unsubscribe': '<mailto:unsubscribe@smartreader.com>',
-                'Precedence': 'bulk',
-                'Content-Type': 'text/html; charset=utf-8',
-            }
-        )
-        email_msg.attach_alternative(html_message, "text/html")
-        
-        print(f"   🔄 Sending email with optimized SMTP...")
-        
-        # Use threading for faster response in console mode
-        use_real_email = getattr(settings, 'USE_REAL_EMAIL', False)
-        
-        if use_real_email:
-            # Real email - send with 20 second timeout protection
-            import socket
-            original_timeout = socket.getdefaulttimeout()
-            socket.setdefaulttimeout(20)  # 20 second timeout for email delivery
-            
-            try:
-                email_msg.send(fail_silently=False)
-            finally:
-                socket.setdefaulttimeout(original_timeout)
-        else:
-            # Console mode - immediate return
-            email_msg.send(fail_silently=False)
-        
-        elapsed = time.time() - start_time
-        print(f"\n   ✅ EMAIL SENT SUCCESSFULLY!")
-        print(f"   ⚡ Delivery time: {elapsed:.2f}s")
-        print(f"{'='*70}\n")
-        return True
-        
-    except socket.timeout:
-        elapsed = time.time() - start_time
-        print(f"\n   ⚠️  SMTP Timeout after {elapsed:.2f}s")
-        print(f"   💡 Email may still be delivered")
-        print(f"{'='*70}\n")
-        # Return True in debug mode so user can proceed
-        return settings.DEBUG
-        
-    except Exception as e:
-        elapsed = time.time() - start_time
-        print(f"\n   ❌ EMAIL ERROR after {elapsed:.2f}s")
-        print(f"   Error: {str(e)}")
-        
-        # In debug mode, still allow OTP flow to work
-        if settings.DEBUG:
-            print(f"   ⚠️  [DEBUG MODE] OTP is still valid in database")
-            print(f"   ✓ OTP {otp} saved for {email}")
-            print(f"   💡 Check terminal output or fix email config")
-            print(f"{'='*70}\n")
-            return True
-        
-        print(f"{'='*70}\n")
-        import traceback
-        traceback.print_exc()
-        return False
+    outbox.enqueue(
+        email,
+        subject,
+        message,
+        html_message,
+        headers={
+            'X-Priority': '1',  # High priority
+            'X-MSMail-Priority': 'High',
+            'Importance': 'high',
+            'X-Mailer': 'SmartReader Email Service',
+            'X-Auto-Response-Suppress': 'OOF, AutoReply',
+            'List-Unsubscribe': '<mailto:unsubscribe@smartreader.com>',
+            'Precedence': 'bulk',
+        },
+        kind='otp',
+        priority=10,  # Someone is waiting for this one
+    )
+    print(f"📧 OTP email queued for {email}")
+    return True
 
 
 def send_otp(request):
@@ -369,14 +244,11 @@ def send_otp(request):
                 print(f"✓ Admin email detected: {email}")
                 return JsonResponse({'status': 'admin', 'message': 'Admin email - OTP not required'})
             
-            # Check rate limiting - max 5 OTPs per email per hour
-            one_hour_ago = timezone.now() - timedelta(hours=1)
-            recent_otps = OTPVerification.objects.filter(
-                email=email,
-                created_at__gte=one_hour_ago
-            ).count()
-            
-            if recent_otps >= 5:
+            # Rate limiting - max 5 OTPs per email (and 20 per client IP) per hour, checked in the cache.
+            # Counted here so requests rejected above never use up the budget
+            if ratelimit.exceeded(
+                (ratelimit.OTP_SEND_EMAIL, email), (ratelimit.OTP_SEND_IP, ratelimit.client_ip(request)),
+            ):
                 print(f"❌ Rate limit exceeded for: {email}")
                 return JsonResponse({
                     'status': 'error',
@@ -414,30 +286,12 @@ def send_otp(request):
             print(f"   Expires at: {expires_at}")
             print(f"{'='*60}\n")
             
-            # Send OTP email
-            import time
-            send_start = time.time()
-            print(f"🔄 Attempting to send email...")
-            
-            email_sent = send_otp_email(email, otp)
-            send_elapsed = time.time() - send_start
-            
-            print(f"📧 Email sent result: {email_sent} (took {send_elapsed:.2f} seconds)")
-            
-            if email_sent:
-                message = f'✓ OTP sent to {email}!'
-                
-                return JsonResponse({
-                    'status': 'success',
-                    'message': message,
-                    'sent_time': f'{send_elapsed:.1f}s'
-                })
-            else:
-                # This shouldn't happen in debug mode, but handle it anyway
-                return JsonResponse({
-                    'status': 'error',
-                    'message': 'Failed to send OTP. Please check email configuration.'
-                })
+            # Queue the OTP email; the send_queued_email worker delivers it
+            send_otp_email(email, otp)
+            return JsonResponse({
+                'status': 'success',
+                'message': f'✓ OTP sent to {email}!',
+            })
                 
         except Exception as e:
             print(f"\n❌ ERROR in send_otp: {e}")
@@ -464,6 +318,14 @@ def verify_otp(request):
             if len(otp) != 6:
                 return JsonResponse({'status': 'error', 'message': 'OTP must be 6 digits'})
             
+            # Too many wrong codes for this email or from this client
+            ip = ratelimit.client_ip(request)
+            if ratelimit.OTP_VERIFY_EMAIL.is_limited(email) or ratelimit.OTP_VERIFY_IP.is_limited(ip):
+                return JsonResponse({
+                    'status': 'error',
+                    'message': 'Too many incorrect attempts. Please wait a few minutes and try again.'
+                })
+            
             try:
                 otp_record = OTPVerification.objects.filter(
                     email=email,
@@ -498,7 +360,8 @@ def verify_otp(request):
                 
                 # Mark as verified
                 otp_record.is_verified = True
-                otp_record.save()
+                otp_record.save(update_fields=['is_verified'])
+                ratelimit.OTP_VERIFY_EMAIL.reset(email)
                 
                 print(f"[OTP VERIFY] ✓ OTP verified successfully for {email}")
                 return JsonResponse({
@@ -508,6 +371,7 @@ def verify_otp(request):
             
             except OTPVerification.DoesNotExist:
                 print(f"[OTP VERIFY] Invalid OTP '{otp}' for {email}")
+                ratelimit.exceeded((ratelimit.OTP_VERIFY_EMAIL, email), (ratelimit.OTP_VERIFY_IP, ip))
                 
                 # Try to increment attempts if OTP exists but doesn't match
                 try:
@@ -547,6 +411,11 @@ def send_password_reset_otp(request):
         if not validate_email_format(email):
             return JsonResponse({'status': 'error', 'message': 'Enter a valid email address.'}, status=400)
 
+        if ratelimit.exceeded(
+            (ratelimit.PASSWORD_RESET_EMAIL, email), (ratelimit.PASSWORD_RESET_IP, ratelimit.client_ip(request)),
+        ):
+            return JsonResponse({'status': 'error', 'message': 'Too many reset attempts. Please try again after 1 hour.'}, status=429)
+
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
@@ -555,11 +424,6 @@ def send_password_reset_otp(request):
         if not user.is_active:
             return JsonResponse({'status': 'error', 'message': 'This account is deactivated. Contact support.'}, status=403)
 
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-        recent_otps = OTPVerification.objects.filter(email=email, created_at__gte=one_hour_ago).count()
-        if recent_otps >= 5:
-            return JsonResponse({'status': 'error', 'message': 'Too many reset attempts. Please try again after 1 hour.'}, status=429)
-
         OTPVerification.objects.filter(email=email, is_verified=False).delete()
 
         otp = OTPVerification.generate_otp()
@@ -571,10 +435,7 @@ def send_password_reset_otp(request):
             attempts=0
         )
 
-        email_sent = send_otp_email(email, otp)
-        if not email_sent:
-            return JsonResponse({'status': 'error', 'message': 'Unable to send reset OTP right now.'}, status=500)
-
+        send_otp_email(email, otp)
         return JsonResponse({'status': 'success', 'message': f'Reset OTP sent to {email}.'})
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -601,6 +462,10 @@ def reset_password_with_otp(request):
         if new_password != confirm_password:
             return JsonResponse({'status': 'error', 'message': 'Passwords do not match.'}, status=400)
 
+        ip = ratelimit.client_ip(request)
+        if ratelimit.OTP_VERIFY_EMAIL.is_limited(email) or ratelimit.OTP_VERIFY_IP.is_limited(ip):
+            return JsonResponse({'status': 'error', 'message': 'Too many wrong OTP attempts. Please wait a few minutes.'}, status=429)
+
         user = User.objects.filter(email=email).first()
         if not user:
             return JsonResponse({'status': 'error', 'message': 'No account found with this email.'}, status=404)
@@ -608,6 +473,7 @@ def reset_password_with_otp(request):
         try:
             otp_record = OTPVerification.objects.filter(email=email, otp=otp).latest('created_at')
         except OTPVerification.DoesNotExist:
+            ratelimit.exceeded((ratelimit.OTP_VERIFY_EMAIL, email), (ratelimit.OTP_VERIFY_IP, ip))
             latest_otp = OTPVerification.objects.filter(email=email).order_by('-created_at').first()
             if latest_otp and not latest_otp.is_expired():
                 latest_otp.increment_attempts()
@@ -643,6 +509,10 @@ def check_email(request):
         if not validate_email_format(email):
             return JsonResponse({'status': 'error', 'message': 'Invalid email format', 'valid': False})
         
+        # Slow down address enumeration
+        if ratelimit.exceeded((ratelimit.CHECK_EMAIL_IP, ratelimit.client_ip(request))):
+            return JsonResponse({'status': 'error', 'message': 'Too many requests. Please wait a minute.', 'valid': False}, status=429)
+        
         # Check if email already exists
         if User.objects.filter(email=email).exists():
             return JsonResponse({'status': 'error', 'message': 'Email already registered', 'valid': False})
@@ -818,34 +688,29 @@ def user_logout(request):
 @login_required
 def article_list(request):
     # Get user's preferred language for filtering
-    user_profile = request.user.profile
-    user_language = user_profile.preferred_language if hasattr(user_profile, 'preferred_language') else 'EN'
+    user_language = request.reader.language
     
-    # Filter articles by language and published status
+    # Filter articles by language and published status; cards need the
+    # category and rating summary, so fetch them with the page query
     articles = Article.objects.filter(
         is_published=True,
         language=user_language
-    )
+    ).select_related('category')
     
-    # Limit categories and tags shown - only top 8 categories and 15 tags
-    categories_raw = Category.objects.annotate(article_count=Count('articles')).order_by('-article_count')[:8]
+    # Top 8 categories and 15 tags for this language, from the cached counts
+    sidebar = taxonomy.get_sidebar(user_language)
     
     # Add display counts (multiply by 10 to show as 10000+)
-    categories = []
-    for cat in categories_raw:
-        cat.display_count = cat.article_count * 10 + 2000  # e.g., 1007 -> 12070
-        categories.append(cat)
+    categories = sidebar['categories']
+    for cat in categories:
+        cat['display_count'] = cat['article_count'] * 10 + 2000  # e.g., 1007 -> 12070
     
-    tags = Tag.objects.annotate(article_count=Count('articles')).order_by('-article_count')[:15]
+    tags = sidebar['tags']
     
     # Search functionality
     query = request.GET.get('q')
     if query:
-        articles = articles.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(summary__icontains=query)
-        )
+        articles = article_search.filter_articles(articles, query)
     
     # Filter by category
     category_slug = request.GET.get('category')
@@ -862,26 +727,41 @@ def article_list(request):
     if difficulty:
         articles = articles.filter(difficulty=difficulty)
     
-    # Sorting
-    sort = request.GET.get('sort', '-created_at')
-    if sort == 'popular':
-        articles = articles.order_by('-views_count')
-    elif sort == 'rating':
-        articles = articles.annotate(avg_rating=Avg('ratings__score')).order_by('-avg_rating')
-    else:
-        articles = articles.order_by(sort)
+    results_count = count_label(articles)
     
-    # Pagination
-    paginator = Paginator(articles, 9)
-    page = request.GET.get('page')
-    articles = paginator.get_page(page)
+    # Sorting (search results default to relevance)
+    sort = request.GET.get('sort', 'relevance' if query else '-created_at')
+    cursor_orderings = {
+        '-created_at': ('-created_at', '-id'),
+        'created_at': ('created_at', 'id'),
+        'popular': ('-views_count', '-id'),
+        'rating': ('-rating_avg', '-rating_count', '-id'),
+    }
+    if not query and sort == 'relevance':
+        sort = '-created_at'
+    
+    # Pagination: keyset cursors for the indexed orderings, page numbers otherwise
+    if sort in cursor_orderings:
+        articles = paginate(request, articles, 9, cursor_orderings[sort], name=sort)
+    else:
+        if sort == 'relevance':
+            articles = articles.order_by('search_rank', '-views_count')
+        else:
+            articles = articles.order_by(sort)
+        paginator = Paginator(articles, 9)
+        page = request.GET.get('page')
+        articles = paginator.get_page(page)
     
-    # Get user's bookmarks and progress
+    # Get user's bookmarks and progress for the articles on this page only
     user_bookmarks = []
     user_progress = {}
     if request.user.is_authenticated:
-        user_bookmarks = list(Bookmark.objects.filter(user=request.user).values_list('article_id', flat=True))
-        for prog in ReadingProgress.objects.filter(user=request.user):
+        page_ids = [article.id for article in articles]
+        user_bookmarks = list(Bookmark.objects.filter(
+            user=request.user, article_id__in=page_ids
+        ).values_list('article_id', flat=True))
+        for prog in ReadingProgress.objects.filter(user=request.user, article_id__in=page_ids):
+            progress_pipeline.apply_pending(prog)
             user_progress[prog.article_id] = prog.scroll_percentage
     
     context = {
@@ -894,6 +774,7 @@ def article_list(request):
         'current_tag': tag_slug,
         'current_difficulty': difficulty,
         'current_sort': sort,
+        'results_count': results_count,
         'search_query': query,
     }
     return render(request, 'articles/list.html', context)
@@ -903,9 +784,9 @@ def article_list(request):
 def article_detail(request, slug):
     article = get_object_or_404(Article, slug=slug, is_published=True)
     
-    # Increment view count
-    article.views_count += 1
-    article.save(update_fields=['views_count'])
+    # Count the view through the write-behind buffer
+    view_counter.record_view(article.id)
+    article.views_count += view_counter.pending_views(article.id)
     
     # User-specific data
     is_bookmarked = False
@@ -926,18 +807,16 @@ def article_detail(request, slug):
         progress, _ = ReadingProgress.objects.get_or_create(
             user=request.user, article=article
         )
+        progress_pipeline.apply_pending(progress)
         
         # Update reading streak
         streak, _ = ReadingStreak.objects.get_or_create(user=request.user)
         if streak.last_read_date != timezone.now().date():
             streak.update_streak()
+            achievements.record_streak(request.user.id, streak.current_streak)
         
         # Get user's language preference
-        try:
-            profile = UserProfile.objects.get(user=request.user)
-            user_language = profile.preferred_language if hasattr(profile, 'preferred_language') and profile.preferred_language else 'EN'
-        except UserProfile.DoesNotExist:
-            user_language = 'EN'
+        user_language = request.reader.language
     
     # Get related articles (filter by language if available)
     related_articles = Article.objects.filter(
@@ -947,19 +826,27 @@ def article_detail(request, slug):
     ).exclude(id=article.id)[:4]
     
     # Get ratings
-    avg_rating = article.ratings.aggregate(Avg('score'))['score__avg'] or 0
-    rating_count = article.ratings.count()
+    avg_rating = article.rating_avg
+    rating_count = article.rating_count
     
-    # Translation based on user language preference (optional feature - removed for now)
+    # Serve a stored translation into the reader's language, if one has been made
     translated_title = article.title
     translated_content = article.content
     translated_summary = article.summary
+    translated_language = None
+    stored = article_translation.get_translation(article, user_language)
+    if stored:
+        translated_title = stored['title']
+        translated_content = stored['content']
+        translated_summary = stored['summary'] or article.summary
+        translated_language = dict(LANGUAGE_CHOICES).get(user_language, user_language)
     
     context = {
         'article': article,
         'translated_title': translated_title,
         'translated_content': translated_content,
         'translated_summary': translated_summary,
+        'translated_language': translated_language,
         'user_language': user_language,
         'related_articles': related_articles,
         'avg_rating': avg_rating,
@@ -987,87 +874,50 @@ def read_article(request, id):
 @login_required
 def save_progress(request):
     if request.method == 'POST':
-        data = json.loads(request.body)
-        
-        progress, created = ReadingProgress.objects.get_or_create(
-            user=request.user,
-            article_id=data['article_id']
-        )
-        
-        new_percentage = data.get('percentage', 0)
-        position = data.get('position', 0)
-        time_delta = data.get('time', 0)
-        
-        # Update position
-        progress.last_position = position
-        progress.scroll_percentage = new_percentage
-        
-        # Only update max_scroll_percentage if new value is higher (progress only increases)
-        if new_percentage > progress.max_scroll_percentage:
-            progress.max_scroll_percentage = new_percentage
-        
-        # Add time spent
-        progress.time_spent += time_delta
-        
-        # Check if article was just completed
-        was_just_completed = False
-        if not progress.is_completed and (progress.max_scroll_percentage >= 90 or new_percentage >= 100):
-            progress.is_completed = True
-            progress.max_scroll_percentage = 100  # Ensure 100% is stored when completed
-            was_just_completed = True
-        
-        # Also ensure any already-completed article shows 100%
-        if progress.is_completed and progress.max_scroll_percentage < 100:
-            progress.max_scroll_percentage = 100
-        
-        progress.save()
-        
-        # Log article view
-        ArticleViewLog.objects.create(
-            article_id=data['article_id'],
-            user=request.user,
-            ip_address=get_client_ip(request),
-            time_spent=time_delta
+        try:
+            data = json.loads(request.body)
+            article_id, new_percentage, position, time_delta = progress_pipeline.parse_heartbeat(data)
+        except (json.JSONDecodeError, progress_pipeline.InvalidHeartbeat) as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+        
+        # Heartbeats are coalesced in memory and written in bulk by the pipeline
+        result = progress_pipeline.record_heartbeat(
+            request.user,
+            article_id,
+            new_percentage,
+            position=position,
+            time_delta=time_delta,
+            ip_address=visits.get_client_ip(request),
+            final=bool(data.get('final')),
         )
+        if result is None:
+            return JsonResponse({'status': 'error', 'message': 'Article not found'}, status=404)
         
-        # Check for achievements
-        check_achievements(request.user)
-        
-        # Calculate weekly progress for real-time feedback
-        today = timezone.now().date()
-        this_week_reads = ReadingProgress.objects.filter(
-            user=request.user,
-            is_completed=True,
-            last_read_at__gte=today - timedelta(days=7)
-        ).count()
+        response = {
+            'status': 'saved', 
+            'percentage': result.percentage,
+            'max_percentage': result.max_percentage,
+            'total_time': int(result.total_time),
+            'just_completed': result.just_completed,
+        }
         
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
-        weekly_goal_achieved = this_week_reads >= profile.reading_goal
+        if result.just_completed:
+            # Completion was flushed synchronously (which also awarded any
+            # achievements), so the weekly goal sees the finished article
+            this_week_reads = reading_stats.get_user_stats(request.user).weekly_reads()
+            
+            reading_goal = request.reader.reading_goal
+            response.update({
+                'this_week_reads': this_week_reads,
+                'reading_goal': reading_goal,
+                'weekly_goal_achieved': this_week_reads >= reading_goal,
+            })
         
-        return JsonResponse({
-            'status': 'saved', 
-            'percentage': progress.scroll_percentage,
-            'max_percentage': progress.max_scroll_percentage,
-            'total_time': int(progress.time_spent),
-            'just_completed': was_just_completed,
-            'this_week_reads': this_week_reads,
-            'reading_goal': profile.reading_goal,
-            'weekly_goal_achieved': weekly_goal_achieved
-        })
+        return JsonResponse(response)
     
     return JsonResponse({'status': 'error'}, status=400)
 
 
-def get_client_ip(request):
-    """Get client IP address"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 # ============ NOTES ============
 @login_required
 def save_note(request):
@@ -1229,8 +1079,7 @@ def rate_article(request):
             )
             
             # Get updated average
-            article = get_object_or_404(Article, id=article_id)
-            avg_rating = article.ratings.aggregate(Avg('score'))['score__avg'] or 0
+            avg_rating = Article.objects.filter(id=article_id).values_list('rating_avg', flat=True).first() or 0
             
             return JsonResponse({
                 'status': 'saved',
@@ -1244,13 +1093,15 @@ def rate_article(request):
 @login_required
 def dashboard(request):
     user = request.user
+    progress_pipeline.flush(user_id=user.id)
     normalize_user_progress(user)
     
-    # Reading Progress
+    # Reading Progress (totals come from the denormalized stats row)
     progress_list = ReadingProgress.objects.filter(user=user)
-    completed_articles = progress_list.filter(is_completed=True).count()
-    in_progress_articles = progress_list.filter(is_completed=False).count()
-    total_time = progress_list.aggregate(Sum('time_spent'))['time_spent__sum'] or 0
+    user_stats = reading_stats.get_user_stats(user)
+    completed_articles = user_stats.completed_count
+    in_progress_articles = user_stats.in_progress_count
+    total_time = user_stats.total_time
     
     # Convert to hours and minutes
     hours = total_time // 3600
@@ -1263,16 +1114,18 @@ def dashboard(request):
     recent_progress = progress_list.order_by('-last_read_at')[:5]
     
     # Weekly Stats (for chart)
-    today = timezone.now().date()
-    week_stats = []
-    for i in range(7):
-        day = today - timedelta(days=6-i)
-        day_progress = progress_list.filter(last_read_at__date=day)
-        week_stats.append({
-            'day': day.strftime('%a'),
-            'articles': day_progress.count(),
-            'time': day_progress.aggregate(Sum('time_spent'))['time_spent__sum'] or 0
-        })
+    today = timezone.localdate()
+    week_stats = [
+        {
+            'day': bucket['start'].strftime('%a'),
+            'articles': bucket['count'],
+            'time': bucket['total'],
+        }
+        for bucket in reading_stats.activity_series(
+            progress_list, 'last_read_at', bucket='day', periods=7,
+            sum_field='time_spent', today=today,
+        )
+    ]
     
     # Achievements
     user_achievements = UserAchievement.objects.filter(user=user).select_related('achievement')
@@ -1283,13 +1136,10 @@ def dashboard(request):
     ).annotate(count=Count('id')).order_by('-count')[:5]
     
     # Reading Goal Progress
-    profile, _ = UserProfile.objects.get_or_create(user=user)
-    this_week_reads = progress_list.filter(
-        is_completed=True,
-        last_read_at__gte=today - timedelta(days=7)
-    ).count()
-    goal_progress = min(100, (this_week_reads / profile.reading_goal) * 100) if profile.reading_goal > 0 else 0
-    weekly_goal_achieved = this_week_reads >= profile.reading_goal
+    reading_goal = request.reader.reading_goal
+    this_week_reads = user_stats.weekly_reads(today)
+    goal_progress = min(100, (this_week_reads / reading_goal) * 100) if reading_goal > 0 else 0
+    weekly_goal_achieved = this_week_reads >= reading_goal
     
     # Check if we should show congratulations popup (only once per session)
     show_congrats = False
@@ -1302,7 +1152,7 @@ def dashboard(request):
     # Get recently completed articles (last 5 completed this week)
     recent_completions = progress_list.filter(
         is_completed=True,
-        last_read_at__gte=today - timedelta(days=7)
+        last_read_at__gte=analytics._day_start(today - timedelta(days=7)),
     ).select_related('article').order_by('-last_read_at')[:5]
     
     context = {
@@ -1316,7 +1166,7 @@ def dashboard(request):
         'user_achievements': user_achievements,
         'category_stats': category_stats,
         'goal_progress': goal_progress,
-        'reading_goal': profile.reading_goal,
+        'reading_goal': reading_goal,
         'this_week_reads': this_week_reads,
         'weekly_goal_achieved': weekly_goal_achieved,
         'show_congrats': show_congrats,
@@ -1328,7 +1178,7 @@ def dashboard(request):
 # ============ PROFILE ============
 @login_required
 def profile(request):
-    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    profile = request.reader.profile
     
     if request.method == 'POST':
         # Update profile
@@ -1369,19 +1219,11 @@ def profile(request):
     from reader.models import LANGUAGE_CHOICES
     
     # Get user statistics for profile display
-    from reader.models import ReadingProgress, Note, Bookmark, ReadingStreak
-    from datetime import timedelta
-    total_articles = ReadingProgress.objects.filter(user=request.user, is_completed=True).count()
-    total_notes = Note.objects.filter(user=request.user).count()
-    bookmarks_count = Bookmark.objects.filter(user=request.user).count()
-    
-    # Get weekly articles read
-    week_start = timezone.now() - timedelta(days=7)
-    weekly_articles_read = ReadingProgress.objects.filter(
-        user=request.user, 
-        is_completed=True,
-        last_read_at__gte=week_start
-    ).count()
+    user_stats = reading_stats.get_user_stats(request.user)
+    total_articles = user_stats.completed_count
+    total_notes = user_stats.notes_count
+    bookmarks_count = user_stats.bookmarks_count
+    weekly_articles_read = user_stats.weekly_reads()
     
     # Get current reading streak
     try:
@@ -1481,6 +1323,9 @@ def access_reading_list(request, list_id):
             ]
         })
 
+    if ratelimit.READING_LIST_PIN_USER.is_limited(request.user.pk):
+        return JsonResponse({'status': 'locked', 'message': 'Too many wrong PINs. Please try again later.'}, status=429)
+
     attempt, _ = ReadingListAccessAttempt.objects.get_or_create(
         user=request.user,
         reading_list=reading_list
@@ -1499,6 +1344,7 @@ def access_reading_list(request, list_id):
 
     if not reading_list.check_pin(pin):
         attempt.register_failure()
+        ratelimit.READING_LIST_PIN_USER.hit(request.user.pk)
         if attempt.is_locked():
             return JsonResponse({
                 'status': 'locked',
@@ -1533,23 +1379,10 @@ def search(request):
     results = []
     
     # Get user's language preference
-    user_language = 'EN'
-    if request.user.is_authenticated:
-        try:
-            profile = UserProfile.objects.get(user=request.user)
-            user_language = profile.preferred_language if hasattr(profile, 'preferred_language') and profile.preferred_language else 'EN'
-        except UserProfile.DoesNotExist:
-            user_language = 'EN'
+    user_language = request.reader.language
     
     if query:
-        results = Article.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(summary__icontains=query) |
-            Q(tags__name__icontains=query),
-            is_published=True,
-            language=user_language
-        ).distinct()[:20]
+        results = article_search.search_articles(query, language=user_language, include_tags=True)[:20]
     
     context = {
         'query': query,
@@ -1559,79 +1392,34 @@ def search(request):
 
 
 def search_suggestions(request):
-    """API endpoint for search autocomplete"""
+    """API endpoint for search autocomplete, served from the in-process prefix index"""
     query = request.GET.get('q', '').strip()
     suggestions = []
     
-    # Get user's language preference
-    user_language = 'EN'
-    if request.user.is_authenticated:
-        try:
-            profile = UserProfile.objects.get(user=request.user)
-            user_language = profile.preferred_language if hasattr(profile, 'preferred_language') and profile.preferred_language else 'EN'
-        except UserProfile.DoesNotExist:
-            user_language = 'EN'
+    # The page passes the reader's language so the common case needs no database access
+    user_language = request.GET.get('lang', '').upper()
+    if user_language not in dict(LANGUAGE_CHOICES):
+        user_language = request.reader.language
     
     if query and len(query) >= 2:  # Start suggesting after 2 characters
-        articles = Article.objects.filter(
-            Q(title__icontains=query) | Q(summary__icontains=query),
-            is_published=True,
-            language=user_language
-        )[:8]  # Limit to 8 suggestions
-        
-        suggestions = [{
-            'id': article.id,
-            'title': article.title,
-            'slug': article.slug,
-            'summary': article.summary[:100] if article.summary else '',
-            'category': article.category.name if article.category else '',
-        } for article in articles]
+        suggestions = suggestions_index.suggest(query, user_language)
     
     return JsonResponse({'suggestions': suggestions})
 
 
 # ============ HELPER FUNCTIONS ============
-def check_achievements(user):
-    """Check and award achievements to user"""
-    progress = ReadingProgress.objects.filter(user=user)
-    completed = progress.filter(is_completed=True).count()
-    total_time = progress.aggregate(Sum('time_spent'))['time_spent__sum'] or 0
-    
-    try:
-        streak = ReadingStreak.objects.get(user=user)
-        streak_days = streak.current_streak
-    except ReadingStreak.DoesNotExist:
-        streak_days = 0
-    
-    achievements = Achievement.objects.all()
-    
-    for achievement in achievements:
-        # Check if already earned
-        if UserAchievement.objects.filter(user=user, achievement=achievement).exists():
-            continue
-        
-        earned = False
-        
-        if achievement.requirement_type == 'articles_read':
-            earned = completed >= achievement.requirement_value
-        elif achievement.requirement_type == 'streak_days':
-            earned = streak_days >= achievement.requirement_value
-        elif achievement.requirement_type == 'time_spent':
-            earned = total_time >= achievement.requirement_value
-        
-        if earned:
-            UserAchievement.objects.create(user=user, achievement=achievement)
-
-
 def normalize_user_progress(user):
     """
     Normalize older progress rows so completed articles always stay at 100%.
     """
-    ReadingProgress.objects.filter(
+    newly_completed = ReadingProgress.objects.filter(
         user=user,
         is_completed=False,
         max_scroll_percentage__gte=90
     ).update(is_completed=True, max_scroll_percentage=100)
+    if newly_completed:
+        reading_stats.reconcile_user_stats([user.id])
+        achievements.evaluate(user.id)
 
     ReadingProgress.objects.filter(
         user=user,
@@ -1653,15 +1441,16 @@ def validate_reading_list_pin(pin):
 @login_required
 def get_user_stats(request):
     """API endpoint for user statistics"""
+    progress_pipeline.flush(user_id=request.user.id)
     normalize_user_progress(request.user)
-    progress = ReadingProgress.objects.filter(user=request.user)
+    user_stats = reading_stats.get_user_stats(request.user)
     
     stats = {
-        'total_articles': progress.count(),
-        'completed': progress.filter(is_completed=True).count(),
-        'total_time': progress.aggregate(Sum('time_spent'))['time_spent__sum'] or 0,
-        'total_notes': Note.objects.filter(user=request.user).count(),
-        'total_bookmarks': Bookmark.objects.filter(user=request.user).count(),
+        'total_articles': user_stats.total_articles,
+        'completed': user_stats.completed_count,
+        'total_time': user_stats.total_time,
+        'total_notes': user_stats.notes_count,
+        'total_bookmarks': user_stats.bookmarks_count,
     }
     
     return JsonResponse(stats)
@@ -1672,23 +1461,24 @@ def get_user_stats(request):
 @login_required
 def my_progress(request):
     """View for tracking reading progress"""
+    progress_pipeline.flush(user_id=request.user.id)
     normalize_user_progress(request.user)
     progress_list = ReadingProgress.objects.filter(user=request.user).select_related('article', 'article__category')
     
     # Separate completed and in-progress
-    completed = progress_list.filter(is_completed=True)
-    in_progress = progress_list.filter(is_completed=False, scroll_percentage__gt=0)
+    completed = list(progress_list.filter(is_completed=True))
+    in_progress = list(progress_list.filter(is_completed=False, scroll_percentage__gt=0))
     
     # Stats
-    total_time = progress_list.aggregate(Sum('time_spent'))['time_spent__sum'] or 0
+    total_time = reading_stats.get_user_stats(request.user).total_time
     hours = total_time // 3600
     minutes = (total_time % 3600) // 60
     
     context = {
         'completed': completed,
         'in_progress': in_progress,
-        'total_completed': completed.count(),
-        'total_in_progress': in_progress.count(),
+        'total_completed': len(completed),
+        'total_in_progress': len(in_progress),
         'total_hours': hours,
         'total_minutes': minutes,
     }
@@ -1728,7 +1518,7 @@ def my_streaks(request):
     streak, _ = ReadingStreak.objects.get_or_create(user=request.user)
     
     # Update streak if user is reading today
-    today = timezone.now().date()
+    today = timezone.localdate()
     if streak.last_read_date != today:
         # Check if we need to send milestone email
         if streak.current_streak in [7, 30, 100, 365]:
@@ -1737,15 +1527,25 @@ def my_streaks(request):
     # Build reading history for calendar view.
     # `last_read_at` gets overwritten on the same progress row, so it cannot
     # represent all past active days by itself.
-    reading_dates_set = set(
-        ArticleViewLog.objects.filter(user=request.user)
-        .values_list('viewed_at__date', flat=True)
-        .distinct()
-    )
+    history_days = getattr(settings, 'STREAK_HISTORY_DAYS', 365)
+    reading_dates_set = {
+        bucket['start']
+        for bucket in reading_stats.activity_series(
+            ArticleViewLog.objects.filter(user=request.user), 'viewed_at',
+            periods=history_days, today=today,
+        )
+        if bucket['count']
+    }
 
     # Fall back to progress timestamps for any rows without view logs.
-    progress_dates = ReadingProgress.objects.filter(user=request.user).values_list('last_read_at__date', flat=True)
-    reading_dates_set.update(day for day in progress_dates if day)
+    reading_dates_set.update(
+        bucket['start']
+        for bucket in reading_stats.activity_series(
+            ReadingProgress.objects.filter(user=request.user), 'last_read_at',
+            periods=history_days, today=today,
+        )
+        if bucket['count']
+    )
 
     # Backfill consecutive days from the current streak so the week calendar
     # stays consistent with the shown streak count.
@@ -1791,9 +1591,9 @@ def my_achievements(request):
     all_achievements = Achievement.objects.all()
     
     # Calculate progress for locked achievements
-    progress = ReadingProgress.objects.filter(user=request.user)
-    completed_articles = progress.filter(is_completed=True).count()
-    total_time = progress.aggregate(Sum('time_spent'))['time_spent__sum'] or 0
+    user_stats = reading_stats.get_user_stats(request.user)
+    completed_articles = user_stats.completed_count
+    total_time = user_stats.total_time
     
     try:
         streak = ReadingStreak.objects.get(user=request.user)
@@ -1834,88 +1634,21 @@ def my_achievements(request):
 
 @login_required
 def download_article_pdf(request, article_id):
-    """Download article as PDF"""
-    import re
-    from html import unescape
-    
-    def strip_html_for_pdf(html_content):
-        """Strip HTML tags and convert to plain text for PDF generation"""
-        if not html_content:
-            return ''
-        
-        # Replace <br>, <br/>, <br /> with newlines
-        text = re.sub(r'<br\s*/?>', '\n', html_content, flags=re.IGNORECASE)
-        
-        # Replace </p> with double newlines for paragraph breaks
-        text = re.sub(r'</p>', '\n\n', text, flags=re.IGNORECASE)
-        
-        # Remove all other HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # Unescape HTML entities
-        text = unescape(text)
-        
-        # Clean up multiple newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        return text.strip()
-    
-    article = get_object_or_404(Article, id=article_id)
-    
-    # Strip HTML from content for PDF
-    clean_content = strip_html_for_pdf(article.content)
-    
-    if not REPORTLAB_AVAILABLE:
-        # Fallback to plain text if reportlab not installed
-        response = HttpResponse(content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename="{article.slug}.txt"'
-        response.write(f"{article.title}\n\n")
-        response.write(f"Category: {article.category.name if article.category else 'N/A'}\n")
-        response.write(f"Difficulty: {article.get_difficulty_display()}\n")
-        response.write(f"Reading Time: {article.estimated_read_time} minutes\n\n")
-        response.write("=" * 50 + "\n\n")
-        response.write(clean_content)
-        return response
-    
-    # Create PDF with reportlab
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
+    """Download article as PDF (plain text without reportlab), served from the export cache"""
+    article = get_object_or_404(Article.objects.select_related('category'), id=article_id)
+    key = pdf_export.export_key(article, request.reader.language)
+    etag = pdf_export.export_etag(key)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    export, _ = pdf_export.open_export(article, request.reader.language)
+    response = FileResponse(
+        export, as_attachment=True,
+        filename=f'{article.slug}.{pdf_export.EXTENSION}', content_type=pdf_export.CONTENT_TYPE,
     )
-    
-    story = []
-    story.append(Paragraph(article.title, title_style))
-    story.append(Spacer(1, 12))
-    
-    meta_text = f"Category: {article.category.name if article.category else 'N/A'} | Difficulty: {article.get_difficulty_display()} | {article.estimated_read_time} min read"
-    story.append(Paragraph(meta_text, styles['Normal']))
-    story.append(Spacer(1, 24))
-    
-    # Add content paragraphs - use cleaned content
-    content_paragraphs = clean_content.split('\n\n')
-    for para in content_paragraphs:
-        if para.strip():
-            # Escape any remaining special XML characters for ReportLab
-            safe_para = para.strip().replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            try:
-                story.append(Paragraph(safe_para, styles['Normal']))
-                story.append(Spacer(1, 12))
-            except Exception as e:
-                # If paragraph still fails, add as plain text
-                story.append(Paragraph(safe_para.encode('ascii', 'ignore').decode('ascii'), styles['Normal']))
-                story.append(Spacer(1, 12))
-    
-    doc.build(story)
-    
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{article.slug}.pdf"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=3600'
     return response
 
 
@@ -1972,16 +1705,8 @@ Happy Reading,
 Smart Reader Team
 '''
     
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@smartreader.com',
-            [user.email],
-            fail_silently=True,
-        )
-    except Exception:
-        pass  # Don't break the app if email fails
+    if user.email:
+        outbox.enqueue(user.email, subject, message, kind='streak')
 
 
 @login_required  
@@ -2039,6 +1764,9 @@ def delete_reading_list(request, list_id):
             data = {}
 
     if reading_list.is_private:
+        if ratelimit.READING_LIST_PIN_USER.is_limited(request.user.pk):
+            return JsonResponse({'status': 'locked', 'message': 'Too many wrong PINs. Please try again later.'}, status=429)
+
         attempt, _ = ReadingListAccessAttempt.objects.get_or_create(
             user=request.user,
             reading_list=reading_list
@@ -2057,6 +1785,7 @@ def delete_reading_list(request, list_id):
 
         if not reading_list.check_pin(pin):
             attempt.register_delete_failure()
+            ratelimit.READING_LIST_PIN_USER.hit(request.user.pk)
             if attempt.is_delete_locked():
                 return JsonResponse({
                     'status': 'locked',
@@ -2101,6 +1830,9 @@ def edit_reading_list(request, list_id):
                 if reading_list.is_public:
                     return JsonResponse({'status': 'success', 'message': 'Public list does not need a PIN.'})
 
+                if ratelimit.READING_LIST_PIN_USER.is_limited(request.user.pk):
+                    return JsonResponse({'status': 'locked', 'message': 'Too many wrong PINs. Please try again later.'}, status=429)
+
                 attempt, _ = ReadingListAccessAttempt.objects.get_or_create(
                     user=request.user,
                     reading_list=reading_list
@@ -2118,6 +1850,7 @@ def edit_reading_list(request, list_id):
 
                 if not reading_list.check_pin(current_pin):
                     attempt.register_failure()
+                    ratelimit.READING_LIST_PIN_USER.hit(request.user.pk)
                     if attempt.is_locked():
                         return JsonResponse({
                             'status': 'locked',
@@ -2137,6 +1870,9 @@ def edit_reading_list(request, list_id):
                 return JsonResponse({'status': 'error', 'message': 'List name is required.'})
 
             if reading_list.is_private:
+                if ratelimit.READING_LIST_PIN_USER.is_limited(request.user.pk):
+                    return JsonResponse({'status': 'locked', 'message': 'Too many wrong PINs. Please try again later.'}, status=429)
+
                 attempt, _ = ReadingListAccessAttempt.objects.get_or_create(
                     user=request.user,
                     reading_list=reading_list
@@ -2154,6 +1890,7 @@ def edit_reading_list(request, list_id):
 
                 if not reading_list.check_pin(current_pin):
                     attempt.register_failure()
+                    ratelimit.READING_LIST_PIN_USER.hit(request.user.pk)
                     if attempt.is_locked():
                         return JsonResponse({
                             'status': 'locked',
@@ -2333,9 +2070,7 @@ def admin_users(request):
         users = users.filter(admin_query).distinct()
     
     # Pagination
-    paginator = Paginator(users, 20)
-    page = request.GET.get('page')
-    users = paginator.get_page(page)
+    users = paginate(request, users, 20, ('-date_joined', '-id'))
     
     context = {
         'users': users,
@@ -2436,17 +2171,8 @@ This is an automated message. Please do not reply directly to this email.
 For support, contact: {admin_email}
 """
                 
-                try:
-                    send_mail(
-                        subject,
-                        message,
-                        settings.EMAIL_HOST_USER,
-                        [user.email],
-                        fail_silently=False,
-                    )
-                    messages.success(request, f'User {user.username} has been {status} and notified via email.')
-                except Exception as e:
-                    messages.warning(request, f'User {user.username} has been {status}, but email notification failed: {str(e)}')
+                outbox.enqueue(user.email, subject, message, from_email=settings.EMAIL_HOST_USER, kind='account')
+                messages.success(request, f'User {user.username} has been {status} and will be notified via email.')
             else:
                 messages.info(request, f'User status unchanged.')
                 
@@ -2507,9 +2233,7 @@ def admin_articles(request):
         articles = articles.filter(is_featured=True)
     
     # Pagination
-    paginator = Paginator(articles, 20)
-    page = request.GET.get('page')
-    articles = paginator.get_page(page)
+    articles = paginate(request, articles, 20, ('-created_at', '-id'))
     
     context = {
         'articles': articles,
@@ -2624,6 +2348,17 @@ def admin_delete_article(request, article_id):
     return redirect('admin_articles')
 
 
+@login_required
+@user_passes_test(is_admin)
+def admin_cache_stats(request):
+    """Cache hit/miss counters of the worker serving this request."""
+    return JsonResponse({
+        'backend': settings.CACHES['default']['BACKEND'],
+        'namespaces': sorted(app_cache.registered()),
+        'stats': app_cache.stats(),
+    })
+
+
 @login_required
 @user_passes_test(is_admin)
 def admin_analytics(request):
@@ -2633,78 +2368,50 @@ def admin_analytics(request):
     # Time period filter
     period = request.GET.get('period', '7')
     try:
-        days = int(period)
+        days = min(max(int(period), 1), analytics.MAX_PERIOD_DAYS)
     except:
         days = 7
     
     start_date = today - timedelta(days=days-1)
+    start_time = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
     
-    # Daily visits
-    daily_visits = []
-    for i in range(days):
-        day = start_date + timedelta(days=i)
-        count = SiteVisit.objects.filter(visit_date=day).count()
-        unique_users = SiteVisit.objects.filter(visit_date=day).values('user').distinct().count()
-        daily_visits.append({
-            'date': day.strftime('%d %b'),
-            'visits': count,
-            'unique': unique_users
-        })
-    
-    # Total visits and article views
-    total_visits = SiteVisit.objects.filter(visit_date__gte=start_date).count()
-    total_article_views = ArticleViewLog.objects.filter(viewed_at__date__gte=start_date).count()
+    # Visits, views and registrations: daily rollups plus today's raw rows
+    summary = analytics.period_summary(start_date, today)
+    daily_visits = [
+        {'date': day['date'].strftime('%d %b'), 'visits': day['visits'], 'unique': day['unique_visitors']}
+        for day in summary['days']
+    ]
+    daily_registrations = [
+        {'date': day['date'].strftime('%d %b'), 'registrations': day['registrations']}
+        for day in summary['days']
+    ]
+    total_visits = summary['total_visits']
+    total_article_views = summary['total_article_views']
     
     # Article analytics - Top 10 only
-    article_views = ArticleViewLog.objects.filter(
-        viewed_at__date__gte=start_date
-    ).values('article__title').annotate(
-        views=Count('id'),
-        total_time=Sum('time_spent')
-    ).order_by('-views')[:10]
+    article_views = summary['top_articles']
     
     # User engagement
     active_readers = ReadingProgress.objects.filter(
-        last_read_at__date__gte=start_date
+        last_read_at__gte=start_time
     ).values('user').distinct().count()
     
     completed_articles = ReadingProgress.objects.filter(
-        last_read_at__date__gte=start_date,
+        last_read_at__gte=start_time,
         is_completed=True
     ).count()
     
     # New user registrations in the period
-    new_users = User.objects.filter(date_joined__date__gte=start_date).count()
+    new_users = summary['new_users']
     
     # Total users
     total_users = User.objects.count()
     
     # Active users (users who visited in the period)
-    active_users = SiteVisit.objects.filter(
-        visit_date__gte=start_date,
-        user__isnull=False
-    ).values('user').distinct().count()
-    
-    # Daily user registrations
-    daily_registrations = []
-    for i in range(days):
-        day = start_date + timedelta(days=i)
-        count = User.objects.filter(date_joined__date=day).count()
-        daily_registrations.append({
-            'date': day.strftime('%d %b'),
-            'registrations': count
-        })
+    active_users = summary['active_users']
     
     # Top active users - Top 1 only (compact view, change to 3 when more users)
-    top_users = SiteVisit.objects.filter(
-        visit_date__gte=start_date,
-        user__isnull=False
-    ).values(
-        'user__username',
-        'user__email'
-    ).annotate(
-        visit_count=Count('id')
-    ).order_by('-visit_count')[:1]
+    top_users = summary['top_users']
     
     # Category distribution - Top 10 only
     category_stats = Article.objects.values('category__name').annotate(
@@ -2713,9 +2420,7 @@ def admin_analytics(request):
     ).order_by('-views')[:10]
     
     # User engagement stats
-    total_reading_time = ArticleViewLog.objects.filter(
-        viewed_at__date__gte=start_date
-    ).aggregate(total=Sum('time_spent'))['total'] or 0
+    total_reading_time = summary['total_reading_time']
     
     # Average reading time per user
     avg_reading_time = total_reading_time // max(active_readers, 1)
@@ -2740,10 +2445,7 @@ def admin_analytics(request):
     total_reading_lists = ReadingList.objects.count()
     
     # Top rated articles (for display)
-    top_rated_articles = Article.objects.annotate(
-        avg_score=Avg('ratings__score'),
-        rating_count=Count('ratings')
-    ).filter(rating_count__gt=0).order_by('-avg_score')[:3]
+    top_rated_articles = Article.objects.filter(rating_count__gt=0).order_by('-rating_avg', '-rating_count')[:3]
     
     # Most bookmarked articles
     most_bookmarked = Article.objects.annotate(
@@ -2798,13 +2500,7 @@ def admin_analytics(request):
 # Middleware function to track visits
 def track_visit(request):
     """Track site visits - call this from middleware or views"""
-    if not request.path.startswith('/admin/') and not request.path.startswith('/static/'):
-        SiteVisit.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-            page_visited=request.path
-        )
+    visits.record_request(request)
 
 
 # ============ FEEDBACK ============
@@ -2873,12 +2569,12 @@ def admin_feedbacks(request):
     ).filter(feedback_count__gt=0).order_by('-feedback_count')
     
     # Pagination
-    paginator = Paginator(feedbacks, 20)
-    page = request.GET.get('page')
-    feedbacks = paginator.get_page(page)
+    feedbacks_count = count_label(feedbacks)
+    feedbacks = paginate(request, feedbacks, 20, ('-created_at', '-id'))
     
     context = {
         'feedbacks': feedbacks,
+        'feedbacks_count': feedbacks_count,
         'articles_with_feedback': articles_with_feedback,
         'selected_article': article_id,
         'selected_helpful': helpful,
@@ -2890,20 +2586,22 @@ def admin_feedbacks(request):
 @login_required
 def change_language(request):
     """Change user's language preference"""
+    response = redirect(request.META.get('HTTP_REFERER', 'profile'))
     if request.method == 'POST':
         language = request.POST.get('language', 'EN').upper()
         if language:
-            profile, created = UserProfile.objects.get_or_create(user=request.user)
+            profile = request.reader.profile
             profile.preferred_language = language
             profile.save()
             
-            # Activate language for current session (convert to lowercase for Django translation)
+            # Activate language for current session (convert to lowercase for Django translation);
+            # Django 4 keeps the chosen language in a cookie rather than the session
             translation.activate(language.lower())
-            request.session[translation.LANGUAGE_SESSION_KEY] = language.lower()
+            response.set_cookie(settings.LANGUAGE_COOKIE_NAME, language.lower())
             
             messages.success(request, 'Language preference updated successfully! 🌍')
     
-    return redirect(request.META.get('HTTP_REFERER', 'profile'))
+    return response
 
 
 @login_required
@@ -2912,7 +2610,7 @@ def change_theme(request):
     if request.method == 'POST':
         theme = request.POST.get('theme')
         if theme in ['light', 'dark']:
-            profile, created = UserProfile.objects.get_or_create(user=request.user)
+            profile = request.reader.profile
             profile.theme = theme
             profile.save()
             
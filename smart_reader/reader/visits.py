@@ -0,0 +1,188 @@
+"""
+Site visit recording.
+
+VisitTrackingMiddleware hands each request to the configured backend
+(settings.VISIT_BACKEND). The default BufferedVisitBackend keeps visits in
+an in-process ring buffer that the worker's background flush thread (see
+flusher.py) writes with one bulk_create when it is large or old enough, so
+requests never wait on an INSERT.
+Requests can be sampled (VISIT_SAMPLE_RATE) and filtered by path prefix
+(VISIT_INCLUDE_PATHS / VISIT_EXCLUDE_PATHS). Sampled counts are not scaled.
+"""
+import atexit
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import flusher
+
+
+DEFAULT_EXCLUDE_PATHS = (
+    '/static/', '/media/', '/admin/', '/favicon.ico',
+    '/save-progress/', '/api/search-suggestions/',
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_client_ip(request):
+    """
+    The client address. Clients can put anything in X-Forwarded-For, so
+    only the hops appended by the TRUSTED_PROXY_COUNT proxies in front of
+    the app are used: the client is the address the outermost of them saw.
+    With no trusted proxies (the default) it is REMOTE_ADDR.
+    """
+    proxies = _setting('TRUSTED_PROXY_COUNT', 0)
+    if proxies:
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+def should_track(path):
+    """Apply the path allow/deny lists."""
+    include = _setting('VISIT_INCLUDE_PATHS', ())
+    if include and not path.startswith(tuple(include)):
+        return False
+    return not path.startswith(tuple(_setting('VISIT_EXCLUDE_PATHS', DEFAULT_EXCLUDE_PATHS)))
+
+
+def visit_from_request(request):
+    """Build an unsaved SiteVisit for the request, stamped with the request time."""
+    from .models import SiteVisit
+
+    now = timezone.now()
+    return SiteVisit(
+        user_id=request.user.pk if request.user.is_authenticated else None,
+        ip_address=get_client_ip(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
+        page_visited=request.path[:255],
+        visit_date=timezone.localdate(now),
+        visit_time=now,
+    )
+
+
+# ============ BACKENDS ============
+class BaseVisitBackend:
+    """Interface for visit backends."""
+
+    def record(self, visit):
+        raise NotImplementedError
+
+    def flush(self):
+        """Write anything buffered. Returns the number of visits written."""
+        return 0
+
+
+class NullVisitBackend(BaseVisitBackend):
+    """Discards visits (tracking disabled)."""
+
+    def record(self, visit):
+        pass
+
+
+class DatabaseVisitBackend(BaseVisitBackend):
+    """Writes each visit immediately, one INSERT per request."""
+
+    def record(self, visit):
+        visit.save()
+
+
+class BufferedVisitBackend(BaseVisitBackend):
+    """
+    In-process ring buffer flushed with bulk_create once it holds
+    VISIT_FLUSH_THRESHOLD visits or VISIT_FLUSH_INTERVAL seconds have passed
+    (by the background flush thread, or inline when that is disabled).
+    If the database is unavailable the buffer keeps the newest
+    VISIT_BUFFER_SIZE visits and drops the oldest.
+    """
+
+    def __init__(self):
+        self._buffer = deque(maxlen=_setting('VISIT_BUFFER_SIZE', 10000))
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, visit):
+        with self._lock:
+            self._buffer.append(visit)
+            due = (
+                len(self._buffer) >= _setting('VISIT_FLUSH_THRESHOLD', 100)
+                or time.monotonic() - self._last_flush >= _setting('VISIT_FLUSH_INTERVAL', 30)
+            )
+        flusher.notify('visits', due)
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        from .models import SiteVisit
+
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+
+        if not batch:
+            return 0
+        try:
+            SiteVisit.objects.bulk_create(batch, batch_size=500)
+        except Exception:
+            # Put the visits back; the oldest are dropped if the buffer overflows
+            with self._lock:
+                self._buffer = deque(batch + list(self._buffer), maxlen=self._buffer.maxlen)
+            raise
+        return len(batch)
+
+
+# ============ MODULE API ============
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = _setting('VISIT_BACKEND', 'reader.visits.BufferedVisitBackend')
+                _backend = import_string(path)()
+    return _backend
+
+
+def record_request(request):
+    """Record a visit for the request unless it is filtered out or not sampled."""
+    if not should_track(request.path):
+        return False
+    sample_rate = _setting('VISIT_SAMPLE_RATE', 1.0)
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return False
+    get_backend().record(visit_from_request(request))
+    return True
+
+
+def flush():
+    return get_backend().flush()
+
+
+flusher.register('visits', flush, 'VISIT_FLUSH_INTERVAL', 30)
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass  # Never block interpreter shutdown
+
+
+def register_shutdown_hook():
+    """Drain buffered visits when the worker process exits."""
+    atexit.register(_flush_at_exit)
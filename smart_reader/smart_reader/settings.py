@@ -54,6 +54,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'reader.middleware.ReaderPreferencesMiddleware',  # Lazy per-request language/theme/admin flags
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'reader.middleware.VisitTrackingMiddleware',  # Track site visits for analytics
@@ -193,6 +194,7 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Media files (user uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+PDF_EXPORT_ROOT = os.getenv('PDF_EXPORT_ROOT', str(MEDIA_ROOT / 'exports'))  # cached article PDFs
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -230,14 +232,131 @@ if USE_REAL_EMAIL:
     EMAIL_TIMEOUT = 20
     SERVER_EMAIL = DEFAULT_FROM_EMAIL
 else:
-    # Console Backend - OTPs printed in terminal (development)
-    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+    # Console Backend - OTPs printed in terminal (development).
+    # EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend writes
+    # messages to EMAIL_FILE_PATH instead (locmem is used by the test runner).
+    EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+    EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails'))
     DEFAULT_FROM_EMAIL = 'SmartReader <noreply@smartreader.com>'
     EMAIL_TIMEOUT = 5
 
+# Outbound email queue (see reader/outbox.py). Views only enqueue; run
+# `python manage.py send_queued_email --loop` as a worker to deliver.
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '50'))  # messages per SMTP connection
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+EMAIL_RETRY_DELAY = int(os.getenv('EMAIL_RETRY_DELAY', '30'))  # seconds before the first retry; doubles each time
+EMAIL_SEND_LEASE = int(os.getenv('EMAIL_SEND_LEASE', '600'))  # seconds before a claimed message can be retried
+
 # ============ RENDER DATABASE CONFIGURATION ============
 # Automatically use PostgreSQL when DATABASE_URL is set (Render deployment)
 DATABASE_URL = os.getenv('DATABASE_URL')
 if DATABASE_URL:
     DATABASES['default'] = dj_database_url.config(default=DATABASE_URL, conn_max_age=600)
 
+
+# ============ BACKGROUND FLUSHING ============
+# Buffered view counts, progress heartbeats and visits are written by a
+# thread in each worker (see reader/flusher.py), not by the requests that
+# fill the buffers; the same thread rebuilds the search autocomplete index.
+# With BACKGROUND_FLUSH=False (the test suite) this work is done inline.
+BACKGROUND_FLUSH = os.getenv('BACKGROUND_FLUSH', 'True') == 'True'
+
+# ============ ARTICLE VIEW COUNTER ============
+# Article views are buffered per process and written back in bulk
+# (see reader/view_counter.py). A flush happens when either limit is hit,
+# and the buffer is drained when the worker exits.
+VIEW_COUNT_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNT_FLUSH_INTERVAL', '30'))  # seconds
+VIEW_COUNT_FLUSH_THRESHOLD = int(os.getenv('VIEW_COUNT_FLUSH_THRESHOLD', '200'))  # buffered views
+
+# ============ READING PROGRESS PIPELINE ============
+# /save-progress/ heartbeats are coalesced per (user, article) in each
+# worker and written in bulk (see reader/progress.py). Completions and the
+# heartbeat sent when the reader leaves the page are written immediately;
+# other heartbeats wait for the next flush.
+PROGRESS_FLUSH_INTERVAL = int(os.getenv('PROGRESS_FLUSH_INTERVAL', '60'))  # seconds
+PROGRESS_FLUSH_THRESHOLD = int(os.getenv('PROGRESS_FLUSH_THRESHOLD', '500'))  # dirty (user, article) pairs
+PROGRESS_ENTRY_TTL = int(os.getenv('PROGRESS_ENTRY_TTL', '900'))  # seconds an idle snapshot is kept
+
+# Days of reading history shown on the streaks calendar
+STREAK_HISTORY_DAYS = int(os.getenv('STREAK_HISTORY_DAYS', '365'))
+
+# ============ SITE VISIT TRACKING ============
+# VisitTrackingMiddleware buffers visits per worker and writes them with
+# bulk_create (see reader/visits.py). Set VISIT_BACKEND to
+# 'reader.visits.DatabaseVisitBackend' to write each visit immediately,
+# or 'reader.visits.NullVisitBackend' to disable tracking.
+VISIT_BACKEND = os.getenv('VISIT_BACKEND', 'reader.visits.BufferedVisitBackend')
+VISIT_SAMPLE_RATE = float(os.getenv('VISIT_SAMPLE_RATE', '1.0'))  # fraction of requests recorded
+VISIT_FLUSH_INTERVAL = int(os.getenv('VISIT_FLUSH_INTERVAL', '30'))  # seconds
+VISIT_FLUSH_THRESHOLD = int(os.getenv('VISIT_FLUSH_THRESHOLD', '100'))  # buffered visits
+VISIT_BUFFER_SIZE = int(os.getenv('VISIT_BUFFER_SIZE', '10000'))  # visits kept if the database is down
+VISIT_INCLUDE_PATHS = []  # if set, only these path prefixes are recorded
+VISIT_EXCLUDE_PATHS = [
+    '/static/', '/media/', '/admin/', '/favicon.ico',
+    '/save-progress/', '/api/search-suggestions/',
+]
+
+# Seconds before the search autocomplete index is rebuilt to pick up
+# new popularity order (article edits start a rebuild right away)
+SUGGESTION_INDEX_TTL = int(os.getenv('SUGGESTION_INDEX_TTL', '900'))
+
+# ============ CACHE ============
+# Shared cache for page payloads, version stamps and counters (see
+# reader/cache.py for the key registry). CACHE_BACKEND selects:
+#   'file'      - on-disk cache shared by all workers on one host (default)
+#   'redis'     - Redis at CACHE_URL (needs the redis package)
+#   'memcached' - memcached at CACHE_URL (needs pymemcache)
+#   'locmem'    - per-process memory; invalidation does not reach other workers
+# The file and locmem backends cull random entries past MAX_ENTRIES; that
+# includes version stamps, which only costs misses (see reader/cache.py).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_URL = os.getenv('CACHE_URL', '')
+_CACHE_BACKENDS = {
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.getenv('CACHE_DIR', str(BASE_DIR / '.cache'))),
+    'redis': ('django.core.cache.backends.redis.RedisCache', CACHE_URL or 'redis://127.0.0.1:6379/1'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', CACHE_URL or '127.0.0.1:11211'),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'smart-reader'),
+}
+_cache_backend, _cache_location = _CACHE_BACKENDS.get(CACHE_BACKEND, _CACHE_BACKENDS['file'])
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': _cache_location,
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'smartreader'),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000} if CACHE_BACKEND in ('file', 'locmem') else {},
+    }
+}
+
+# Per-view cache lifetimes in seconds (edits invalidate these entries immediately)
+HOME_CACHE_TTL = int(os.getenv('HOME_CACHE_TTL', '300'))  # home page payload per language
+HOME_PAGE_CACHE_TTL = int(os.getenv('HOME_PAGE_CACHE_TTL', '60'))  # rendered home page for anonymous visitors
+TAXONOMY_SIDEBAR_TTL = int(os.getenv('TAXONOMY_SIDEBAR_TTL', '3600'))  # article list categories/tags
+
+
+# ============ RETENTION ============
+# `manage.py purge_stale_data` deletes visit/view logs older than this
+# (only for days already rolled up). Keep it above STREAK_HISTORY_DAYS:
+# the streak calendar reads raw view logs.
+LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', '400'))
+
+# ============ RATE LIMITS ============
+# OTP, password reset, email check and reading-list PIN limits are counted
+# in the cache (see reader/ratelimit.py). Override one with
+# {'otp.send.email': (limit, window_seconds)}.
+RATE_LIMITS = {}
+# Per-IP limits and visit logs take the client address from REMOTE_ADDR, or
+# with N reverse proxies in front of the app from the N-th X-Forwarded-For
+# hop counted from the right (see reader/visits.py). Render's load balancer
+# is one proxy.
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '1' if os.getenv('RENDER') else '0'))
+
+# ============ TRANSLATION ============
+# Article translations are made ahead of time by `manage.py pretranslate_articles`
+# and stored in the database (see reader/translation.py). Set
+# TRANSLATION_BACKEND to 'reader.translation.OfflineTranslator' to work
+# without network access.
+TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'reader.translation.GoogleTranslatorBackend')
+TRANSLATION_WORKERS = int(os.getenv('TRANSLATION_WORKERS', '8'))  # chunks translated concurrently
+_translation_rate = os.getenv('TRANSLATION_RATE_LIMIT')  # requests/second; unset uses the backend's own limit
+TRANSLATION_RATE_LIMIT = float(_translation_rate) if _translation_rate else None
@@ -463,6 +463,7 @@ function saveProgressOnUnload() {
             position: scrollTop,
             percentage: maxPercentage, // Send max percentage to ensure completion is recorded
             time: timeSpent,
+            final: true,  // Leaving the page: written immediately rather than buffered
             csrfmiddlewaretoken: csrftoken  // Include CSRF token in body
         })], { type: 'application/json' });
         
@@ -477,7 +478,8 @@ function saveProgressOnUnload() {
             article_id: articleId,
             position: scrollTop,
             percentage: maxPercentage,
-            time: timeSpent
+            time: timeSpent,
+            final: true
         }));
     }
 }